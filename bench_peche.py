@@ -0,0 +1,487 @@
+#!/usr/bin/env python3
+"""
+╔══════════════════════════════════════════════════════════════════╗
+║         PecheurConnect — Banc d'essai de bout en bout             ║
+║         Amonts simulés en local | 18 / 100 / 1000 zones           ║
+╚══════════════════════════════════════════════════════════════════╝
+
+Lance main() de script_peche.py contre des doublures locales :
+  - OpenWeather One Call, Telegram sendMessage et webhook Discord servis par
+    aiohttp (latence, taux d'erreurs 500 et de 429 configurables) ;
+  - copernicusmarine.open_dataset remplacé par des grilles xarray synthétiques.
+
+Chaque taille de run s'exécute dans un sous-processus (RSS de pointe propre)
+et dans un répertoire temporaire (aucune écriture dans le dépôt).
+
+Usage :
+    python bench_peche.py                              # 18, 100, 1000 zones
+    python bench_peche.py --zones 18,100 --latency-ms 80 --error-rate 0.02
+    python bench_peche.py --baseline bench_baseline.json   # comparaison
+    python bench_peche.py --zones 1000 --history-days 28   # + 4 semaines d'historique simulé
+"""
+
+import os
+import sys
+import json
+import time
+import types
+import random
+import asyncio
+import argparse
+import platform
+import resource
+import tempfile
+import subprocess
+import numpy as np
+
+from pathlib import Path
+from datetime import datetime, timedelta
+
+REPO_DIR = Path(__file__).resolve().parent
+
+
+# ============================================================================
+# 1. DOUBLURE COPERNICUS (grilles xarray synthétiques)
+# ============================================================================
+
+GRID_STEP = 1 / 12   # résolution des produits GLOBAL_ANALYSISFORECAST
+
+
+def _coast_lon(lat):
+    """Trait de côte approximatif (longitude en fonction de la latitude)."""
+    return -16.45 - 0.9 * np.exp(-((lat - 14.7) / 0.35) ** 2)
+
+
+def make_fake_copernicusmarine(calls: list) -> types.ModuleType:
+    """Module copernicusmarine factice : open_dataset renvoie une grille 1/12° côtière."""
+    import xarray as xr
+
+    def open_dataset(dataset_id, variables, minimum_latitude, maximum_latitude,
+                     minimum_longitude, maximum_longitude, start_datetime=None,
+                     end_datetime=None, **kwargs):
+        calls.append(dataset_id)
+        lat = np.arange(-80, 90, GRID_STEP)
+        lat = lat[(lat >= minimum_latitude) & (lat <= maximum_latitude)]
+        lon = np.arange(-180, 180, GRID_STEP)
+        lon = lon[(lon >= minimum_longitude) & (lon <= maximum_longitude)]
+        LA, LO = np.meshgrid(lat, lon, indexing="ij")
+        land = LO > _coast_lon(LA)
+
+        fields = {
+            "uo":     0.10 + 0.08 * np.sin(LA * 3.0),
+            "vo":     0.15 + 0.08 * np.cos(LO * 3.0),
+            "thetao": 18.0 + (16.5 - LA) * 1.6,
+        }
+        data = {}
+        for var in variables:
+            base = np.where(land, np.nan, fields[var])
+            if var == "thetao":
+                data[var] = (("time", "depth", "latitude", "longitude"), np.stack([base, base - 0.8])[None])
+            else:
+                data[var] = (("time", "latitude", "longitude"), base[None])
+        coords = {"time": [np.datetime64("2026-01-01")], "latitude": lat, "longitude": lon}
+        if "thetao" in variables:
+            coords["depth"] = [0.49, 1.54]
+        return xr.Dataset(data, coords=coords)
+
+    module = types.ModuleType("copernicusmarine")
+    module.open_dataset = open_dataset
+    return module
+
+
+# ============================================================================
+# 2. AMONTS HTTP SIMULÉS (OpenWeather, Telegram, Discord)
+# ============================================================================
+
+class StandInUpstreams:
+    """
+    Serveur aiohttp local imitant les trois amonts.
+    latency_ms : latence moyenne (±50 %) par requête
+    error_rate : part des réponses HTTP 500
+    rate_429   : part des réponses HTTP 429 (avec Retry-After: 1)
+    """
+
+    def __init__(self, latency_ms: float = 40.0, error_rate: float = 0.0,
+                 rate_429: float = 0.0, seed: int = 42):
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.rate_429   = rate_429
+        self.rng        = random.Random(seed)
+        self.counts     = {}
+        self.runner     = None
+        self.base_url   = None
+
+    def _count(self, endpoint: str, status: int) -> None:
+        key = f"{endpoint}:{status}"
+        self.counts[key] = self.counts.get(key, 0) + 1
+
+    async def _simulate(self, endpoint: str):
+        """Latence + tirage erreur/429 ; retourne une réponse d'échec ou None."""
+        from aiohttp import web
+        await asyncio.sleep(self.latency_ms * self.rng.uniform(0.5, 1.5) / 1000)
+        draw = self.rng.random()
+        if draw < self.rate_429:
+            self._count(endpoint, 429)
+            return web.json_response({"message": "rate limited"}, status=429, headers={"Retry-After": "1"})
+        if draw < self.rate_429 + self.error_rate:
+            self._count(endpoint, 500)
+            return web.json_response({"message": "upstream error"}, status=500)
+        self._count(endpoint, 200)
+        return None
+
+    async def onecall(self, request):
+        from aiohttp import web
+        failed = await self._simulate("onecall")
+        if failed is not None:
+            return failed
+        lat = float(request.query.get("lat", 14.7))
+        lon = float(request.query.get("lon", -17.4))
+        rng = random.Random(hash((round(lat, 2), round(lon, 2))))
+        now = int(time.time())
+        wind = 3.0 + rng.random() * 9.0
+        return web.json_response({
+            "lat": lat, "lon": lon,
+            "current": {"dt": now, "temp": 22 + rng.random() * 6, "wind_speed": wind,
+                        "humidity": 60 + rng.randint(0, 30), "weather": [{"id": 800 + rng.randint(0, 4)}]},
+            "hourly": [{"dt": now + h * 3600, "temp": 23 + rng.random() * 4,
+                        "wind_speed": wind + rng.uniform(-2, 2), "pop": rng.random() * 0.5}
+                       for h in range(48)],
+            "daily": [{"dt": now + d * 86400, "temp": {"day": 23 + rng.random() * 4, "min": 21, "max": 28},
+                       "wind_speed": wind + rng.uniform(-3, 3), "pop": rng.random() * 0.6,
+                       "uvi": 5 + rng.random() * 5, "weather": [{"id": 800, "description": "ciel dégagé"}]}
+                      for d in range(8)],
+        })
+
+    async def telegram(self, request):
+        from aiohttp import web
+        failed = await self._simulate("telegram")
+        return failed if failed is not None else web.json_response({"ok": True, "result": {"message_id": 1}})
+
+    async def discord(self, request):
+        from aiohttp import web
+        failed = await self._simulate("discord")
+        return failed if failed is not None else web.Response(status=204)
+
+    async def start(self) -> str:
+        from aiohttp import web
+        app = web.Application()
+        app.router.add_get("/data/3.0/onecall", self.onecall)
+        app.router.add_route("*", "/bot{token}/sendMessage", self.telegram)
+        app.router.add_post("/discord/webhook", self.discord)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://127.0.0.1:{port}"
+        return self.base_url
+
+    async def stop(self) -> None:
+        if self.runner is not None:
+            await self.runner.cleanup()
+
+
+# ============================================================================
+# 3. ZONES SYNTHÉTIQUES ET CHRONOMÉTRAGE DES ÉTAPES
+# ============================================================================
+
+BENCH_REGIONS = [(15.4, "Nord"), (14.9, "Grande Côte"), (14.5, "Dakar"),
+                 (14.0, "Petite Côte"), (13.3, "Sine-Saloum"), (0.0, "Casamance")]
+
+
+def synthetic_zones(n: int, real_zones: dict, seed: int = 7) -> dict:
+    """Les 18 zones réelles, complétées par des points côtiers tirés en mer."""
+    zones = dict(list(real_zones.items())[:n])
+    rng   = random.Random(seed)
+    i = 0
+    while len(zones) < n:
+        lat = round(rng.uniform(12.2, 16.3), 3)
+        lon = round(float(_coast_lon(lat)) - rng.uniform(0.05, 1.2), 3)
+        region = next(name for bound, name in BENCH_REGIONS if lat >= bound)
+        zones[f"BENCH-{i:04d}"] = {"lat": lat, "lon": lon, "region": region, "desc": "Zone synthétique"}
+        i += 1
+    return zones
+
+
+# Étape → fonctions (ou méthodes "Classe.méthode") de script_peche chronométrées
+STAGES = {
+    "copernicus":   ["fetch_copernicus_batch"],
+    "zones":        ["RateLimitedScheduler.run"],
+    "tides":        ["compute_tide_tables"],
+    "data_json":    ["save_data_json"],
+    "history":      ["HistoryStore.append_results"],
+    "stats":        ["RollingStats.update", "RollingStats.save"],
+    "raster":       ["build_score_raster", "save_score_raster"],
+    "csv":          ["export_csv"],
+    "notify":       ["send_telegram", "send_discord"],
+}
+
+
+def instrument(sp, timings: dict) -> None:
+    """Enveloppe les fonctions de STAGES pour cumuler leur durée (s) par étape."""
+
+    def wrap(stage, fn):
+        if asyncio.iscoroutinefunction(fn):
+            async def timed(*args, **kwargs):
+                t0 = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - t0
+        else:
+            def timed(*args, **kwargs):
+                t0 = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - t0
+        return timed
+
+    for stage, names in STAGES.items():
+        for name in names:
+            owner_name, _, attr = name.rpartition(".")
+            owner = getattr(sp, owner_name) if owner_name else sp
+            setattr(owner, attr, wrap(stage, getattr(owner, attr)))
+
+
+# ============================================================================
+# 4. EXÉCUTION D'UNE TAILLE (sous-processus)
+# ============================================================================
+
+def run_child(args) -> dict:
+    """Exécute main() pour args.child zones dans le répertoire courant (temporaire)."""
+    os.environ.update({
+        "OPENWEATHER_API_KEY": "bench",
+        "COPERNICUS_USERNAME": "bench",
+        "COPERNICUS_PASSWORD": "bench",
+        "TELEGRAM_BOT_TOKEN":  "bench",
+        "TG_ID":               "1",
+        "PECHEUR_CACHE":       "0",
+        "PECHEUR_OW_RATE":     str(args.ow_rate),
+    })
+    cm_calls = []
+    sys.modules["copernicusmarine"] = make_fake_copernicusmarine(cm_calls)
+    sys.path.insert(0, str(REPO_DIR))
+
+    t_import = time.perf_counter()
+    import script_peche as sp
+    t_import = time.perf_counter() - t_import
+
+    real_zones = sp.load_zones()
+    sp.ZONES.clear()
+    sp.ZONES.update(synthetic_zones(args.child, real_zones))
+    timings = {}
+    instrument(sp, timings)
+
+    # Historique simulé préalable (semaines × toutes les zones) puis relecture complète
+    history = {}
+    if args.history_days:
+        end = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+        t0  = time.perf_counter()
+        history["rows"]   = sp.simulate_history(sp.ZONES, end - timedelta(days=args.history_days), end)
+        history["seed_s"] = round(time.perf_counter() - t0, 3)
+
+    upstreams = StandInUpstreams(args.latency_ms, args.error_rate, args.rate_429, args.seed)
+
+    async def _run() -> float:
+        base = await upstreams.start()
+        sp.OPENWEATHER_ONECALL_URL = f"{base}/data/3.0/onecall"
+        sp.TELEGRAM_API_URL        = base
+        os.environ["DISCORD_WEBHOOK"] = f"{base}/discord/webhook"
+        t0 = time.perf_counter()
+        try:
+            await sp.main()
+        finally:
+            wall = time.perf_counter() - t0
+            await upstreams.stop()
+        return wall
+
+    wall = asyncio.run(_run())
+    if history:
+        t0 = time.perf_counter()
+        store = sp.HistoryStore()
+        for name in sp.ZONES:
+            store.query(name, fields=["score"])
+        history["query_all_s"] = round(time.perf_counter() - t0, 3)
+    return {
+        "zones":         args.child,
+        "wall_s":        round(wall, 3),
+        "import_s":      round(t_import, 3),
+        "peak_rss_mb":   round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "requests":      dict(sorted(upstreams.counts.items())),
+        "requests_total": sum(upstreams.counts.values()),
+        "copernicus_calls": len(cm_calls),
+        "stages_s":      {k: round(v, 3) for k, v in timings.items()},
+        **({"history": history} if history else {}),
+    }
+
+
+def run_size(n: int, args) -> dict:
+    """Lance un sous-processus isolé pour n zones et relit son résultat."""
+    with tempfile.TemporaryDirectory(prefix=f"bench_{n}_") as workdir:
+        out = Path(workdir) / "result.json"
+        cmd = [sys.executable, str(Path(__file__).resolve()), "--child", str(n), "--child-out", str(out),
+               "--latency-ms", str(args.latency_ms), "--error-rate", str(args.error_rate),
+               "--rate-429", str(args.rate_429), "--ow-rate", str(args.ow_rate), "--seed", str(args.seed),
+               "--history-days", str(args.history_days)]
+        with open(Path(workdir) / "run.log", "w") as log:
+            proc = subprocess.run(cmd, cwd=workdir, stdout=log, stderr=subprocess.STDOUT)
+        if proc.returncode != 0 or not out.exists():
+            tail = (Path(workdir) / "run.log").read_text(errors="replace").splitlines()[-20:]
+            raise RuntimeError(f"run {n} zones en échec (code {proc.returncode}) :\n" + "\n".join(tail))
+        return json.loads(out.read_text())
+
+
+# ============================================================================
+# 4b. DÉMARRAGE À FROID (import du module + run complet en simulation)
+# ============================================================================
+
+HEAVY_MODULES = ("copernicusmarine", "xarray", "pandas", "zarr")
+SECRET_VARS   = ("OPENWEATHER_API_KEY", "COPERNICUS_USERNAME", "COPERNICUS_PASSWORD",
+                 "TELEGRAM_BOT_TOKEN", "TG_TOKEN", "TG_ID", "TELEGRAM_CHAT_ID", "DISCORD_WEBHOOK")
+
+IMPORT_PROBE = """
+import json, os, sys, time
+t0 = time.perf_counter()
+import script_peche
+print(json.dumps({
+    "import_s": time.perf_counter() - t0,
+    "heavy":    [m for m in %r if m in sys.modules],
+    "side_effects": sorted(os.listdir(".")),
+}))
+"""
+
+
+def measure_startup(repeats: int = 3) -> dict:
+    """
+    Démarrage à froid, chaque mesure dans un interpréteur neuf et un répertoire vide :
+      import_s     — `import script_peche` seul ;
+      simulation_s — `python script_peche.py` complet sans secrets (mode simulation).
+    Vérifie aussi qu'aucune dépendance lourde ni aucun fichier n'apparaît à l'import.
+    """
+    env = {k: v for k, v in os.environ.items() if k not in SECRET_VARS}
+    env["PYTHONPATH"] = str(REPO_DIR) + os.pathsep + env.get("PYTHONPATH", "")
+    imports, sims, probe = [], [], {}
+    for _ in range(repeats):
+        with tempfile.TemporaryDirectory(prefix="bench_startup_") as workdir:
+            out = subprocess.run([sys.executable, "-c", IMPORT_PROBE % (HEAVY_MODULES,)],
+                                 cwd=workdir, env=env, capture_output=True, text=True, check=True)
+            probe = json.loads(out.stdout.strip().splitlines()[-1])
+            imports.append(probe["import_s"])
+        with tempfile.TemporaryDirectory(prefix="bench_startup_") as workdir:
+            t0 = time.perf_counter()
+            subprocess.run([sys.executable, str(REPO_DIR / "script_peche.py")], cwd=workdir, env=env,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+            sims.append(time.perf_counter() - t0)
+    return {
+        "repeats":             repeats,
+        "import_s":            round(float(np.median(imports)), 3),
+        "simulation_s":        round(float(np.median(sims)), 3),
+        "heavy_at_import":     probe.get("heavy", []),
+        "files_at_import":     probe.get("side_effects", []),
+    }
+
+
+# ============================================================================
+# 5. RAPPORT ET COMPARAISON À UNE RÉFÉRENCE
+# ============================================================================
+
+def _git_rev() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR,
+                              capture_output=True, text=True).stdout.strip() or "?"
+    except OSError:
+        return "?"
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Affiche les écarts par taille ; retourne la liste des régressions au-delà de la tolérance."""
+    base_runs = {r["zones"]: r for r in baseline.get("runs", [])}
+    regressions = []
+    print(f"\nComparaison avec {baseline.get('git_rev', '?')} ({baseline.get('generated_at', '?')})")
+    for key in ("import_s", "simulation_s"):
+        old, new = baseline.get("startup", {}).get(key), results.get("startup", {}).get(key)
+        if old and new:
+            ratio = new / old
+            flag  = "  ⚠️" if ratio > 1 + tolerance else ""
+            print(f"  démarrage  {key:15s} {old:>10} → {new:>10}  ({ratio:5.2f}×){flag}")
+            if flag:
+                regressions.append(f"démarrage {key} {old} → {new}")
+    for run in results["runs"]:
+        ref = base_runs.get(run["zones"])
+        if ref is None:
+            print(f"  {run['zones']:>5} zones : pas de référence")
+            continue
+        for key in ("wall_s", "peak_rss_mb", "requests_total"):
+            old, new = ref[key], run[key]
+            ratio = new / old if old else float("inf") if new else 1.0
+            flag  = "  ⚠️" if ratio > 1 + tolerance else ""
+            print(f"  {run['zones']:>5} zones  {key:15s} {old:>10} → {new:>10}  ({ratio:5.2f}×){flag}")
+            if flag:
+                regressions.append(f"{run['zones']} zones {key} {old} → {new}")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Banc d'essai PecheurConnect (amonts simulés en local)")
+    parser.add_argument("--zones", default="18,100,1000", help="tailles à mesurer, séparées par des virgules")
+    parser.add_argument("--latency-ms", type=float, default=40.0, help="latence moyenne des amonts simulés")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="part des réponses HTTP 500")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="part des réponses HTTP 429")
+    parser.add_argument("--ow-rate", type=float, default=200.0, help="PECHEUR_OW_RATE pendant le banc (req/s)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default="bench_results.json", help="fichier de résultats")
+    parser.add_argument("--baseline", help="résultats de référence à comparer")
+    parser.add_argument("--tolerance", type=float, default=0.20, help="régression tolérée (0.20 = +20 %%)")
+    parser.add_argument("--history-days", type=int, default=0,
+                        help="jours d'historique simulé (SyntheticOcean) écrits avant chaque run")
+    parser.add_argument("--startup-repeats", type=int, default=3,
+                        help="mesures du démarrage à froid (0 = ignorer)")
+    parser.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--child-out", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        result = run_child(args)
+        Path(args.child_out).write_text(json.dumps(result, indent=2))
+        return 0
+
+    sizes = [int(s) for s in args.zones.split(",") if s.strip()]
+    results = {
+        "generated_at": datetime.utcnow().isoformat() + "Z",
+        "git_rev":      _git_rev(),
+        "python":       platform.python_version(),
+        "platform":     platform.platform(),
+        "config":       {k: getattr(args, k) for k in ("latency_ms", "error_rate", "rate_429", "ow_rate", "seed")},
+        "runs":         [],
+    }
+    if args.startup_repeats > 0:
+        print("▶ démarrage à froid...", flush=True)
+        results["startup"] = startup = measure_startup(args.startup_repeats)
+        print(f"  import {startup['import_s']:.3f}s | run simulation {startup['simulation_s']:.2f}s | "
+              f"modules lourds à l'import : {startup['heavy_at_import'] or 'aucun'} | "
+              f"fichiers créés : {startup['files_at_import'] or 'aucun'}")
+    for n in sizes:
+        print(f"▶ {n} zones...", flush=True)
+        run = run_size(n, args)
+        results["runs"].append(run)
+        stages = ", ".join(f"{k} {v:.2f}s" for k, v in run["stages_s"].items())
+        print(f"  {run['wall_s']:.2f}s | {run['requests_total']} requêtes | "
+              f"RSS {run['peak_rss_mb']} Mo\n  {stages}")
+        if "history" in run:
+            h = run["history"]
+            print(f"  historique : {h['rows']} lignes en {h['seed_s']:.2f}s, relecture {h['query_all_s']:.2f}s")
+
+    Path(args.out).write_text(json.dumps(results, indent=2, ensure_ascii=False))
+    print(f"\nRésultats écrits dans {args.out}")
+
+    if args.baseline:
+        regressions = compare(results, json.loads(Path(args.baseline).read_text()), args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} régression(s) au-delà de {args.tolerance:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,39 +1,63 @@
 #!/usr/bin/env python3
 """
 ╔══════════════════════════════════════════════════════════════════╗
-║         PecheurConnect v3.0 — Surveillance Maritime              ║
-║         18 zones sénégalaises | OpenWeather + Copernicus         ║
+║         PecheurConnect v4.2 — Surveillance Maritime              ║
+║         Zones de zones.csv | OpenWeather + Copernicus            ║
 ║         GitHub Actions | Async | Production-Ready                ║
 ╚══════════════════════════════════════════════════════════════════╝
 """
 
 import os
+import csv
+import signal
+import argparse
 import json
+import time
+import gzip
+import hashlib
+import base64
 import asyncio
 import logging
+import functools
+import threading
+import email.utils
+import mmap
+import shutil
 import numpy as np
 import aiohttp
 
+from collections import OrderedDict
+from contextlib import contextmanager
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from logging.handlers import RotatingFileHandler
 from dataclasses import dataclass, asdict
 from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 
-# Charge automatiquement le fichier .env en développement local
-# En production (GitHub Actions), les variables sont injectées directement
-try:
-    from dotenv import load_dotenv
-    load_dotenv()
-except ImportError:
-    pass  # python-dotenv absent — normal en CI si non installé
-
 # ============================================================================
 # 1. CONFIGURATION ET LOGGING
 # ============================================================================
 
+def load_env_file() -> None:
+    """
+    Charge le fichier .env (développement local) dans os.environ, sans écraser
+    les variables déjà définies. Appelé avant toute constante lue par os.getenv
+    (PECHEUR_*, secrets) : un .env est ainsi pris en compte partout.
+    En production (GitHub Actions), les variables sont injectées directement.
+    """
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        return  # python-dotenv absent — normal en CI si non installé
+    load_dotenv()
+
+
+load_env_file()
+
+
 def setup_logging() -> logging.Logger:
+    """Handlers fichier + console ; appelé par configure(), pas à l'import."""
     for folder in ["logs/history", "logs/stats"]:
         Path(folder).mkdir(parents=True, exist_ok=True)
 
@@ -54,7 +78,8 @@ def setup_logging() -> logging.Logger:
     return logger
 
 
-logger = setup_logging()
+# Aucun handler à l'import : configure() branche le fichier de log et la console
+logger = logging.getLogger("PecheurConnect")
 
 
 # ============================================================================
@@ -67,6 +92,8 @@ def load_secrets() -> dict:
     Supporte plusieurs noms de variables pour la compatibilité
     avec les différentes configurations GitHub Actions.
     """
+    # Le fichier .env éventuel est déjà chargé (load_env_file, à l'import)
+
     # Telegram : supporte TELEGRAM_BOT_TOKEN et TG_TOKEN (ancien nom)
     telegram_token = (
         os.getenv("TELEGRAM_BOT_TOKEN") or
@@ -106,51 +133,102 @@ def load_secrets() -> dict:
     return secrets
 
 
-SECRETS = load_secrets()
+# Rempli par configure() au démarrage de main() / du démon
+SECRETS: dict = {}
 
 
 # ============================================================================
-# 3. IMPORT COPERNICUS AVEC FALLBACK
+# 3. IMPORT COPERNICUS AVEC FALLBACK (paresseux)
 # ============================================================================
 
-try:
-    import copernicusmarine as cm
-    COPERNICUS_AVAILABLE = True
-    logger.info("Bibliothèque copernicusmarine chargée avec succès.")
-except ImportError:
-    COPERNICUS_AVAILABLE = False
-    logger.warning("copernicusmarine introuvable — mode simulation activé.")
-except Exception as _cop_err:
-    # La lib est installée mais crashe à l'import (conflit dépendances, etc.)
-    # Le message d'erreur exact aide au diagnostic
-    COPERNICUS_AVAILABLE = False
-    logger.warning(f"copernicusmarine présente mais non initialisable ({type(_cop_err).__name__}: {_cop_err}) — mode simulation activé.")
+@functools.lru_cache(maxsize=None)
+def load_copernicusmarine() -> Optional[object]:
+    """
+    Importe copernicusmarine (et avec lui xarray, pandas, zarr) à la première
+    utilisation du chemin Copernicus seulement : un run en simulation ou un
+    import du module n'en paie pas le coût. None si indisponible.
+    """
+    try:
+        import copernicusmarine as cm
+        logger.info("Bibliothèque copernicusmarine chargée avec succès.")
+        return cm
+    except ImportError:
+        logger.warning("copernicusmarine introuvable — mode simulation activé.")
+    except Exception as cop_err:
+        # La lib est installée mais crashe à l'import (conflit dépendances, etc.)
+        # Le message d'erreur exact aide au diagnostic
+        logger.warning(f"copernicusmarine présente mais non initialisable ({type(cop_err).__name__}: {cop_err}) — mode simulation activé.")
+    return None
+
+
+@functools.lru_cache(maxsize=None)
+def load_brotli() -> Optional[object]:
+    """Brotli optionnel : sans lui, seuls les jumeaux .gz sont publiés."""
+    try:
+        import brotli
+        return brotli
+    except ImportError:
+        return None
 
 
 # ============================================================================
-# 4. ZONES SÉNÉGALAISES — 18 zones complètes
+# 4. ZONES SÉNÉGALAISES — registre zones.csv + index par cellule de grille
 # ============================================================================
 
-ZONES: dict[str, dict] = {
-    "SAINT-LOUIS":           {"lat": 16.05, "lon": -16.65, "region": "Nord",        "desc": "Ndar - Nord"},
-    "GANDON":                {"lat": 16.00, "lon": -16.50, "region": "Nord",        "desc": "Estuaire du Fleuve"},
-    "SAINT-LOUIS-HYDROBASE": {"lat": 16.10, "lon": -16.48, "region": "Nord",        "desc": "Zone estuarienne"},
-    "POTOU":                 {"lat": 15.70, "lon": -16.55, "region": "Grande Côte", "desc": "Pêche côtière"},
-    "LOMPOUL":               {"lat": 15.45, "lon": -16.70, "region": "Grande Côte", "desc": "Plage isolée Nord"},
-    "KAYAR":                 {"lat": 14.95, "lon": -17.35, "region": "Grande Côte", "desc": "Fosse de Kayar"},
-    "DAKAR-YOFF":            {"lat": 14.80, "lon": -17.65, "region": "Dakar",       "desc": "Yoff - Virage"},
-    "DAKAR-SOUMBEDIOUNE":    {"lat": 14.68, "lon": -17.44, "region": "Dakar",       "desc": "Port artisanal"},
-    "DAKAR-HANN":            {"lat": 14.72, "lon": -17.38, "region": "Dakar",       "desc": "Baie de Hann"},
-    "THIAROYE-SUR-MER":      {"lat": 14.75, "lon": -17.40, "region": "Dakar",       "desc": "Banlieue littorale"},
-    "MBOUR-JOAL":            {"lat": 14.35, "lon": -17.15, "region": "Petite Côte", "desc": "Port de Mbour"},
-    "JOAL-FADIOUTH":         {"lat": 14.16, "lon": -16.85, "region": "Petite Côte", "desc": "Île coquillière"},
-    "PALMARIN":              {"lat": 14.00, "lon": -16.80, "region": "Petite Côte", "desc": "Zone protégée"},
-    "NDANGANE":              {"lat": 13.75, "lon": -16.65, "region": "Sine-Saloum", "desc": "Delta du Saloum"},
-    "DJIFER":                {"lat": 13.60, "lon": -16.75, "region": "Sine-Saloum", "desc": "Pointe de Sangomar"},
-    "KAFOUNTINE":            {"lat": 12.90, "lon": -16.75, "region": "Casamance",   "desc": "Nord Casamance"},
-    "CASAMANCE-ZIGUINCHOR":  {"lat": 12.50, "lon": -16.95, "region": "Casamance",   "desc": "Embouchure"},
-    "CAP-SKIRRING":          {"lat": 12.39, "lon": -16.74, "region": "Casamance",   "desc": "Sud Casamance"},
-}
+ZONES_FILE     = Path(os.getenv("PECHEUR_ZONES_FILE", Path(__file__).resolve().parent / "zones.csv"))
+ZONE_CELL_STEP = 1 / 12   # maille Copernicus GLOBAL_ANALYSISFORECAST (0.083°), nœuds multiples de 1/12
+
+
+def load_zones(path: Path = ZONES_FILE) -> dict[str, dict]:
+    """
+    Charge le registre des sites de débarquement (CSV : name,lat,lon,region,desc).
+    Les lignes invalides ou en double sont signalées et ignorées.
+    """
+    zones = {}
+    with open(path, newline="", encoding="utf-8") as f:
+        for line, row in enumerate(csv.DictReader(f), start=2):
+            name = (row.get("name") or "").strip()
+            try:
+                lat, lon = float(row["lat"]), float(row["lon"])
+            except (KeyError, TypeError, ValueError):
+                logger.warning(f"{path.name}:{line} — coordonnées invalides, site ignoré.")
+                continue
+            if not name or name in zones:
+                logger.warning(f"{path.name}:{line} — nom vide ou en double ({name!r}), site ignoré.")
+                continue
+            zones[name] = {
+                "lat":    lat,
+                "lon":    lon,
+                "region": (row.get("region") or "").strip(),
+                "desc":   (row.get("desc") or "").strip(),
+            }
+    return zones
+
+
+def build_cell_index(zones: dict[str, dict], step: float = ZONE_CELL_STEP) -> dict[tuple, dict]:
+    """
+    Index spatial : chaque site est rattaché au nœud de grille modèle le plus proche.
+    Retourne (i, j) → {"lat", "lon" (centre de cellule), "zones": [noms]} ;
+    les amonts sont interrogés une fois par cellule, le résultat est distribué aux sites.
+
+    Les valeurs publiées pour un site (One Call, prévisions horaires, moyennes
+    Copernicus) sont donc celles du centre de sa cellule, à au plus step/2 en
+    latitude et en longitude (~4.6 km pour 1/12°) : deux sites d'une même
+    cellule reçoivent des valeurs identiques. L'enregistrement garde les
+    coordonnées propres du site.
+    """
+    names = list(zones)
+    ii = np.rint(np.array([zones[n]["lat"] for n in names], dtype=float) / step).astype(int)
+    jj = np.rint(np.array([zones[n]["lon"] for n in names], dtype=float) / step).astype(int)
+    cells = {}
+    for name, i, j in zip(names, ii.tolist(), jj.tolist()):
+        cell = cells.setdefault((i, j), {"lat": round(i * step, 4), "lon": round(j * step, 4), "zones": []})
+        cell["zones"].append(name)
+    return cells
+
+
+# Rempli par configure() depuis ZONES_FILE (sauf si déjà renseigné, ex. banc d'essai)
+ZONES: dict[str, dict] = {}
 
 
 # ============================================================================
@@ -172,9 +250,94 @@ class IndicesMaritime:
 # 6. CALCULS HALIEUTIQUES ET SÉCURITÉ
 # ============================================================================
 
+# --- Sécurité — 4 niveaux cohérents avec le frontend ---
+# safe     : wave <= 1.0 m  → 🟢 Mer calme
+# caution  : wave <= 1.5 m  → 🟡 Mer agitée légère
+# warning  : wave <= 2.5 m  → 🟠 Mer formée
+# danger   : wave >  2.5 m  → 🔴 Mer agitée / dangereuse
+SAFETY_WAVE_BOUNDS = np.array([1.0, 1.5, 2.5])   # bornes supérieures incluses
+SAFETY_CODES = np.array(["safe", "caution", "warning", "danger"])
+SAFETY_TEXTS = np.array([
+    "🟢 FAVORABLE — Mer calme",
+    "🟡 VIGILANCE — Mer légèrement agitée",
+    "🟠 PRUDENCE — Mer formée",
+    "🔴 DANGER — Mer agitée",
+])
+
+
+def _round_half(values, decimals: int) -> np.ndarray:
+    """
+    Arrondi vectorisé identique à round() Python.
+    np.round diffère sur les cas d'égalité (x.x5) : ceux-ci sont recalculés
+    un par un, tous les autres restent vectorisés.
+    """
+    values = np.asarray(values, dtype=float)
+    flat   = values.ravel()
+    out    = np.round(flat, decimals)
+    scaled = flat * 10.0 ** decimals
+    ties   = np.abs(np.abs(scaled - np.trunc(scaled)) - 0.5) < 1e-6
+    if ties.any():
+        out[ties] = [round(float(v), decimals) for v in flat[ties]]
+    return out.reshape(values.shape)
+
+
+def safety_level_batch(wave) -> np.ndarray:
+    """Niveau de sécurité (0=safe … 3=danger) pour un tableau de hauteurs de vagues."""
+    return np.searchsorted(SAFETY_WAVE_BOUNDS, np.asarray(wave, dtype=float), side="left")
+
+
+def fishing_score_batch(wave, temp, current) -> np.ndarray:
+    """
+    Score de pêche pondéré (0–10, non arrondi) — vagues, SST et courant
+    de formes quelconques (ex. N zones × T pas de temps), diffusées entre elles.
+    """
+    wave    = np.asarray(wave, dtype=float)
+    temp    = np.asarray(temp, dtype=float)
+    current = np.asarray(current, dtype=float)
+    # Température optimale espèces côtières sénégalaises : 22–27°C
+    temp_score    = np.maximum(0.0, 10.0 - np.abs(temp - 24.5) * 1.2)
+    # Vagues : idéalement < 1.0 m
+    wave_score    = np.maximum(0.0, 10.0 - wave * 4.0)
+    # Courant : upwelling favorable entre 0.1 et 0.4 m/s
+    current_score = np.where(
+        (current >= 0.1) & (current <= 0.4),
+        10.0,
+        np.maximum(0.0, 10.0 - np.abs(current - 0.25) * 15)
+    )
+    # Pondération 0.4 / 0.4 / 0.2 (même ordre d'évaluation que np.average)
+    return temp_score * 0.4 + wave_score * 0.4 + current_score * 0.2
+
+
+def forecast_score_batch(wave, temp, wind) -> np.ndarray:
+    """
+    Score de pêche prévisionnel (0–10, non arrondi) à partir de la houle
+    estimée, de la température de l'air et du vent — utilisé pour les prévisions.
+    """
+    wave = np.asarray(wave, dtype=float)
+    temp = np.asarray(temp, dtype=float)
+    wind = np.asarray(wind, dtype=float)
+    s_wave = np.maximum(0, 10 - wave * 4)
+    s_temp = 10 - np.abs(temp - 24.5) * 0.6
+    s_wind = np.maximum(0, 10 - wind * 0.4)
+    return s_wave * .45 + s_temp * .3 + s_wind * .25
+
+
+def calculate_indices_batch(wave, temp, current) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Version vectorisée de calculate_indices pour N zones × T pas de temps.
+
+    Returns:
+        (codes de sécurité — tableau de str, scores de pêche arrondis à 0.1)
+    """
+    levels = safety_level_batch(wave)
+    scores = _round_half(fishing_score_batch(wave, temp, current), 1)
+    return SAFETY_CODES[levels], scores
+
+
 def calculate_indices(wave: float, temp: float, current: float) -> IndicesMaritime:
     """
     Calcule les indices de sécurité et de pêche.
+    Enveloppe scalaire de calculate_indices_batch — sorties inchangées.
 
     Args:
         wave:    Hauteur des vagues en mètres
@@ -184,34 +347,8 @@ def calculate_indices(wave: float, temp: float, current: float) -> IndicesMariti
     Returns:
         IndicesMaritime avec codes de sécurité et score de pêche
     """
-    # --- Sécurité — 4 niveaux cohérents avec le frontend ---
-    # safe     : wave <= 1.0 m  → 🟢 Mer calme
-    # caution  : wave <= 1.5 m  → 🟡 Mer agitée légère
-    # warning  : wave <= 2.5 m  → 🟠 Mer formée
-    # danger   : wave >  2.5 m  → 🔴 Mer agitée / dangereuse
-    if wave > 2.5:
-        s_text, s_code = "🔴 DANGER — Mer agitée", "danger"
-    elif wave > 1.5:
-        s_text, s_code = "🟠 PRUDENCE — Mer formée", "warning"
-    elif wave > 1.0:
-        s_text, s_code = "🟡 VIGILANCE — Mer légèrement agitée", "caution"
-    else:
-        s_text, s_code = "🟢 FAVORABLE — Mer calme", "safe"
-
-    # --- Score de pêche pondéré (0–10) ---
-    # Température optimale espèces côtières sénégalaises : 22–27°C
-    temp_score    = max(0.0, 10.0 - abs(temp - 24.5) * 1.2)
-    # Vagues : idéalement < 1.0 m
-    wave_score    = max(0.0, 10.0 - wave * 4.0)
-    # Courant : upwelling favorable entre 0.1 et 0.4 m/s
-    current_score = 10.0 if 0.1 <= current <= 0.4 else max(0.0, 10.0 - abs(current - 0.25) * 15)
-
-    peche_score = round(
-        float(np.average(
-            [temp_score, wave_score, current_score],
-            weights=[0.4, 0.4, 0.2]
-        )), 1
-    )
+    level       = int(safety_level_batch(wave))
+    peche_score = round(float(fishing_score_batch(wave, temp, current)), 1)
 
     if peche_score >= 7:
         peche_texte = "🎣 Excellentes conditions de pêche"
@@ -221,8 +358,8 @@ def calculate_indices(wave: float, temp: float, current: float) -> IndicesMariti
         peche_texte = "🎣 Conditions défavorables"
 
     return IndicesMaritime(
-        securite_texte=s_text,
-        securite_code=s_code,
+        securite_texte=str(SAFETY_TEXTS[level]),
+        securite_code=str(SAFETY_CODES[level]),
         peche_score=peche_score,
         peche_texte=peche_texte,
         wave=wave,
@@ -231,94 +368,984 @@ def calculate_indices(wave: float, temp: float, current: float) -> IndicesMariti
     )
 
 
+# ============================================================================
+# 6b. CACHE DISQUE DES RÉPONSES (TTL par source + éviction LRU)
+# ============================================================================
+
+CACHE_DIR       = Path("logs/cache")
+CACHE_ENABLED   = os.getenv("PECHEUR_CACHE", "1") != "0"
+CACHE_MAX_BYTES = int(os.getenv("PECHEUR_CACHE_MAX_MB", "64")) * 1024 * 1024
+
+# Durée de validité par source (s) — alignée sur le pas de temps du modèle amont.
+# Le pas de temps fait partie de la clé : une entrée n'est jamais servie au-delà.
+CACHE_TTL_S = {
+    "openweather":    3600,         # One Call : au plus un appel par heure et par point
+}
+# Les grilles Copernicus ne passent pas par ce cache : miroir Zarr local (section 10b)
+
+
+def _model_step(source: str, when: Optional[datetime] = None) -> str:
+    """Pas de temps modèle courant pour une source (horodatage tronqué au TTL)."""
+    ttl   = CACHE_TTL_S[source]
+    epoch = when.replace(tzinfo=timezone.utc).timestamp() if when else time.time()
+    return datetime.utcfromtimestamp(int(epoch // ttl) * ttl).strftime("%Y-%m-%dT%H:%M")
+
+
+class ResponseCache:
+    """
+    Cache disque adressé par contenu sous logs/cache/.
+    Clé = sha256(source + endpoint + coordonnées + pas de temps modèle).
+    Expiration : mtime + TTL de la source. Éviction LRU (atime, mis à jour
+    explicitement à chaque lecture) dès que la taille totale dépasse max_bytes.
+    La taille totale et l'ordre LRU sont tenus en mémoire (index clé → taille) :
+    le disque n'est parcouru qu'une fois, au premier accès du processus.
+    """
+
+    def __init__(self, root: Path = CACHE_DIR, max_bytes: int = CACHE_MAX_BYTES,
+                 enabled: bool = CACHE_ENABLED):
+        self.root      = Path(root)
+        self.max_bytes = max_bytes
+        self.enabled   = enabled
+        self._lock     = threading.Lock()
+        self._counts   = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+        self._index: Optional[OrderedDict[str, int]] = None   # clé → octets, du moins au plus récent
+        self._size     = 0
+
+    def _load_index(self) -> OrderedDict:
+        """Parcours unique du disque (sous verrou) : index LRU par atime et taille totale."""
+        if self._index is None:
+            entries = []
+            for path in self.root.glob("*/*"):
+                if ".tmp" in path.name:
+                    continue
+                try:
+                    st = path.stat()
+                except OSError:
+                    continue
+                entries.append((st.st_atime, path.name, st.st_size))
+            entries.sort()
+            self._index = OrderedDict((key, size) for _, key, size in entries)
+            self._size  = sum(self._index.values())
+        return self._index
+
+    def _forget(self, key: str) -> None:
+        """Retire une entrée supprimée de l'index (sous verrou)."""
+        size = self._load_index().pop(key, None)
+        if size is not None:
+            self._size -= size
+
+    @staticmethod
+    def key(source: str, parts: dict) -> str:
+        raw = json.dumps({"source": source, **parts}, sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / key
+
+    def get(self, source: str, parts: dict) -> Optional[bytes]:
+        if not self.enabled:
+            return None
+        key  = self.key(source, parts)
+        path = self._path(key)
+        try:
+            st = path.stat()
+            if time.time() - st.st_mtime > CACHE_TTL_S[source]:
+                path.unlink(missing_ok=True)
+                with self._lock:
+                    self._forget(key)
+                raise FileNotFoundError
+            data = path.read_bytes()
+            os.utime(path, (time.time(), st.st_mtime))  # LRU : dernier accès
+        except OSError:
+            with self._lock:
+                self._counts["misses"] += 1
+            return None
+        with self._lock:
+            self._counts["hits"] += 1
+            index = self._load_index()
+            if key in index:
+                index.move_to_end(key)
+        return data
+
+    def put(self, source: str, parts: dict, data: bytes) -> None:
+        if not self.enabled:
+            return
+        key  = self.key(source, parts)
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f".tmp{threading.get_ident()}")
+            tmp.write_bytes(data)
+            os.replace(tmp, path)  # écriture atomique
+        except OSError as e:
+            logger.warning(f"Cache : écriture impossible ({e})")
+            return
+        with self._lock:
+            self._counts["writes"] += 1
+            self._forget(key)
+            self._index[key] = len(data)
+            self._size      += len(data)
+            self._evict()
+
+    def get_json(self, source: str, parts: dict) -> Optional[dict]:
+        data = self.get(source, parts)
+        return json.loads(data) if data is not None else None
+
+    def put_json(self, source: str, parts: dict, obj) -> None:
+        self.put(source, parts, json.dumps(obj, separators=(",", ":")).encode("utf-8"))
+
+    def _evict(self) -> None:
+        """Supprime les entrées les moins récemment utilisées au-delà de max_bytes (sous verrou)."""
+        index = self._load_index()
+        while self._size > self.max_bytes and index:
+            key, size = index.popitem(last=False)
+            self._path(key).unlink(missing_ok=True)
+            self._size -= size
+            self._counts["evictions"] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._counts)
+
+
+RESPONSE_CACHE = ResponseCache()
+
+
+# ============================================================================
+# 6c. MÉTRIQUES D'EXÉCUTION (spans, latences par amont, mémoire de pointe)
+# ============================================================================
+
+METRICS_FILE        = Path(os.getenv("PECHEUR_METRICS_FILE", "logs/metrics.json"))
+METRICS_PROM_FILE   = os.getenv("PECHEUR_PROM_TEXTFILE")   # ex. /var/lib/node_exporter/pecheur.prom
+LATENCY_BUCKETS_S   = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf"))
+
+
+def _peak_rss_mb() -> Optional[float]:
+    """RSS de pointe du processus (Mo) ; None si le module resource est absent (Windows)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux : Ko, macOS : octets
+    return round(peak / (1024 * 1024 if os.uname().sysname == "Darwin" else 1024), 1)
+
+
+class Metrics:
+    """
+    Surface de métriques légère, sans dépendance :
+      - spans : nombre d'appels, durée cumulée et maximale par nom ;
+      - amonts : requêtes, statuts, retries, hits cache, fallbacks et
+        histogramme de latence (bornes LATENCY_BUCKETS_S) ;
+      - RSS de pointe.
+    Thread-safe (le pool I/O exécute Copernicus hors de l'event loop).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Remet les compteurs à zéro et l'horloge au début du run."""
+        with self._lock:
+            self._spans     = {}
+            self._upstreams = {}
+            self.started_at = datetime.utcnow()
+            self._t0        = time.perf_counter()
+
+    # --- Spans ----------------------------------------------------------------
+
+    def record_span(self, name: str, seconds: float) -> None:
+        with self._lock:
+            s = self._spans.setdefault(name, {"count": 0, "total_s": 0.0, "max_s": 0.0})
+            s["count"]   += 1
+            s["total_s"] += seconds
+            s["max_s"]    = max(s["max_s"], seconds)
+
+    def span(self, name: str) -> "_Span":
+        """Context manager : `with METRICS.span("stage.tides"): ...`"""
+        return _Span(self, name)
+
+    def timed(self, name: Optional[str] = None):
+        """Décorateur de span pour fonctions synchrones ou coroutines."""
+        def decorator(fn):
+            label = name or fn.__name__
+            if asyncio.iscoroutinefunction(fn):
+                @functools.wraps(fn)
+                async def async_wrapper(*args, **kwargs):
+                    with self.span(label):
+                        return await fn(*args, **kwargs)
+                return async_wrapper
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.span(label):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    # --- Amonts ---------------------------------------------------------------
+
+    def _upstream(self, name: str) -> dict:
+        u = self._upstreams.get(name)
+        if u is None:
+            u = self._upstreams[name] = {
+                "requests": 0, "status": {}, "network_errors": 0, "retries": 0,
+                "cache_hits": 0, "failures": 0, "fallbacks": 0, "short_circuits": 0,
+                "latency": {"buckets": [0] * len(LATENCY_BUCKETS_S), "sum_s": 0.0, "count": 0},
+            }
+        return u
+
+    def observe_request(self, upstream: str, seconds: float, status: Optional[int]) -> None:
+        """Une tentative HTTP : statut (None = erreur réseau/timeout) et latence."""
+        with self._lock:
+            u = self._upstream(upstream)
+            u["requests"] += 1
+            if status is None:
+                u["network_errors"] += 1
+            else:
+                u["status"][str(status)] = u["status"].get(str(status), 0) + 1
+            lat = u["latency"]
+            lat["buckets"][next(i for i, b in enumerate(LATENCY_BUCKETS_S) if seconds <= b)] += 1
+            lat["sum_s"] += seconds
+            lat["count"] += 1
+
+    def count(self, upstream: str, counter: str, n: int = 1) -> None:
+        """Incrémente un compteur d'amont (retries, cache_hits, failures, fallbacks, short_circuits)."""
+        with self._lock:
+            self._upstream(upstream)[counter] += n
+
+    # --- Export ---------------------------------------------------------------
+
+    def snapshot(self, extra: Optional[dict] = None) -> dict:
+        with self._lock:
+            spans = {
+                k: {"count": v["count"], "total_s": round(v["total_s"], 4), "max_s": round(v["max_s"], 4)}
+                for k, v in sorted(self._spans.items())
+            }
+            upstreams = {}
+            for name, u in sorted(self._upstreams.items()):
+                u   = json.loads(json.dumps(u))
+                lat = u["latency"]
+                lat["le"]    = [b if b != float("inf") else "+Inf" for b in LATENCY_BUCKETS_S]
+                lat["sum_s"] = round(lat["sum_s"], 4)
+                lat["avg_s"] = round(lat["sum_s"] / lat["count"], 4) if lat["count"] else None
+                upstreams[name] = u
+        return {
+            "started_at":  self.started_at.isoformat() + "Z",
+            "duration_s":  round(time.perf_counter() - self._t0, 3),
+            "peak_rss_mb": _peak_rss_mb(),
+            "spans":       spans,
+            "upstreams":   upstreams,
+            **(extra or {}),
+        }
+
+    def to_prometheus(self, snap: dict) -> str:
+        """Format texte Prometheus (collecteur textfile de node_exporter)."""
+        lines = [
+            "# TYPE pecheur_run_duration_seconds gauge",
+            f"pecheur_run_duration_seconds {snap['duration_s']}",
+        ]
+        if snap["peak_rss_mb"] is not None:
+            lines += ["# TYPE pecheur_peak_rss_bytes gauge",
+                      f"pecheur_peak_rss_bytes {int(snap['peak_rss_mb'] * 1024 * 1024)}"]
+        lines.append("# TYPE pecheur_span_seconds_total counter")
+        lines += [f'pecheur_span_seconds_total{{span="{n}"}} {s["total_s"]}' for n, s in snap["spans"].items()]
+        lines.append("# TYPE pecheur_span_calls_total counter")
+        lines += [f'pecheur_span_calls_total{{span="{n}"}} {s["count"]}' for n, s in snap["spans"].items()]
+        # Une famille = un bloc contigu (# TYPE puis toutes ses séries, amont par amont)
+        upstreams = snap["upstreams"]
+        lines.append("# TYPE pecheur_upstream_latency_seconds histogram")
+        for name, u in upstreams.items():
+            cumulative = 0
+            for le, n in zip(u["latency"]["le"], u["latency"]["buckets"]):
+                cumulative += n
+                lines.append(f'pecheur_upstream_latency_seconds_bucket{{upstream="{name}",le="{le}"}} {cumulative}')
+            lines.append(f'pecheur_upstream_latency_seconds_sum{{upstream="{name}"}} {u["latency"]["sum_s"]}')
+            lines.append(f'pecheur_upstream_latency_seconds_count{{upstream="{name}"}} {u["latency"]["count"]}')
+        lines.append("# TYPE pecheur_upstream_responses_total counter")
+        lines += [
+            f'pecheur_upstream_responses_total{{upstream="{name}",status="{status}"}} {n}'
+            for name, u in upstreams.items() for status, n in sorted(u["status"].items())
+        ]
+        for counter in ("network_errors", "retries", "cache_hits", "failures", "fallbacks", "short_circuits"):
+            lines.append(f"# TYPE pecheur_upstream_{counter}_total counter")
+            lines += [f'pecheur_upstream_{counter}_total{{upstream="{name}"}} {u[counter]}' for name, u in upstreams.items()]
+        if snap.get("breakers"):
+            lines.append("# TYPE pecheur_breaker_open gauge")
+            lines += [f'pecheur_breaker_open{{upstream="{n}"}} {int(b["state"] != "closed")}'
+                      for n, b in snap["breakers"].items()]
+            lines.append("# TYPE pecheur_breaker_trips_total counter")
+            lines += [f'pecheur_breaker_trips_total{{upstream="{n}"}} {b["trips"]}' for n, b in snap["breakers"].items()]
+        return "\n".join(lines) + "\n"
+
+    def write(self, extra: Optional[dict] = None) -> dict:
+        """Écrit METRICS_FILE (et le textfile Prometheus si PECHEUR_PROM_TEXTFILE est défini)."""
+        snap = self.snapshot(extra)
+        METRICS_FILE.parent.mkdir(parents=True, exist_ok=True)
+        with open(METRICS_FILE, "w", encoding="utf-8") as f:
+            json.dump(snap, f, ensure_ascii=False, indent=2)
+        if METRICS_PROM_FILE:
+            prom = Path(METRICS_PROM_FILE)
+            tmp  = prom.with_suffix(prom.suffix + ".tmp")
+            tmp.write_text(self.to_prometheus(snap), encoding="utf-8")
+            os.replace(tmp, prom)   # écriture atomique : le collecteur ne lit jamais un fichier partiel
+        return snap
+
+
+class _Span:
+    __slots__ = ("metrics", "name", "t0")
+
+    def __init__(self, metrics: Metrics, name: str):
+        self.metrics, self.name = metrics, name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.record_span(self.name, time.perf_counter() - self.t0)
+        return False
+
+
+METRICS = Metrics()
+
+
 # ============================================================================
 # 7. CLIENT HTTP AVEC RETRY EXPONENTIEL
 # ============================================================================
 
+# Paramètres exclus de la clé de cache (secrets)
+_CACHE_EXCLUDED_PARAMS = {"appid"}
+# Attente maximale acceptée sur un 429 ; au-delà (quota épuisé), échec → simulation
+RETRY_AFTER_MAX_S      = float(os.getenv("PECHEUR_RETRY_AFTER_MAX_S", "60"))
+
+
+def _retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Interprète un en-tête Retry-After (secondes ou date HTTP)."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
 async def fetch_with_retry(
     session: aiohttp.ClientSession,
     url: str,
     params: Optional[dict] = None,
     retries: int = 3,
-    delay: float = 2.0
+    delay: float = 2.0,
+    cache_source: Optional[str] = None,
+    limiter: Optional["TokenBucket"] = None,
+    json_body: Optional[dict] = None,
+    shared_credentials: bool = True
 ) -> Optional[dict]:
-    """Effectue une requête GET avec retry et backoff exponentiel."""
+    """
+    Effectue une requête GET (POST JSON si json_body est fourni) avec retry
+    et backoff exponentiel. Une erreur 4xx autre que 429 est propre à la
+    requête (chat bloqué, paramètre invalide) : pas de nouvelle tentative.
+    cache_source : si fourni (clé de CACHE_TTL_S), la réponse JSON est servie
+    depuis / stockée dans le cache disque pour le pas de temps courant.
+    limiter : token bucket de l'amont ; chaque tentative consomme un jeton et
+    un HTTP 429 suspend le bucket (Retry-After si présent). Un Retry-After
+    supérieur à RETRY_AFTER_MAX_S compte comme un échec immédiat (None).
+    Chaque tentative alimente METRICS (latence, statut, retries) sous le nom
+    de l'amont : nom du bucket, sinon source de cache, sinon hôte.
+    Le disjoncteur de l'amont (circuit_breaker) est consulté avant chaque
+    tentative : ouvert, l'appel échoue aussitôt (None) sans attente ni retry.
+    Seuls les erreurs réseau, timeouts et 5xx l'alimentent, plus le 401 si
+    shared_credentials (clé OpenWeather, jeton du bot : identifiants communs
+    à tous les appels) — pas pour un webhook Discord, propre au destinataire.
+    """
+    upstream = (limiter.name if limiter is not None else None) or cache_source or (
+        url.split("/")[2] if "://" in url else url
+    )
+    breaker = circuit_breaker(upstream)
+    cache_parts = None
+    if cache_source:
+        cache_parts = {
+            "endpoint": url,
+            "params":   {k: v for k, v in (params or {}).items() if k not in _CACHE_EXCLUDED_PARAMS},
+            "step":     _model_step(cache_source),
+        }
+        cached = RESPONSE_CACHE.get_json(cache_source, cache_parts)
+        if cached is not None:
+            METRICS.count(upstream, "cache_hits")
+            return cached
+
     for attempt in range(1, retries + 1):
+        wait = delay * attempt
+        if not breaker.allow():
+            METRICS.count(upstream, "short_circuits")
+            break
+        if attempt > 1:
+            METRICS.count(upstream, "retries")
+        if limiter is not None:
+            await limiter.acquire()
+        t0 = time.perf_counter()
         try:
-            async with session.get(
-                url, params=params,
+            async with session.request(
+                "GET" if json_body is None else "POST", url, params=params, json=json_body,
                 timeout=aiohttp.ClientTimeout(total=15)
             ) as resp:
                 if resp.status == 200:
-                    return await resp.json()
+                    data = await resp.json()
+                    METRICS.observe_request(upstream, time.perf_counter() - t0, resp.status)
+                    breaker.record_success()
+                    if limiter is not None:
+                        limiter.on_success()
+                    if cache_parts is not None:
+                        RESPONSE_CACHE.put_json(cache_source, cache_parts, data)
+                    return data
+                METRICS.observe_request(upstream, time.perf_counter() - t0, resp.status)
                 logger.warning(f"HTTP {resp.status} sur {url} (tentative {attempt}/{retries})")
+                if resp.status >= 500 or (resp.status == 401 and shared_credentials):
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()  # l'amont répond : erreur propre à la requête
+                if 400 <= resp.status < 500 and resp.status != 429:
+                    break  # 400/403/404 : réessayer ne changerait rien
+                if resp.status == 429:
+                    retry_after = _retry_after_seconds(resp.headers.get("Retry-After"))
+                    if retry_after is not None and retry_after > RETRY_AFTER_MAX_S:
+                        logger.warning(
+                            f"{upstream} : Retry-After {retry_after:.0f}s > {RETRY_AFTER_MAX_S:.0f}s — abandon"
+                        )
+                        break
+                    wait = retry_after or wait
+                    if limiter is not None:
+                        limiter.backoff(wait)
+                        wait = 0.0  # le bucket suspend déjà toutes les requêtes vers cet amont
         except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            METRICS.observe_request(upstream, time.perf_counter() - t0, None)
+            breaker.record_failure()
             logger.error(f"Erreur réseau (tentative {attempt}/{retries}) : {e}")
 
-        if attempt < retries:
-            await asyncio.sleep(delay * attempt)
+        if attempt < retries and wait > 0 and not breaker.is_open:
+            await asyncio.sleep(wait)
 
+    METRICS.count(upstream, "failures")
     return None
 
 
 # ============================================================================
-# 8. SIMULATION MARINE RÉALISTE (fallback)
+# 7b. CONTEXTE I/O PARTAGÉ (pool de threads + connexions keep-alive)
 # ============================================================================
 
-def _simulate_marine_data(lat: float, lon: float) -> dict:
+IO_MAX_WORKERS      = int(os.getenv("PECHEUR_IO_WORKERS", "4"))
+HTTP_LIMIT          = 32     # connexions simultanées, tous hôtes confondus
+HTTP_LIMIT_PER_HOST = 8      # connexions simultanées par hôte (OpenWeather, Telegram…)
+HTTP_KEEPALIVE_S    = 30.0   # durée de vie d'une connexion inactive dans le pool
+
+
+class IOContext:
     """
-    Génère des données marines simulées réalistes pour le Sénégal.
-    Valeurs basées sur les moyennes saisonnières côte sénégalaise.
-    Légère variation pseudo-aléatoire basée sur la position géographique.
+    Ressources I/O partagées par toute une exécution :
+      - un pool de threads borné pour le travail bloquant (Copernicus/xarray) ;
+      - une session aiohttp unique dont le connecteur keep-alive est limité par hôte,
+        partagée par tous les fetchers et notificateurs.
+    S'utilise comme `async with IOContext() as io:` ; io.stats() expose les compteurs.
     """
-    seed = int(abs(lat * 100 + lon * 100)) % 1000
-    rng  = np.random.default_rng(seed)
 
-    return {
-        "source":        "simulation",
-        "sst":           round(float(rng.uniform(22.0, 27.0)), 2),
-        "temp_air":      round(float(rng.uniform(24.0, 30.0)), 2),
-        "wave_height":   round(float(rng.uniform(0.4, 1.8)),   2),
-        "current_speed": round(float(rng.uniform(0.1, 0.5)),   3),
-        "wind_speed":    round(float(rng.uniform(2.0, 8.0)),   2),
-        "timestamp":     datetime.utcnow().isoformat()
-    }
+    def __init__(
+        self,
+        max_workers: int = IO_MAX_WORKERS,
+        limit: int = HTTP_LIMIT,
+        limit_per_host: int = HTTP_LIMIT_PER_HOST,
+        keepalive: float = HTTP_KEEPALIVE_S
+    ):
+        self.max_workers    = max_workers
+        self.limit          = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive      = keepalive
+        self.executor: Optional[ThreadPoolExecutor]    = None
+        self.session:  Optional[aiohttp.ClientSession] = None
+
+        self._lock = threading.Lock()
+        self._http = {"requests": 0, "connections_created": 0,
+                      "connections_reused": 0, "queued": 0}
+        self._pool = {"tasks": 0, "in_flight": 0, "peak_in_flight": 0, "busy_s": 0.0}
+
+    async def __aenter__(self) -> "IOContext":
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="pecheur-io"
+        )
+        trace = aiohttp.TraceConfig()
+        trace.on_request_start.append(self._count("requests"))
+        trace.on_connection_create_end.append(self._count("connections_created"))
+        trace.on_connection_reuseconn.append(self._count("connections_reused"))
+        trace.on_connection_queued_start.append(self._count("queued"))
+
+        connector = aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            keepalive_timeout=self.keepalive,
+            ttl_dns_cache=300,
+        )
+        self.session = aiohttp.ClientSession(connector=connector, trace_configs=[trace])
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        if self.session is not None:
+            await self.session.close()
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+
+    def _count(self, key: str):
+        async def _hook(session, ctx, params):
+            self._http[key] += 1
+        return _hook
+
+    def _timed(self, fn, *args):
+        with self._lock:
+            self._pool["in_flight"] += 1
+            self._pool["peak_in_flight"] = max(self._pool["peak_in_flight"], self._pool["in_flight"])
+        t0 = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self._pool["in_flight"] -= 1
+                self._pool["busy_s"]    += time.perf_counter() - t0
+
+    async def run_blocking(self, fn, *args):
+        """Exécute une fonction bloquante dans le pool partagé sans bloquer l'event loop."""
+        with self._lock:
+            self._pool["tasks"] += 1
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self._timed, fn, *args)
+
+    def stats(self) -> dict:
+        """Statistiques de pooling : réutilisation des connexions et charge du pool de threads."""
+        http   = dict(self._http)
+        opened = http["connections_created"] + http["connections_reused"]
+        http["reuse_ratio"]    = round(http["connections_reused"] / opened, 3) if opened else 0.0
+        http["limit"]          = self.limit
+        http["limit_per_host"] = self.limit_per_host
+        with self._lock:
+            pool = dict(self._pool)
+        pool.pop("in_flight")
+        pool["busy_s"]      = round(pool["busy_s"], 3)
+        pool["max_workers"] = self.max_workers
+        return {"http": http, "executor": pool}
+
+
+# ============================================================================
+# 7c. ORDONNANCEMENT : TOKEN BUCKET PAR AMONT + CONCURRENCE BORNÉE
+# ============================================================================
+
+# (requêtes/s, rafale) par amont — le débit global est borné par le quota, pas par lot
+UPSTREAM_RATES = {
+    "openweather": (float(os.getenv("PECHEUR_OW_RATE", "5")), 10),
+    "telegram":    (1.0, 1),   # 1 message/s par chat
+}
+ZONE_CONCURRENCY = int(os.getenv("PECHEUR_ZONE_CONCURRENCY", "8"))
+
+
+class TokenBucket:
+    """
+    Token bucket asynchrone pour un amont, avec adaptation AIMD :
+    un HTTP 429 suspend le bucket (Retry-After) et divise le débit par deux,
+    chaque succès le réaugmente progressivement jusqu'au débit nominal.
+    """
+
+    def __init__(self, name: str, rate: float, burst: int):
+        self.name      = name
+        self.base_rate = rate
+        self.rate      = rate
+        self.burst     = burst
+        self._tokens   = float(burst)
+        self._last     = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock     = asyncio.Lock()
+        self._counts   = {"requests": 0, "throttled_429": 0, "wait_s": 0.0}
+        self._first: Optional[float] = None
+        self._last_acquire: Optional[float] = None
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._blocked_until:
+                    wait = self._blocked_until - now
+                else:
+                    self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+                    self._last   = now
+                    if self._tokens >= 1.0:
+                        self._tokens -= 1.0
+                        break
+                    wait = (1.0 - self._tokens) / self.rate
+                self._counts["wait_s"] += wait
+                await asyncio.sleep(wait)
+
+            self._counts["requests"] += 1
+            self._first        = self._first if self._first is not None else now
+            self._last_acquire = now
+
+    def backoff(self, seconds: float) -> None:
+        """Suspend l'amont pendant `seconds` et réduit le débit (HTTP 429)."""
+        now = time.monotonic()
+        self._blocked_until = max(self._blocked_until, now + seconds)
+        self._tokens = 0.0
+        self._last   = self._blocked_until
+        self.rate    = max(self.base_rate * 0.1, self.rate * 0.5)
+        self._counts["throttled_429"] += 1
+        logger.warning(f"{self.name} : HTTP 429 — pause {seconds:.1f}s, débit réduit à {self.rate:.2f} req/s")
+
+    def on_success(self) -> None:
+        self.rate = min(self.base_rate, self.rate + self.base_rate * 0.1)
+
+    def stats(self) -> dict:
+        counts = dict(self._counts)
+        span   = (self._last_acquire - self._first) if self._first is not None else 0.0
+        counts["wait_s"]        = round(counts["wait_s"], 3)
+        counts["rate_limit"]    = self.base_rate
+        counts["rate_current"]  = round(self.rate, 3)
+        counts["achieved_rps"]  = round((counts["requests"] - 1) / span, 3) if span > 0 else 0.0
+        return counts
+
+
+class RateLimitedScheduler:
+    """
+    Exécute les zones en flux continu : toutes les tâches sont lancées,
+    un sémaphore borne la concurrence et chaque amont est cadencé par son
+    propre TokenBucket. Pas de frontière de lot — une zone lente n'en
+    bloque aucune autre.
+    """
+
+    def __init__(self, concurrency: int = ZONE_CONCURRENCY, rates: dict = UPSTREAM_RATES):
+        self.concurrency = concurrency
+        self._semaphore  = asyncio.Semaphore(concurrency)
+        self._buckets    = {name: TokenBucket(name, rate, burst) for name, (rate, burst) in rates.items()}
+        self._started    = time.monotonic()
+
+    def bucket(self, upstream: str) -> TokenBucket:
+        return self._buckets[upstream]
+
+    async def run(self, items: list, fn) -> list:
+        """Applique la coroutine fn(*item) à chaque élément ; résultats dans l'ordre d'entrée."""
+        async def _bounded(item):
+            async with self._semaphore:
+                return await fn(*item)
+        return await asyncio.gather(*[_bounded(item) for item in items])
+
+    def stats(self) -> dict:
+        return {
+            "concurrency": self.concurrency,
+            "elapsed_s":   round(time.monotonic() - self._started, 3),
+            "upstreams":   {name: b.stats() for name, b in self._buckets.items()},
+        }
+
+
+# ============================================================================
+# 7d. DISJONCTEUR PAR AMONT (échec rapide vers la simulation en cas de panne)
+# ============================================================================
+
+BREAKER_THRESHOLD  = int(os.getenv("PECHEUR_BREAKER_THRESHOLD", "5"))        # échecs consécutifs avant ouverture
+BREAKER_COOLDOWN_S = float(os.getenv("PECHEUR_BREAKER_COOLDOWN_S", "60"))    # délai avant une requête sonde
+# Seuils propres à un amont : Copernicus ne fait que 2–3 appels par exécution
+BREAKER_THRESHOLDS = {"copernicus": min(2, BREAKER_THRESHOLD)}
+
+
+class CircuitOpenError(RuntimeError):
+    """Appel refusé sans tentative : le disjoncteur de l'amont est ouvert."""
+
+
+class CircuitBreaker:
+    """
+    Disjoncteur partagé par tous les appels vers un amont (thread-safe :
+    OpenWeather dans l'event loop, Copernicus dans le pool de threads).
+      - fermé : les appels passent, les échecs consécutifs sont comptés ;
+      - ouvert : après `threshold` échecs consécutifs, tout appel est refusé
+        immédiatement (les zones restantes passent directement au fallback) ;
+      - semi-ouvert : après `cooldown` secondes, une seule requête sonde passe ;
+        un succès referme le disjoncteur, un échec le rouvre pour un cooldown.
+    """
+
+    def __init__(self, name: str, threshold: int = BREAKER_THRESHOLD, cooldown: float = BREAKER_COOLDOWN_S):
+        self.name      = name
+        self.threshold = max(1, threshold)
+        self.cooldown  = cooldown
+        self.state     = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_at: Optional[float] = None
+        self._lock     = threading.Lock()
+        self._counts   = {"trips": 0, "short_circuits": 0, "probes": 0}
+
+    @property
+    def is_open(self) -> bool:
+        """Vrai tant que le disjoncteur refuse les appels (ouvert, cooldown non écoulé)."""
+        with self._lock:
+            return self.state == "open" and time.monotonic() - self._opened_at < self.cooldown
+
+    def allow(self) -> bool:
+        """Autorise un appel ; en semi-ouvert, une seule sonde à la fois."""
+        with self._lock:
+            now = time.monotonic()
+            if self.state == "closed":
+                return True
+            if self.state == "open" and now - self._opened_at >= self.cooldown:
+                self.state = "half_open"
+                logger.info(f"⚡ Disjoncteur {self.name} : semi-ouvert — requête sonde")
+            # Une sonde abandonnée (annulation) n'immobilise pas le disjoncteur au-delà d'un cooldown
+            if self.state == "half_open" and (self._probe_at is None or now - self._probe_at >= self.cooldown):
+                self._probe_at = now
+                self._counts["probes"] += 1
+                return True
+            self._counts["short_circuits"] += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state != "closed":
+                logger.info(f"⚡ Disjoncteur {self.name} : refermé (amont rétabli)")
+            self.state     = "closed"
+            self._failures = 0
+            self._probe_at = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self.state == "half_open" or (self.state == "closed" and self._failures >= self.threshold):
+                self.state      = "open"
+                self._opened_at = time.monotonic()
+                self._probe_at  = None
+                self._counts["trips"] += 1
+                logger.warning(
+                    f"⚡ Disjoncteur {self.name} : ouvert après {self._failures} échecs consécutifs — "
+                    f"fallback direct pendant {self.cooldown:.0f}s"
+                )
+
+    def call(self, fn, *args):
+        """Appel bloquant protégé : CircuitOpenError si ouvert, échec/succès enregistrés."""
+        if not self.allow():
+            METRICS.count(self.name, "short_circuits")
+            raise CircuitOpenError(f"disjoncteur {self.name} ouvert")
+        try:
+            result = fn(*args)
+        except Exception:
+            self.record_failure()
+            raise
+        self.record_success()
+        return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"state": self.state, "consecutive_failures": self._failures,
+                    "threshold": self.threshold, "cooldown_s": self.cooldown, **self._counts}
+
+
+# Registre global : l'état survit d'un cycle à l'autre en mode démon
+BREAKERS: dict[str, CircuitBreaker] = {}
+_BREAKERS_LOCK = threading.Lock()
+
+
+def circuit_breaker(name: str) -> CircuitBreaker:
+    """Disjoncteur de l'amont `name` (créé au premier usage)."""
+    with _BREAKERS_LOCK:
+        if name not in BREAKERS:
+            BREAKERS[name] = CircuitBreaker(name, BREAKER_THRESHOLDS.get(name, BREAKER_THRESHOLD))
+        return BREAKERS[name]
+
+
+def breaker_stats() -> dict:
+    """État et compteurs de chaque disjoncteur, pour les logs et METRICS."""
+    with _BREAKERS_LOCK:
+        return {name: b.stats() for name, b in sorted(BREAKERS.items())}
+
+
+# ============================================================================
+# 8. SIMULATION MARINE RÉALISTE (fallback, charge synthétique)
+# ============================================================================
+
+SIM_SEED       = int(os.getenv("PECHEUR_SIM_SEED", "2024"))
+SIM_FEATURES   = 48        # composantes de Fourier aléatoires par champ
+SIM_LENGTH_DEG = 0.6       # portée de corrélation spatiale (~65 km)
+# Portée de corrélation temporelle par champ (heures)
+SIM_TIME_H     = {"wind": 9.0, "swell": 30.0, "sst": 120.0, "air": 12.0, "current": 36.0, "pop": 18.0}
+
+
+class SyntheticOcean:
+    """
+    Simulateur déterministe de N points × T pas de temps en une opération
+    tableau : chaque champ est un bruit gaussien corrélé en espace et en temps,
+    construit par composantes de Fourier aléatoires (cos(k·x + ω·t + φ)),
+    superposé aux cycles physiques (brise de mer diurne, gradient d'upwelling
+    nord→sud de la SST, houle liée au vent par Bretschneider).
+
+    Même graine → mêmes valeurs ; deux sites voisins sont corrélés sans être
+    identiques, deux sites éloignés sont indépendants.
+    """
+
+    def __init__(self, seed: int = SIM_SEED, features: int = SIM_FEATURES):
+        rng = np.random.default_rng(seed)
+        self.features = features
+        self._k   = {}
+        self._w   = {}
+        self._phi = {}
+        for name, tau in SIM_TIME_H.items():
+            self._k[name]   = rng.normal(0.0, 1.0 / SIM_LENGTH_DEG, size=(2, features))
+            self._w[name]   = rng.normal(0.0, 1.0 / tau, size=features)
+            self._phi[name] = rng.uniform(0.0, 2 * np.pi, size=features)
+
+    def noise(self, name: str, lats, lons, t_hours) -> np.ndarray:
+        """
+        Bruit N × T de variance unitaire, corrélé en espace (°) et en temps (h).
+        cos(a + b) = cos a·cos b − sin a·sin b : deux produits matriciels
+        (N × K)·(K × T) au lieu d'un tenseur N × T × K.
+        """
+        xy    = np.stack([np.asarray(lats, dtype=float), np.asarray(lons, dtype=float)], axis=1)
+        t     = np.asarray(t_hours, dtype=float)
+        space = xy @ self._k[name] + self._phi[name]                       # (N, K)
+        time_ = t[:, None] * self._w[name]                                 # (T, K)
+        out   = np.cos(space) @ np.cos(time_).T - np.sin(space) @ np.sin(time_).T
+        return out * np.sqrt(2.0 / self.features)
+
+    def sample(self, lats, lons, times) -> dict[str, np.ndarray]:
+        """
+        Champs N × T aux instants `times` (epoch s, UTC) :
+        wind, wave, sst, temp_air, current_speed, pop (0–1), humidity, uvi.
+        """
+        lats, lons = np.asarray(lats, dtype=float), np.asarray(lons, dtype=float)
+        t_h   = np.asarray(times, dtype=np.int64) / 3600.0
+        hour  = t_h % 24                                                   # UTC = heure locale
+        day   = np.sin((hour - 9) / 24 * 2 * np.pi)[None, :]               # max vers 15 h
+        sun   = np.clip(np.sin((hour - 6) / 12 * np.pi), 0, None)[None, :]
+
+        wind    = np.clip(4.5 + 3.0 * np.clip(day, 0, None) + 1.8 * self.noise("wind", lats, lons, t_h), 0.3, 20.0)
+        swell   = np.clip(0.55 + 0.25 * self.noise("swell", lats, lons, t_h), 0.1, None)
+        wave    = np.minimum(6.0, swell + 0.0248 * wind ** 2 * 0.6)
+        sst     = 24.5 - 1.2 * (lats[:, None] - 14.5) + 0.6 * self.noise("sst", lats, lons, t_h)
+        air     = sst + 1.5 + 2.5 * day + 0.8 * self.noise("air", lats, lons, t_h)
+        current = np.clip(0.28 + 0.1 * self.noise("current", lats, lons, t_h), 0.03, 1.2)
+        pop     = np.clip(0.12 + 0.15 * self.noise("pop", lats, lons, t_h), 0.0, 1.0)
+        return {
+            "wind":          wind,
+            "wave":          wave,
+            "sst":           sst,
+            "temp_air":      air,
+            "current_speed": current,
+            "pop":           pop,
+            "humidity":      np.clip(72 - 8 * day + 30 * pop, 40, 100),
+            "uvi":           np.round(9.5 * sun * (1 - 0.5 * pop), 1),
+        }
+
+
+@functools.lru_cache(maxsize=None)
+def synthetic_ocean(seed: int = SIM_SEED) -> SyntheticOcean:
+    """Simulateur partagé (construit au premier besoin, pas à l'import)."""
+    return SyntheticOcean(seed)
+
+
+def _sim_now() -> int:
+    """Pas de simulation courant : l'heure entière (valeurs stables pendant une heure)."""
+    return int(time.time()) // 3600 * 3600
+
+
+def simulate_marine_batch(coords: list[tuple[float, float]], when: Optional[int] = None) -> list[dict]:
+    """Conditions marines simulées pour N points à l'instant `when` (epoch s)."""
+    if not coords:
+        return []
+    lats, lons = zip(*coords)
+    f   = synthetic_ocean().sample(lats, lons, [when if when is not None else _sim_now()])
+    now = datetime.utcnow().isoformat()
+    return [
+        {
+            "source":        "simulation",
+            "sst":           round(float(f["sst"][i, 0]), 2),
+            "temp_air":      round(float(f["temp_air"][i, 0]), 2),
+            "wave_height":   round(float(f["wave"][i, 0]), 2),
+            "current_speed": round(float(f["current_speed"][i, 0]), 3),
+            "wind_speed":    round(float(f["wind"][i, 0]), 2),
+            "timestamp":     now,
+        }
+        for i in range(len(coords))
+    ]
+
+
+def simulate_history(
+    zones: dict[str, dict],
+    start: datetime,
+    end: datetime,
+    step_h: int = 1,
+    store: Optional["HistoryStore"] = None
+) -> int:
+    """
+    Remplit le magasin d'historique avec des séries simulées cohérentes
+    (tests de charge : milliers de zones × semaines d'historique).
+    Retourne le nombre de lignes écrites.
+    """
+    store  = store or HistoryStore()
+    names  = list(zones)
+    t0     = int(start.replace(tzinfo=timezone.utc).timestamp())
+    t1     = int(end.replace(tzinfo=timezone.utc).timestamp())
+    times  = np.arange(t0, t1, step_h * 3600, dtype=np.int64)
+    lats   = [zones[n]["lat"] for n in names]
+    lons   = [zones[n]["lon"] for n in names]
+    chunk  = max(1, 168 // step_h)   # une semaine par tranche : mémoire bornée
+    rows   = 0
+    for lo in range(0, times.size, chunk):
+        t = times[lo:lo + chunk]
+        f = synthetic_ocean().sample(lats, lons, t)
+        wave    = _round_half(f["wave"], 2)
+        temp    = _round_half(f["sst"], 2)
+        current = _round_half(f["current_speed"], 3)
+        rows += store.append_series(
+            names, t, wave=wave, temp=temp, current=current,
+            score=_round_half(fishing_score_batch(wave, temp, current), 1),
+            safety=safety_level_batch(wave), wind=_round_half(f["wind"], 2),
+        )
+    return rows
 
 
 # ============================================================================
 # 9. FETCHER OPENWEATHER
 # ============================================================================
 
-async def fetch_openweather(
+OPENWEATHER_ONECALL_URL = "https://api.openweathermap.org/data/3.0/onecall"
+
+
+@METRICS.timed()
+async def fetch_onecall(
     session: aiohttp.ClientSession,
     lat: float,
-    lon: float
-) -> dict:
+    lon: float,
+    limiter: Optional[TokenBucket] = None
+) -> Optional[dict]:
     """
-    Récupère les conditions météo-marines via OpenWeather One Call API 3.0.
-    Retourne un dict normalisé ou des valeurs de simulation si échec.
+    Unique appel OpenWeather One Call API 3.0 par coordonnée.
+    La réponse (current + hourly + daily) alimente à la fois les conditions
+    actuelles et les prévisions 7 jours — un seul appel décompté du quota.
+    Retourne None si clé absente ou échec réseau.
     """
     api_key = SECRETS.get("OPENWEATHER_KEY")
-
     if not api_key:
-        logger.warning("OpenWeather : clé absente — simulation activée.")
-        return _simulate_marine_data(lat, lon)
+        return None
 
-    url = "https://api.openweathermap.org/data/3.0/onecall"
     params = {
-        "lat":     lat,
-        "lon":     lon,
-        "exclude": "minutely,hourly,daily,alerts",
+        "lat":     round(lat, 4),
+        "lon":     round(lon, 4),
+        "exclude": "minutely,alerts",
         "appid":   api_key,
         "units":   "metric"
     }
+    return await fetch_with_retry(
+        session, OPENWEATHER_ONECALL_URL, params=params,
+        cache_source="openweather", limiter=limiter
+    )
 
-    data = await fetch_with_retry(session, url, params=params)
 
+def _parse_openweather_current(data: Optional[dict]) -> Optional[dict]:
+    """Conditions actuelles d'une réponse One Call, ou None si absente / illisible."""
     if not data:
-        logger.warning(f"OpenWeather échec ({lat},{lon}) — simulation activée.")
-        return _simulate_marine_data(lat, lon)
-
+        return None
     try:
         current    = data["current"]
         wind_ms    = current.get("wind_speed", 3.0)
@@ -336,220 +1363,998 @@ async def fetch_openweather(
         }
     except (KeyError, TypeError) as e:
         logger.error(f"OpenWeather parsing error : {e}")
-        return _simulate_marine_data(lat, lon)
-
+        return None
 
-# ============================================================================
-# 10. FETCHER COPERNICUS (SST + COURANTS)
-# ============================================================================
 
-async def fetch_copernicus(lat: float, lon: float) -> dict:
+def openweather_current_batch(onecalls: list[Optional[dict]], coords: list[tuple[float, float]]) -> list[dict]:
     """
-    Récupère SST et courants via copernicusmarine.
-    Exécuté dans un ThreadPoolExecutor pour ne pas bloquer l'event loop.
-    Retourne simulation si bibliothèque absente ou credentials manquants.
+    Conditions météo-marines actuelles pour N points (réponses One Call).
+    Les points sans réponse exploitable sont simulés ensemble, en un seul
+    appel à simulate_marine_batch.
     """
-    if not COPERNICUS_AVAILABLE:
-        return _simulate_marine_data(lat, lon)
-
-    user = SECRETS.get("COPERNICUS_USER")
-    pwd  = SECRETS.get("COPERNICUS_PASS")
-
-    if not user or not pwd:
-        logger.warning("Copernicus : credentials absents — simulation activée.")
-        return _simulate_marine_data(lat, lon)
-
-    def _open_cm_dataset(dataset_id: str, variables: list, bbox: dict, dt: str) -> object:
-        """
-        Ouvre un dataset Copernicus avec gestion automatique du conflit zarr v3.
-        Applique un monkey-patch si zarr_format est refusé, puis restaure.
-        """
-        kwargs = dict(
-            dataset_id        = dataset_id,
-            variables         = variables,
-            minimum_latitude  = bbox["lat_min"],
-            maximum_latitude  = bbox["lat_max"],
-            minimum_longitude = bbox["lon_min"],
-            maximum_longitude = bbox["lon_max"],
-            start_datetime    = dt,
-            end_datetime      = dt,
-        )
-        try:
-            return cm.open_dataset(**kwargs)
-        except TypeError as te:
-            if "zarr_format" not in str(te):
-                raise
-            logger.warning(f"zarr v3 patch appliqué pour {dataset_id}")
-            import zarr as _zarr
-            _orig = _zarr.open
-            _zarr.open = lambda *a, **kw: _orig(*a, **{k: v for k, v in kw.items() if k != "zarr_format"})
-            try:
-                return cm.open_dataset(**kwargs)
-            finally:
-                _zarr.open = _orig  # Toujours restaurer
-
-    def _blocking_fetch():
-        try:
-            now = datetime.utcnow()
-            dt  = now.strftime("%Y-%m-%dT%H:%M:%S")
-            bbox = {
-                "lat_min": lat - 0.1, "lat_max": lat + 0.1,
-                "lon_min": lon - 0.1, "lon_max": lon + 0.1,
-            }
+    results = [_parse_openweather_current(data) for data in onecalls]
+    missing = [i for i, r in enumerate(results) if r is None]
+    if missing:
+        METRICS.count("openweather", "fallbacks", len(missing))
+        if SECRETS.get("OPENWEATHER_KEY"):
+            logger.warning(f"OpenWeather échec pour {len(missing)}/{len(results)} points — simulation activée.")
+        else:
+            logger.warning("OpenWeather : clé absente — simulation activée.")
+        for i, sim in zip(missing, simulate_marine_batch([coords[i] for i in missing])):
+            results[i] = sim
+    return results
 
-            # ── Dataset 1 : Courants de surface (uo, vo) ──
-            # cmems_mod_glo_phy-cur : uniquement uo/vo, PAS de thetao
-            ds_cur = _open_cm_dataset(
-                "cmems_mod_glo_phy-cur_anfc_0.083deg_PT6H-i",
-                ["uo", "vo"],
-                bbox, dt
-            )
-            sel_cur = ds_cur.isel(time=0) if "time" in ds_cur.dims else ds_cur
-            uo = float(sel_cur["uo"].mean().values)
-            vo = float(sel_cur["vo"].mean().values)
-            current_speed = round(float(np.sqrt(uo**2 + vo**2)), 3)
-            logger.info(f"Copernicus courants OK ({lat},{lon}) — {current_speed} m/s")
-
-            # ── Dataset 2 : SST (thetao) ──
-            # cmems_mod_glo_phy-thetao : dataset dédié à la température
-            sst = None
-            try:
-                ds_sst = _open_cm_dataset(
-                    "cmems_mod_glo_phy_anfc_0.083deg_P1D-m",
-                    ["thetao"],
-                    bbox, dt
-                )
-                sel_sst = ds_sst.isel(time=0) if "time" in ds_sst.dims else ds_sst
-                # Prendre la couche de surface (depth index 0)
-                if "depth" in sel_sst.dims:
-                    sel_sst = sel_sst.isel(depth=0)
-                sst = round(float(sel_sst["thetao"].mean().values), 2)
-                logger.info(f"Copernicus SST OK ({lat},{lon}) — {sst}°C")
-            except Exception as e_sst:
-                logger.warning(f"Copernicus SST ignorée ({lat},{lon}) : {e_sst}")
-                sst = None  # OpenWeather prendra le relais
-
-            return {
-                "source":        "copernicus",
-                "sst":           sst,
-                "current_speed": current_speed,
-                "current_u":     round(uo, 3),
-                "current_v":     round(vo, 3),
-                "timestamp":     now.isoformat()
-            }
-        except Exception as e:
-            logger.error(f"Copernicus fetch error : {e}")
-            return None
 
-    loop = asyncio.get_event_loop()
-    with ThreadPoolExecutor(max_workers=1) as executor:
-        result = await loop.run_in_executor(executor, _blocking_fetch)
+def parse_openweather_current(data: Optional[dict], lat: float, lon: float) -> dict:
+    """
+    Extrait les conditions météo-marines actuelles d'une réponse One Call.
+    Retourne un dict normalisé ou des valeurs de simulation si échec.
+    """
+    return openweather_current_batch([data], [(lat, lon)])[0]
 
-    return result if result else _simulate_marine_data(lat, lon)
 
+@METRICS.timed()
+async def fetch_openweather(
+    session: aiohttp.ClientSession,
+    lat: float,
+    lon: float
+) -> dict:
+    """
+    Récupère les conditions météo-marines via OpenWeather One Call API 3.0.
+    Retourne un dict normalisé ou des valeurs de simulation si échec.
+    """
+    return parse_openweather_current(await fetch_onecall(session, lat, lon), lat, lon)
 
 
 # ============================================================================
-# 10b. PRÉVISIONS 7 JOURS OPENWEATHER
+# 10. FETCHER COPERNICUS (SST + COURANTS) — sous-ensemble côtier unique
 # ============================================================================
 
-async def fetch_forecast_7days(lat: float, lon: float) -> list:
+# Emprise couvrant toute la côte sénégalaise (12°–16.5°N) : une seule requête
+# par dataset, quel que soit le nombre de zones.
+COPERNICUS_COAST_BBOX = {
+    "lat_min": 12.0,  "lat_max": 16.5,
+    "lon_min": -18.0, "lon_max": -16.0,
+}
+# Demi-largeur de la fenêtre moyennée autour de chaque zone (ancienne bbox ±0.1°)
+COPERNICUS_ZONE_HALF_WINDOW = 0.1
+
+# step_s : pas de temps modèle du dataset (clé du miroir local, section 10b)
+COPERNICUS_DATASETS = {
+    # cmems_mod_glo_phy-cur : uniquement uo/vo, PAS de thetao
+    "cur": {"id": "cmems_mod_glo_phy-cur_anfc_0.083deg_PT6H-i", "variables": ["uo", "vo"],
+            "step_s": 6 * 3600},
+    # cmems_mod_glo_phy : dataset dédié à la température
+    "sst": {"id": "cmems_mod_glo_phy_anfc_0.083deg_P1D-m",      "variables": ["thetao"],
+            "step_s": 24 * 3600},
+}
+
+
+@dataclass
+class CoastalGrid:
+    """Grille de surface Copernicus chargée en mémoire (latitude × longitude)."""
+    dataset_id: str
+    lat:        np.ndarray    # (Y,) croissant
+    lon:        np.ndarray    # (X,) croissant
+    fields:     dict          # variable → np.ndarray (Y, X), NaN sur terre
+    time:       Optional[int] = None   # instant modèle du plan (epoch s), clé du miroir
+
+
+# État partagé du patch zarr_format : appliqué une fois pour tous les threads du pool
+_ZARR_PATCH      = {"needed": False, "depth": 0, "orig": None}
+_ZARR_PATCH_LOCK = threading.Lock()
+
+
+@contextmanager
+def _zarr_format_patch():
+    """zarr.open sans l'argument zarr_format, le temps des ouvertures en cours."""
+    import zarr as _zarr
+    with _ZARR_PATCH_LOCK:
+        if _ZARR_PATCH["depth"] == 0:
+            _orig = _ZARR_PATCH["orig"] = _zarr.open
+            _zarr.open = lambda *a, **kw: _orig(*a, **{k: v for k, v in kw.items() if k != "zarr_format"})
+        _ZARR_PATCH["depth"] += 1
+    try:
+        yield
+    finally:
+        with _ZARR_PATCH_LOCK:
+            _ZARR_PATCH["depth"] -= 1
+            if _ZARR_PATCH["depth"] == 0:
+                _zarr.open = _ZARR_PATCH["orig"]  # Toujours restaurer
+
+
+def _open_cm_dataset(
+    dataset_id: str,
+    variables: list,
+    bbox: dict,
+    dt: str,
+    dt_end: Optional[str] = None
+) -> object:
     """
-    Récupère les prévisions météo-marines sur 7 jours via OpenWeather One Call API.
-    Retourne une liste de 7 dict avec score, houle estimée, vent, température.
+    Ouvre un dataset Copernicus avec gestion automatique du conflit zarr v3.
+    Si zarr_format est refusé, le monkey-patch est appliqué (puis restauré)
+    et mémorisé : les ouvertures suivantes ne refont pas la tentative distante
+    vouée à l'échec.
+    dt_end : fin de l'intervalle demandé (un seul pas de temps par défaut).
     """
-    api_key = SECRETS.get("OPENWEATHER_KEY")
-    if not api_key:
-        return _simulate_forecast(lat, lon)
-
-    url = (
-        f"https://api.openweathermap.org/data/3.0/onecall"
-        f"?lat={lat}&lon={lon}&exclude=minutely,alerts"
-        f"&appid={api_key}&units=metric"
+    kwargs = dict(
+        dataset_id        = dataset_id,
+        variables         = variables,
+        minimum_latitude  = bbox["lat_min"],
+        maximum_latitude  = bbox["lat_max"],
+        minimum_longitude = bbox["lon_min"],
+        maximum_longitude = bbox["lon_max"],
+        start_datetime    = dt,
+        end_datetime      = dt_end or dt,
     )
+    cm = load_copernicusmarine()
+    if not _ZARR_PATCH["needed"]:
+        try:
+            return cm.open_dataset(**kwargs)
+        except TypeError as te:
+            if "zarr_format" not in str(te):
+                raise
+            _ZARR_PATCH["needed"] = True
+            logger.warning(f"zarr v3 patch appliqué pour {dataset_id} (et les ouvertures suivantes)")
+    with _zarr_format_patch():
+        return cm.open_dataset(**kwargs)
+
+
+@METRICS.timed()
+def _load_coastal_grid(
+    dataset_id: str,
+    variables: list,
+    dt: str,
+    step_s: Optional[int] = None
+) -> CoastalGrid:
+    """
+    Couche de surface de toute la côte pour un pas de temps.
+    step_s : pas de temps modèle du dataset ; si fourni, la grille est lue
+    dans le miroir Zarr local (COPERNICUS_MIRROR) pour le pas le plus proche
+    de dt — celui que renvoie open_dataset(start=end=dt) — et n'est téléchargée
+    qu'au premier passage. Elle est mise en miroir sous son propre instant
+    (coordonnée time du dataset) ; si celui-ci diffère du pas demandé, un
+    alias pas demandé → instant du plan est enregistré pour que le get
+    suivant le retrouve.
+    La sélection temps/profondeur est faite avant .load() : seul le plan
+    de surface transite sur le réseau.
+    """
+    slot = None
+    if step_s:
+        slot = int(datetime.fromisoformat(dt).replace(tzinfo=timezone.utc).timestamp())
+        slot = (slot + step_s // 2) // step_s * step_s
+        grid = COPERNICUS_MIRROR.get(dataset_id, slot, variables)
+        if grid is not None:
+            logger.info(f"Copernicus {dataset_id} : grille servie depuis le miroir local.")
+            return grid
+
+    grid = _download_coastal_grid(dataset_id, variables, dt)
+    if step_s:
+        COPERNICUS_MIRROR.put(grid, slot)
+    return grid
+
+
+def _download_coastal_grid(dataset_id: str, variables: list, dt: str) -> CoastalGrid:
+    """
+    Ouvre le sous-ensemble côtier distant et charge le plan de surface.
+    Protégé par le disjoncteur "copernicus" : ouvert, CircuitOpenError
+    est levée sans aucun appel distant.
+    """
+    def _fetch():
+        ds = _open_cm_dataset(dataset_id, variables, COPERNICUS_COAST_BBOX, dt)
+        return _surface_grid(dataset_id, variables, ds.isel(time=0) if "time" in ds.dims else ds)
+    return circuit_breaker("copernicus").call(_fetch)
+
+
+def _surface_grid(dataset_id: str, variables: list, sel) -> CoastalGrid:
+    """Plan de surface d'un pas de temps xarray → CoastalGrid (axes croissants)."""
+    if "depth" in sel.dims:
+        sel = sel.isel(depth=0)  # couche de surface
+    sel = sel.load()
+
+    lat = np.asarray(sel["latitude"].values, dtype=float)
+    lon = np.asarray(sel["longitude"].values, dtype=float)
+    fields = {
+        v: np.asarray(sel[v].transpose("latitude", "longitude").values, dtype=float)
+        for v in variables
+    }
+    # Normalisation : axes croissants pour l'indexation vectorisée
+    if lat.size > 1 and lat[0] > lat[-1]:
+        lat    = lat[::-1]
+        fields = {v: a[::-1, :] for v, a in fields.items()}
+    if lon.size > 1 and lon[0] > lon[-1]:
+        lon    = lon[::-1]
+        fields = {v: a[:, ::-1] for v, a in fields.items()}
+
+    t = None
+    if "time" in sel.coords and sel["time"].size == 1:
+        t = int(np.asarray(sel["time"].values).astype("datetime64[s]").astype(np.int64))
+    return CoastalGrid(dataset_id=dataset_id, lat=lat, lon=lon, fields=fields, time=t)
+
+
+def extract_zone_means(
+    grid: CoastalGrid,
+    lats: np.ndarray,
+    lons: np.ndarray,
+    half_window: float = COPERNICUS_ZONE_HALF_WINDOW
+) -> dict:
+    """
+    Moyenne de chaque variable dans la fenêtre ±half_window autour de chaque zone.
+    Calcul vectorisé pour toutes les zones : les masques lat (Z, Y) et lon (Z, X)
+    sont contractés avec la grille (Y, X) — NaN (terre) exclus de la moyenne.
+    Retourne variable → np.ndarray (Z,), NaN si aucune cellule océan.
+    """
+    lats = np.asarray(lats, dtype=float)
+    lons = np.asarray(lons, dtype=float)
+    eps  = 1e-9
+    in_lat = (np.abs(grid.lat[None, :] - lats[:, None]) <= half_window + eps).astype(float)
+    in_lon = (np.abs(grid.lon[None, :] - lons[:, None]) <= half_window + eps).astype(float)
+
+    means = {}
+    for var, field in grid.fields.items():
+        valid  = ~np.isnan(field)
+        sums   = np.einsum("zy,yx,zx->z", in_lat, np.where(valid, field, 0.0), in_lon)
+        counts = np.einsum("zy,yx,zx->z", in_lat, valid.astype(float), in_lon)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means[var] = np.where(counts > 0, sums / counts, np.nan)
+    return means
+
+
+def copernicus_zone_values(
+    zones: dict[str, dict],
+    grids: dict,
+    now: Optional[datetime] = None
+) -> dict[str, dict]:
+    """
+    Valeurs Copernicus par zone à partir des grilles chargées ("cur" requise,
+    "sst" optionnelle). Les moyennes sont extraites une fois par cellule de
+    grille (build_cell_index) puis distribuées à tous les sites de la cellule.
+    Les zones sans cellule océan sont absentes du résultat (simulation), de même
+    que les zones hors de COPERNICUS_COAST_BBOX, signalées comme telles.
+    """
+    now = now or datetime.utcnow()
+    if grids.get("cur") is None:
+        return {}
+    names = list(zones)
+    cells = list(build_cell_index(zones).values())
+    lats  = np.array([c["lat"] for c in cells], dtype=float)
+    lons  = np.array([c["lon"] for c in cells], dtype=float)
+
+    bbox    = COPERNICUS_COAST_BBOX
+    outside = ~((lats >= bbox["lat_min"]) & (lats <= bbox["lat_max"])
+                & (lons >= bbox["lon_min"]) & (lons <= bbox["lon_max"]))
+    if outside.any():
+        out_names = [n for i in np.flatnonzero(outside) for n in cells[i]["zones"]]
+        logger.warning(
+            f"Copernicus : {len(out_names)} zone(s) hors de l'emprise côtière "
+            f"{bbox['lat_min']}–{bbox['lat_max']}°N / {bbox['lon_min']}–{bbox['lon_max']}°E "
+            f"(COPERNICUS_COAST_BBOX) — simulation : {', '.join(out_names)}"
+        )
+
+    grid   = grids["cur"]
+    means  = extract_zone_means(grid, lats, lons)
+    uo, vo = means["uo"], means["vo"]
+    speed  = np.sqrt(uo ** 2 + vo ** 2)
+    logger.info(
+        f"Copernicus courants OK — {int(np.count_nonzero(~np.isnan(speed)))}/{len(cells)} cellules "
+        f"pour {len(names)} zones (grille {grid.lat.size}×{grid.lon.size})"
+    )
+
+    sst = np.full(len(cells), np.nan)
+    if grids.get("sst") is not None:
+        sst = extract_zone_means(grids["sst"], lats, lons)["thetao"]
+        logger.info(f"Copernicus SST OK — {int(np.count_nonzero(~np.isnan(sst)))}/{len(cells)} cellules")
+
+    results = {}
+    for i, cell in enumerate(cells):
+        if outside[i]:
+            continue
+        if np.isnan(speed[i]):
+            logger.warning(f"Copernicus : aucune cellule océan pour {', '.join(cell['zones'])} — simulation.")
+            continue
+        values = {
+            "source":        "copernicus",
+            "sst":           None if np.isnan(sst[i]) else round(float(sst[i]), 2),
+            "current_speed": round(float(speed[i]), 3),
+            "current_u":     round(float(uo[i]), 3),
+            "current_v":     round(float(vo[i]), 3),
+            "timestamp":     now.isoformat()
+        }
+        for name in cell["zones"]:
+            results[name] = dict(values)
+    return results
+
+
+@METRICS.timed()
+async def fetch_copernicus_batch(
+    zones: dict[str, dict],
+    io: Optional[IOContext] = None,
+    grids: Optional[dict] = None
+) -> dict[str, dict]:
+    """
+    Récupère SST et courants pour toutes les zones en un seul sous-ensemble côtier
+    par dataset (2 appels distants au total au lieu de 2 par zone), puis
+    extrait les valeurs par zone (copernicus_zone_values).
+    Exécuté dans le pool de threads partagé (io) pour ne pas bloquer l'event loop.
+    Les zones sans donnée exploitable retombent sur la simulation.
+    grids : si fourni, reçoit les CoastalGrid chargées ("cur", "sst") pour les
+    produits maillés (raster de score).
+    """
+    def _with_fallback(fetched: dict) -> dict[str, dict]:
+        # Zones sans donnée : un seul lot de simulation pour toutes
+        missing = [name for name in zones if not fetched.get(name)]
+        if missing:
+            METRICS.count("copernicus", "fallbacks", len(missing))
+            sims = simulate_marine_batch([(zones[n]["lat"], zones[n]["lon"]) for n in missing])
+            fetched = {**fetched, **dict(zip(missing, sims))}
+        return {name: fetched[name] for name in zones}
+
+    user = SECRETS.get("COPERNICUS_USER")
+    pwd  = SECRETS.get("COPERNICUS_PASS")
+
+    if not user or not pwd:
+        logger.warning("Copernicus : credentials absents — simulation activée.")
+        return _with_fallback({})
+
+    def _blocking_fetch():
+        # Import lourd fait ici, dans le pool de threads : l'event loop n'est pas bloquée
+        if load_copernicusmarine() is None:
+            return None
+        loaded = {}
+        try:
+            now = datetime.utcnow()
+            dt  = now.strftime("%Y-%m-%dT%H:%M:%S")
+
+            # ── Dataset 1 : Courants de surface (uo, vo) — toute la côte ──
+            cur = COPERNICUS_DATASETS["cur"]
+            loaded["cur"] = _load_coastal_grid(cur["id"], cur["variables"], dt, cur["step_s"])
+
+            # ── Dataset 2 : SST (thetao) — toute la côte ──
+            try:
+                sst = COPERNICUS_DATASETS["sst"]
+                loaded["sst"] = _load_coastal_grid(sst["id"], sst["variables"], dt, sst["step_s"])
+            except Exception as e_sst:
+                logger.warning(f"Copernicus SST ignorée : {e_sst}")  # OpenWeather prendra le relais
+
+            if grids is not None:
+                grids.update(loaded)
+            return copernicus_zone_values(zones, loaded, now)
+        except Exception as e:
+            logger.error(f"Copernicus fetch error : {e}")
+            return None
+
+    if io is not None:
+        fetched = await io.run_blocking(_blocking_fetch)
+    else:
+        fetched = await asyncio.get_running_loop().run_in_executor(None, _blocking_fetch)
+
+    return _with_fallback(fetched or {})
+
+
+@METRICS.timed()
+async def fetch_copernicus(lat: float, lon: float, io: Optional[IOContext] = None) -> dict:
+    """
+    Récupère SST et courants pour un point isolé.
+    Pour plusieurs zones, préférer fetch_copernicus_batch (un seul sous-ensemble côtier).
+    """
+    results = await fetch_copernicus_batch({"point": {"lat": lat, "lon": lon}}, io)
+    return results["point"]
+
+
+
+# ============================================================================
+# 10b. MIROIR ZARR LOCAL DES SOUS-ENSEMBLES COPERNICUS (lecture par mmap)
+# ============================================================================
+
+MIRROR_DIR     = Path(os.getenv("PECHEUR_MIRROR_DIR", "logs/mirror"))
+MIRROR_ENABLED = os.getenv("PECHEUR_MIRROR", "1") != "0"
+MIRROR_CHUNK   = (128, 128)   # tuiles latitude × longitude (la côte entière tient en une)
+
+
+@functools.lru_cache(maxsize=None)
+def _mmap_store_class() -> type:
+    """
+    DirectoryStore zarr dont les chunks sont lus par mmap : sans compression,
+    un plan est servi par le cache de pages du système, sans read() ni décodage.
+    Import paresseux, comme xarray/zarr via load_copernicusmarine.
+    """
+    import zarr
+
+    class MemoryMappedStore(zarr.storage.DirectoryStore):
+        def _fromfile(self, fn):
+            with open(fn, "rb") as fh:
+                if os.fstat(fh.fileno()).st_size == 0:
+                    return b""
+                return memoryview(mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ))
+
+    return MemoryMappedStore
+
+
+class CopernicusMirror:
+    """
+    Miroir local des plans de surface côtiers Copernicus sous logs/mirror/.
+
+    Une entrée par (dataset, pas de temps modèle) :
+    <dataset_id>/<AAAAMMJJTHHMM>.zarr, groupe zarr v2 consolidé lisible par
+    xarray.open_zarr (latitude, longitude + une variable float32 par champ,
+    tuiles MIRROR_CHUNK, sans compression). Chaque entrée est écrite une seule
+    fois (répertoire temporaire puis rename atomique) et n'est jamais réécrite :
+    un cycle modèle n'est téléchargé qu'une fois, puis relu par mmap par les
+    relances, le rattrapage historique, le démon et les produits maillés.
+    Quand le service renvoie un autre pas que celui demandé (pas inférieur au
+    lieu du plus proche, par exemple), <AAAAMMJJTHHMM>.alias associe le pas
+    demandé à l'entrée réellement écrite : get et has suivent l'alias.
+    """
+
+    def __init__(self, root: Path = MIRROR_DIR, enabled: bool = MIRROR_ENABLED):
+        self.root    = Path(root)
+        self.enabled = enabled
+        self._lock   = threading.Lock()
+        self._counts = {"hits": 0, "misses": 0, "writes": 0, "read_s": 0.0}
+
+    @staticmethod
+    def step_key(t: int) -> str:
+        return datetime.utcfromtimestamp(int(t)).strftime("%Y%m%dT%H%M")
+
+    def path(self, dataset_id: str, t: int) -> Path:
+        return self.root / dataset_id / f"{self.step_key(t)}.zarr"
+
+    def _resolve(self, dataset_id: str, t: int) -> int:
+        """Instant de l'entrée servant le pas t : t lui-même, ou la cible de son alias."""
+        alias = self.root / dataset_id / f"{self.step_key(t)}.alias"
+        try:
+            return int(alias.read_text().strip())
+        except (OSError, ValueError):
+            return int(t)
+
+    def has(self, dataset_id: str, t: int) -> bool:
+        if not self.enabled:
+            return False
+        return (self.path(dataset_id, self._resolve(dataset_id, t)) / ".zmetadata").exists()
+
+    def get(self, dataset_id: str, t: int, variables: list) -> Optional[CoastalGrid]:
+        """Plan du pas t (epoch s) ou None ; les variables manquantes comptent comme absence."""
+        if not self.enabled:
+            return None
+        import zarr
+        t    = self._resolve(dataset_id, t)
+        path = self.path(dataset_id, t)
+        t0   = time.perf_counter()
+        try:
+            group  = zarr.open_consolidated(_mmap_store_class()(str(path)), mode="r")
+            grid   = CoastalGrid(
+                dataset_id = dataset_id,
+                lat        = np.asarray(group["latitude"][:], dtype=float),
+                lon        = np.asarray(group["longitude"][:], dtype=float),
+                fields     = {v: np.asarray(group[v][:], dtype=float) for v in variables},
+                time       = int(t),
+            )
+        except (KeyError, OSError, ValueError, zarr.errors.GroupNotFoundError):
+            with self._lock:
+                self._counts["misses"] += 1
+            return None
+        with self._lock:
+            self._counts["hits"]   += 1
+            self._counts["read_s"] += time.perf_counter() - t0
+        return grid
+
+    def put(self, grid: CoastalGrid, slot: Optional[int] = None) -> None:
+        """
+        Écrit le plan sous son instant grid.time s'il est absent (premier
+        écrivain gagnant). Un plan sans coordonnée temps n'est pas mis en miroir :
+        l'entrée n'étant jamais réécrite, une clé devinée l'empoisonnerait.
+        slot : pas demandé par l'appelant (clé de get) ; s'il diffère de
+        grid.time, un alias slot → grid.time est enregistré.
+        """
+        if not self.enabled or grid.time is None:
+            return
+        t = grid.time
+        if slot is not None and int(slot) != t:
+            self._alias(grid.dataset_id, int(slot), t)
+        if (self.path(grid.dataset_id, t) / ".zmetadata").exists():
+            return
+        import zarr
+        path = self.path(grid.dataset_id, t)
+        tmp  = path.with_suffix(f".tmp{threading.get_ident()}")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            group = zarr.open_group(str(tmp), mode="w")
+            for name, values, dims in (
+                ("latitude",  grid.lat, ["latitude"]),
+                ("longitude", grid.lon, ["longitude"]),
+                *((v, a, ["latitude", "longitude"]) for v, a in grid.fields.items()),
+            ):
+                data = np.asarray(values, dtype=np.float32 if len(dims) == 2 else float)
+                arr  = group.create_dataset(
+                    name, data=data, compressor=None, fill_value=np.nan,
+                    # tuiles bornées à la taille du plan : zarr v2 stocke toujours des chunks pleins
+                    chunks=tuple(max(1, min(c, n)) for c, n in zip(MIRROR_CHUNK, data.shape)),
+                )
+                arr.attrs["_ARRAY_DIMENSIONS"] = dims   # convention xarray
+            group.attrs.update({"dataset_id": grid.dataset_id, "time": self.step_key(t),
+                                "bbox": COPERNICUS_COAST_BBOX})
+            zarr.consolidate_metadata(str(tmp))   # une seule lecture de métadonnées par ouverture
+            os.replace(tmp, path)
+        except OSError as e:
+            shutil.rmtree(tmp, ignore_errors=True)
+            if not path.exists():
+                logger.warning(f"Miroir Copernicus : écriture impossible ({e})")
+            return
+        with self._lock:
+            self._counts["writes"] += 1
+
+    def _alias(self, dataset_id: str, slot: int, t: int) -> None:
+        """Alias slot → t, écrit une seule fois (fichier temporaire puis rename atomique)."""
+        alias = self.root / dataset_id / f"{self.step_key(slot)}.alias"
+        if alias.exists():
+            return
+        tmp = alias.with_suffix(f".tmp{threading.get_ident()}")
+        try:
+            alias.parent.mkdir(parents=True, exist_ok=True)
+            tmp.write_text(str(int(t)))
+            os.replace(tmp, alias)
+        except OSError as e:
+            tmp.unlink(missing_ok=True)
+            logger.warning(f"Miroir Copernicus : alias impossible ({e})")
+
+    def steps(self, start: datetime, end: datetime, step_s: int) -> np.ndarray:
+        """Pas modèle attendus sur [start, end[ (epoch s)."""
+        lo = int(start.replace(tzinfo=timezone.utc).timestamp())
+        hi = int(end.replace(tzinfo=timezone.utc).timestamp())
+        return np.arange(-(-lo // step_s) * step_s, hi, step_s, dtype=np.int64)
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self._counts)
+        counts["read_s"] = round(counts["read_s"], 3)
+        return counts
+
+
+COPERNICUS_MIRROR = CopernicusMirror()
+
+
+# ============================================================================
+# 10c. RATTRAPAGE HISTORIQUE COPERNICUS (--backfill) — par tranches, reprenable
+# ============================================================================
+
+BACKFILL_DIR        = Path("logs/backfill")
+BACKFILL_WORKERS    = int(os.getenv("PECHEUR_BACKFILL_WORKERS", "4"))
+BACKFILL_CHUNK_DAYS = int(os.getenv("PECHEUR_BACKFILL_CHUNK_DAYS", "7"))
+# Houle : produit vagues global (VHM0 = hauteur significative), même maille 1/12°
+COPERNICUS_WAVE_DATASET = {"id": "cmems_mod_glo_wav_anfc_0.083deg_PT3H-i", "variables": ["VHM0"],
+                           "step_s": 3 * 3600}
 
-    async with aiohttp.ClientSession() as session:
-        for attempt in range(1, 4):
+
+def _remote_planes(dataset: dict, start: datetime, end: datetime):
+    """
+    Plans de surface (t epoch s, CoastalGrid) d'un dataset distant sur [start, end[,
+    chargés un par un et mis en miroir au passage.
+    """
+    dataset_id, variables = dataset["id"], dataset["variables"]
+    ds = _open_cm_dataset(
+        dataset_id, variables, COPERNICUS_COAST_BBOX,
+        start.strftime("%Y-%m-%dT%H:%M:%S"), (end - timedelta(seconds=1)).strftime("%Y-%m-%dT%H:%M:%S")
+    )
+    try:
+        stamps = ds["time"].values.astype("datetime64[s]").astype(np.int64) if "time" in ds.dims else \
+            np.array([int(start.replace(tzinfo=timezone.utc).timestamp())])
+        for i, t in enumerate(stamps):
+            grid = _surface_grid(dataset_id, variables, ds.isel(time=i) if "time" in ds.dims else ds)
+            COPERNICUS_MIRROR.put(grid)   # sous grid.time, coordonnée du pas i
+            yield int(t), grid
+    finally:
+        close = getattr(ds, "close", None)
+        if close is not None:
+            close()
+
+
+def _mirror_planes(dataset: dict, steps: np.ndarray):
+    """Plans (t epoch s, CoastalGrid) relus dans le miroir local ; KeyError si un pas est illisible."""
+    for t in steps:
+        grid = COPERNICUS_MIRROR.get(dataset["id"], t, dataset["variables"])
+        if grid is None:
+            raise KeyError(f"{dataset['id']}@{CopernicusMirror.step_key(t)}")
+        yield int(t), grid
+
+
+def _reduce_planes(planes, variables: list, lats: np.ndarray, lons: np.ndarray) -> tuple[np.ndarray, dict]:
+    """Moyennes par cellule de chaque plan : seul un plan de surface est en mémoire à la fois."""
+    stamps, columns = [], {v: [] for v in variables}
+    for t, grid in planes:
+        means = extract_zone_means(grid, lats, lons)
+        stamps.append(t)
+        for v in variables:
+            columns[v].append(means[v])
+    series = {v: np.stack(c, axis=1) if c else np.empty((lats.size, 0)) for v, c in columns.items()}
+    return np.array(stamps, dtype=np.int64), series
+
+
+def _reduce_dataset(
+    dataset: dict,
+    start: datetime,
+    end: datetime,
+    lats: np.ndarray,
+    lons: np.ndarray
+) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+    """
+    Moyennes par cellule de chaque pas de temps d'un dataset sur [start, end[.
+    Si tous les pas attendus sont dans le miroir local, ils y sont relus (mmap)
+    sans appel réseau ; sinon la plage est téléchargée derrière le disjoncteur
+    "copernicus" et les pas manquants sont mis en miroir.
+    Retourne (t epoch s (T,), variable → (C, T)).
+    """
+    dataset_id, variables = dataset["id"], dataset["variables"]
+    steps = COPERNICUS_MIRROR.steps(start, end, dataset["step_s"])
+    if steps.size and all(COPERNICUS_MIRROR.has(dataset_id, t) for t in steps):
+        try:
+            return _reduce_planes(_mirror_planes(dataset, steps), variables, lats, lons)
+        except KeyError as e:
+            logger.warning(f"Miroir Copernicus : {e} illisible — plage retéléchargée.")
+    return circuit_breaker("copernicus").call(
+        _reduce_planes, _remote_planes(dataset, start, end), variables, lats, lons
+    )
+
+
+def _at(stamps: np.ndarray, values: np.ndarray, t: np.ndarray) -> np.ndarray:
+    """Valeurs (C, T') rééchantillonnées aux instants t : dernier pas connu ≤ t."""
+    idx = np.clip(np.searchsorted(stamps, t, side="right") - 1, 0, stamps.size - 1)
+    return values[:, idx]
+
+
+def backfill_chunk(start: datetime, end: datetime, lats: np.ndarray, lons: np.ndarray) -> dict:
+    """
+    Une tranche [start, end[ réduite par cellule : instants des courants (PT6H),
+    houle (PT3H) et SST (P1D) ramenées sur ces instants. Bloquant (pool I/O).
+    Disjoncteur "copernicus" ouvert : la tranche échoue aussitôt (reprise
+    au prochain lancement) au lieu d'attendre l'échec de chaque dataset,
+    sauf si ses pas sont déjà tous dans le miroir local.
+    """
+    t, currents = _reduce_dataset(COPERNICUS_DATASETS["cur"], start, end, lats, lons)
+    t_w, waves  = _reduce_dataset(COPERNICUS_WAVE_DATASET, start, end, lats, lons)
+    t_s, temps  = _reduce_dataset(COPERNICUS_DATASETS["sst"], start, end, lats, lons)
+    return {
+        "t":       t,
+        "current": np.sqrt(currents["uo"] ** 2 + currents["vo"] ** 2),
+        "wave":    _at(t_w, waves["VHM0"], t),
+        "temp":    _at(t_s, temps["thetao"], t),
+    }
+
+
+def _backfill_chunks(start: datetime, end: datetime, chunk_days: int) -> list[tuple[datetime, datetime]]:
+    chunks, lo = [], start
+    while lo < end:
+        hi = min(end, lo + timedelta(days=chunk_days))
+        chunks.append((lo, hi))
+        lo = hi
+    return chunks
+
+
+async def backfill_history(
+    start: datetime,
+    end: datetime,
+    workers: int = BACKFILL_WORKERS,
+    chunk_days: int = BACKFILL_CHUNK_DAYS,
+    zones: Optional[dict[str, dict]] = None,
+    store: Optional["HistoryStore"] = None
+) -> dict:
+    """
+    Rattrape l'historique Copernicus sur [start, end[ dans le magasin colonnaire.
+
+    La période est découpée en tranches de chunk_days jours, téléchargées en
+    parallèle (au plus `workers` à la fois, pool I/O partagé). Chaque tranche
+    est réduite par cellule de grille dès sa lecture puis écrite dans
+    HistoryStore ; le point de reprise logs/backfill/<début>_<fin>.json est mis
+    à jour aussitôt. Une relance reprend aux tranches manquantes, et les
+    instants déjà présents ne sont jamais réécrits.
+    """
+    zones = zones if zones is not None else ZONES
+    store = store or HistoryStore()
+    if load_copernicusmarine() is None or not (SECRETS.get("COPERNICUS_USER") and SECRETS.get("COPERNICUS_PASS")):
+        raise RuntimeError("Rattrapage impossible : copernicusmarine ou identifiants Copernicus absents.")
+
+    BACKFILL_DIR.mkdir(parents=True, exist_ok=True)
+    state_file = BACKFILL_DIR / f"{start:%Y%m%d}_{end:%Y%m%d}.json"
+    state = {"start": start.isoformat(), "end": end.isoformat(), "chunk_days": chunk_days, "done": {}}
+    if state_file.exists():
+        with open(state_file, encoding="utf-8") as f:
+            state["done"] = json.load(f).get("done", {})
+
+    chunks  = [c for c in _backfill_chunks(start, end, chunk_days) if f"{c[0]:%Y%m%d}" not in state["done"]]
+    cells   = list(build_cell_index(zones).values())
+    lats    = np.array([c["lat"] for c in cells], dtype=float)
+    lons    = np.array([c["lon"] for c in cells], dtype=float)
+    # Zone → ligne de sa cellule (valeurs distribuées sans copie de grille)
+    names   = [name for cell in cells for name in cell["zones"]]
+    row_of  = np.array([i for i, cell in enumerate(cells) for _ in cell["zones"]], dtype=np.int64)
+    logger.info(
+        f"=== Rattrapage Copernicus {start:%Y-%m-%d} → {end:%Y-%m-%d} : {len(chunks)} tranches à traiter "
+        f"({len(state['done'])} déjà faites), {workers} en parallèle, {len(cells)} cellules ==="
+    )
+
+    n_total = len(state["done"]) + len(chunks)
+    totals  = {"chunks": 0, "failed": 0, "rows": 0}
+    async with IOContext(max_workers=workers) as io:
+        async def _one(lo: datetime, hi: datetime):
             try:
-                async with session.get(url, timeout=aiohttp.ClientTimeout(total=10)) as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        daily = data.get("daily", [])[:7]
-                        result = []
-                        for d in daily:
-                            wind_ms = d.get("wind_speed", 5)
-                            # Estimation Bretschneider : Hs ≈ 0.0248 * U^2 (U en m/s, fetch 200km)
-                            wave = round(min(4.0, 0.0248 * wind_ms ** 2), 2)
-                            temp = d.get("temp", {}).get("day", 25)
-                            pop  = d.get("pop", 0)  # probabilité pluie
-                            uvi  = d.get("uvi", 5)
-
-                            # Score pêche prévisionnel
-                            s_wave  = max(0, 10 - wave * 4)
-                            s_temp  = 10 - abs(temp - 24.5) * 0.6
-                            s_wind  = max(0, 10 - wind_ms * 0.4)
-                            score   = round((s_wave*.45 + s_temp*.3 + s_wind*.25), 1)
-
-                            # Code sécurité
-                            if wave <= 1.0:
-                                sec = "safe"
-                            elif wave <= 1.5:
-                                sec = "caution"
-                            elif wave <= 2.5:
-                                sec = "warning"
-                            else:
-                                sec = "danger"
-
-                            result.append({
-                                "dt":         d.get("dt"),
-                                "wave":       wave,
-                                "wind_ms":    round(wind_ms, 1),
-                                "wind_kn":    round(wind_ms * 1.944, 1),
-                                "temp":       round(temp, 1),
-                                "pop":        round(pop * 100),
-                                "uvi":        round(uvi, 1),
-                                "peche_score":  score,
-                                "securite_code": sec,
-                            })
-                        logger.info(f"OpenWeather Forecast 7J OK ({lat},{lon})")
-                        return result
-                    elif resp.status == 429:
-                        await asyncio.sleep(2 ** attempt)
-                    else:
-                        logger.warning(f"Forecast HTTP {resp.status} — simulation")
-                        return _simulate_forecast(lat, lon)
+                return lo, hi, await io.run_blocking(backfill_chunk, lo, hi, lats, lons)
             except Exception as e:
-                logger.warning(f"Forecast erreur ({lat},{lon}) tentative {attempt}: {e}")
-                await asyncio.sleep(1)
-
-    return _simulate_forecast(lat, lon)
-
-
-def _simulate_forecast(lat: float, lon: float) -> list:
-    """Génère des prévisions simulées réalistes sur 7 jours."""
-    import random, time
-    rng = random.Random(int(lat * 1000 + lon * 100))
-    now = int(time.time())
-    result = []
-    base_wave = rng.uniform(0.5, 1.8)
-    for i in range(7):
-        wave = round(max(0.2, base_wave + rng.gauss(0, 0.4) + i * 0.05), 2)
-        wind = round(wave / 0.0248 ** 0.5 + rng.gauss(0, 1), 1)
-        temp = round(23.5 + rng.gauss(0, 1.5), 1)
-        s_wave = max(0, 10 - wave * 4)
-        s_temp = 10 - abs(temp - 24.5) * 0.6
-        s_wind = max(0, 10 - wind * 0.4)
-        score  = round(s_wave*.45 + s_temp*.3 + s_wind*.25, 1)
-        sec = "safe" if wave <= 1.0 else "caution" if wave <= 1.5 else "warning" if wave <= 2.5 else "danger"
-        result.append({
-            "dt": now + i * 86400,
-            "wave": wave, "wind_ms": wind, "wind_kn": round(wind * 1.944, 1),
-            "temp": temp, "pop": rng.randint(0, 40), "uvi": round(rng.uniform(4, 9), 1),
-            "peche_score": score, "securite_code": sec,
-        })
+                return lo, hi, e
+
+        for done in asyncio.as_completed([_one(lo, hi) for lo, hi in chunks]):
+            lo, hi, reduced = await done
+            if isinstance(reduced, Exception):
+                totals["failed"] += 1
+                logger.error(f"Tranche {lo:%Y-%m-%d} en échec (reprise au prochain lancement) : {reduced}")
+                continue
+            # Zones sur une cellule sans océan dans un des produits : ignorées
+            ok = ~np.isnan(np.stack([reduced[k][row_of] for k in ("wave", "temp", "current")])).any(axis=(0, 2))
+            keep    = [n for n, good in zip(names, ok) if good]
+            if len(keep) < len(names):
+                logger.warning(f"Tranche {lo:%Y-%m-%d} : {len(names) - len(keep)} zones sans donnée océan ignorées")
+            rows    = row_of[ok]
+            wave    = _round_half(reduced["wave"][rows], 2)
+            temp    = _round_half(reduced["temp"][rows], 2)
+            current = _round_half(reduced["current"][rows], 3)
+            written = store.append_series(
+                keep, reduced["t"], wave=wave, temp=temp, current=current,
+                score=_round_half(fishing_score_batch(wave, temp, current), 1),
+                safety=safety_level_batch(wave), skip_existing=True,
+            )
+            state["done"][f"{lo:%Y%m%d}"] = written
+            tmp = state_file.with_suffix(".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(state, f, indent=2)
+            os.replace(tmp, state_file)
+            totals["chunks"] += 1
+            totals["rows"]   += written
+            logger.info(
+                f"  tranche {lo:%Y-%m-%d} → {hi:%Y-%m-%d} : {reduced['t'].size} pas, {written} lignes "
+                f"({len(state['done'])}/{n_total})"
+            )
+
+    totals["breaker"] = circuit_breaker("copernicus").stats()
+    logger.info(
+        f"=== Rattrapage terminé : {totals['chunks']} tranches, {totals['rows']} lignes, "
+        f"{totals['failed']} en échec (disjoncteur {totals['breaker']['state']}) ==="
+    )
+    return totals
+
+
+# ============================================================================
+# 10d. PRÉVISIONS 7 JOURS OPENWEATHER
+# ============================================================================
+
+def _parse_forecast_7days(data: Optional[dict], lat: float, lon: float) -> Optional[list]:
+    """Prévisions 7 jours d'une réponse One Call, ou None si bloc daily absent / illisible."""
+    daily = (data or {}).get("daily") or []
+    if not daily:
+        return None
+
+    try:
+        days = daily[:7]
+        wind = np.array([d.get("wind_speed", 5) for d in days], dtype=float)
+        temp = np.array([d.get("temp", {}).get("day", 25) for d in days], dtype=float)
+        # Estimation Bretschneider : Hs ≈ 0.0248 * U^2 (U en m/s, fetch 200km)
+        wave   = _round_half(np.minimum(4.0, 0.0248 * wind ** 2), 2)
+        # Score pêche prévisionnel + code sécurité, en un seul passage vectorisé
+        scores = _round_half(forecast_score_batch(wave, temp, wind), 1)
+        codes  = SAFETY_CODES[safety_level_batch(wave)]
+
+        result = []
+        for i, d in enumerate(days):
+            wind_ms = d.get("wind_speed", 5)
+            pop     = d.get("pop", 0)  # probabilité pluie
+            result.append({
+                "dt":         d.get("dt"),
+                "wave":       float(wave[i]),
+                "wind_ms":    round(wind_ms, 1),
+                "wind_kn":    round(wind_ms * 1.944, 1),
+                "temp":       round(d.get("temp", {}).get("day", 25), 1),
+                "pop":        round(pop * 100),
+                "uvi":        round(d.get("uvi", 5), 1),
+                "peche_score":  float(scores[i]),
+                "securite_code": str(codes[i]),
+            })
+    except (AttributeError, TypeError, ValueError) as e:
+        logger.warning(f"Forecast parsing error ({lat},{lon}) : {e} — simulation")
+        return None
+
+    logger.info(f"OpenWeather Forecast 7J OK ({lat},{lon})")
     return result
 
 
+@METRICS.timed()
+def forecast_7days_batch(onecalls: list[Optional[dict]], coords: list[tuple[float, float]]) -> list[list]:
+    """
+    Prévisions 7 jours pour N points (réponses One Call, bloc daily).
+    Les points sans prévision exploitable sont simulés ensemble
+    (simulate_forecast_batch, un seul échantillonnage N × 7).
+    """
+    results = [_parse_forecast_7days(data, lat, lon) for data, (lat, lon) in zip(onecalls, coords)]
+    missing = [i for i, r in enumerate(results) if r is None]
+    for i, sim in zip(missing, simulate_forecast_batch([coords[i] for i in missing])):
+        results[i] = sim
+    return results
+
+
+def parse_forecast_7days(data: Optional[dict], lat: float, lon: float) -> list:
+    """
+    Extrait les prévisions 7 jours (bloc daily) d'une réponse One Call.
+    Retourne une liste de 7 dict avec score, houle estimée, vent, température.
+    """
+    return forecast_7days_batch([data], [(lat, lon)])[0]
+
+
+@METRICS.timed()
+async def fetch_forecast_7days(
+    session: aiohttp.ClientSession,
+    lat: float,
+    lon: float
+) -> list:
+    """
+    Récupère les prévisions météo-marines sur 7 jours via OpenWeather One Call API.
+    Retourne une liste de 7 dict avec score, houle estimée, vent, température.
+    """
+    return parse_forecast_7days(await fetch_onecall(session, lat, lon), lat, lon)
+
+
+def simulate_forecast_batch(coords: list[tuple[float, float]]) -> list[list]:
+    """Prévisions simulées sur 7 jours pour N points (milieu de journée), en un passage N × 7."""
+    if not coords:
+        return []
+    lats, lons = zip(*coords)
+    now    = _sim_now()
+    times  = now + np.arange(7) * 86400
+    f      = synthetic_ocean().sample(lats, lons, times - now % 86400 + 12 * 3600)
+    wind   = _round_half(f["wind"], 1)
+    wave   = _round_half(np.minimum(4.0, 0.0248 * wind ** 2), 2)
+    temp   = _round_half(f["temp_air"], 1)
+    scores = _round_half(forecast_score_batch(wave, temp, wind), 1)
+    codes  = SAFETY_CODES[safety_level_batch(wave)]
+    return [
+        [
+            {
+                "dt":            int(times[i]),
+                "wave":          float(wave[p, i]),
+                "wind_ms":       float(wind[p, i]),
+                "wind_kn":       round(float(wind[p, i]) * 1.944, 1),
+                "temp":          float(temp[p, i]),
+                "pop":           int(round(float(f["pop"][p, i]) * 100)),
+                "uvi":           float(f["uvi"][p, i]),
+                "peche_score":   float(scores[p, i]),
+                "securite_code": str(codes[p, i]),
+            }
+            for i in range(7)
+        ]
+        for p in range(len(coords))
+    ]
+
+
+# ============================================================================
+# 10e. PRÉVISIONS HORAIRES 48 H (tableaux compactés + meilleure fenêtre de départ)
+# ============================================================================
+
+HOURLY_HOURS     = 48
+# Champs horaires quantifiés sur un octet : valeur = octet × pas
+HOURLY_FIELDS    = ("wave", "wind_ms", "temp", "pop", "score", "safety")
+HOURLY_SCALE     = np.array([0.05, 0.25, 0.25, 1.0, 0.1, 1.0])   # houle ≤ 12.75 m, vent/temp ≤ 63.75
+DEPARTURE_HOURS  = int(os.getenv("PECHEUR_DEPARTURE_HOURS", "4"))   # durée d'une sortie
+DEPARTURE_START  = (4, 16)   # heures UTC (= heure locale au Sénégal) de départ envisageables
+DEPARTURE_MAX_SAFETY = 1     # niveau max toléré pendant la sortie (caution)
+
+
+def pack_hourly(columns: np.ndarray) -> str:
+    """(6, H) valeurs physiques → base64 de 6 × H octets (ordre HOURLY_FIELDS)."""
+    q = np.rint(columns / HOURLY_SCALE[:, None])
+    return base64.b64encode(np.clip(q, 0, 255).astype(np.uint8).tobytes()).decode("ascii")
+
+
+def unpack_hourly(packed: dict) -> dict[str, np.ndarray]:
+    """Inverse de pack_hourly : {"t": epoch[], champ: valeurs[]} pour un enregistrement forecast_48h."""
+    raw    = np.frombuffer(base64.b64decode(packed["data"]), dtype=np.uint8)
+    values = raw.reshape(len(HOURLY_FIELDS), -1) * HOURLY_SCALE[:, None]
+    out    = {"t": packed["t0"] + np.arange(values.shape[1], dtype=np.int64) * packed["step_s"]}
+    for name, row in zip(HOURLY_FIELDS, values):
+        out[name] = row.astype(np.int64) if name in ("pop", "safety") else np.round(row, 2)
+    return out
+
+
+def _simulate_hourly(coords: list[tuple[float, float]], t0: int) -> tuple[np.ndarray, ...]:
+    """Vent / température / pluie horaires simulés (simulateur partagé), C × H."""
+    lats, lons = zip(*coords)
+    f = synthetic_ocean().sample(lats, lons, t0 + np.arange(HOURLY_HOURS, dtype=np.int64) * 3600)
+    return f["wind"], f["temp_air"], f["pop"]
+
+
+def best_departure_windows(score: np.ndarray, safety: np.ndarray, t: np.ndarray) -> list[Optional[dict]]:
+    """
+    Meilleure fenêtre de DEPARTURE_HOURS heures pour chaque ligne (C × H,
+    t = horodatages de chaque heure) :
+    départ entre DEPARTURE_START, aucune heure au-delà de DEPARTURE_MAX_SAFETY,
+    score moyen maximal. None si aucune fenêtre sûre.
+    """
+    w = DEPARTURE_HOURS
+    if score.shape[1] < w:
+        return [None] * score.shape[0]
+    csum  = np.concatenate([np.zeros((score.shape[0], 1)), np.cumsum(score, axis=1)], axis=1)
+    mean  = (csum[:, w:] - csum[:, :-w]) / w                                             # (C, H-w+1)
+    worst = np.lib.stride_tricks.sliding_window_view(safety, w, axis=1).max(axis=2)      # (C, H-w+1)
+    start_hour = (t[:, : mean.shape[1]] // 3600) % 24
+    ok    = (worst <= DEPARTURE_MAX_SAFETY) & (start_hour >= DEPARTURE_START[0]) \
+            & (start_hour <= DEPARTURE_START[1])
+    ranked = np.where(ok, mean, -np.inf)
+    best   = np.argmax(ranked, axis=1)
+
+    windows = []
+    for c, i in enumerate(best):
+        if not np.isfinite(ranked[c, i]):
+            windows.append(None)
+            continue
+        windows.append({
+            "start":  datetime.utcfromtimestamp(int(t[c, i])).strftime("%Y-%m-%dT%H:%MZ"),
+            "end":    datetime.utcfromtimestamp(int(t[c, i]) + w * 3600).strftime("%Y-%m-%dT%H:%MZ"),
+            "score":  round(float(mean[c, i]), 1),
+            "safety": str(SAFETY_CODES[worst[c, i]]),
+        })
+    return windows
+
+
+@METRICS.timed()
+def hourly_forecast_batch(onecalls: list[Optional[dict]], coords: list[tuple[float, float]]) -> list[dict]:
+    """
+    Prévisions horaires 48 h pour C points (réponses One Call, bloc hourly),
+    notées en un seul passage vectorisé C × 48 (forecast_score_batch), avec
+    la meilleure fenêtre de départ de chaque point.
+
+    Chaque entrée : {"t0", "step_s", "fields", "data" (base64, cf. pack_hourly),
+    "best_window"} — quelques centaines d'octets au lieu de 48 dicts.
+    """
+    n   = len(onecalls)
+    t0  = int(time.time()) // 3600 * 3600
+    wind = np.full((n, HOURLY_HOURS), np.nan)
+    temp = np.full((n, HOURLY_HOURS), np.nan)
+    pop  = np.full((n, HOURLY_HOURS), np.nan)
+    starts = np.full(n, t0, dtype=np.int64)
+    for c, data in enumerate(onecalls):
+        hourly = (data or {}).get("hourly") or []
+        if len(hourly) < HOURLY_HOURS:
+            continue
+        try:
+            hourly = hourly[:HOURLY_HOURS]
+            starts[c]  = int(hourly[0]["dt"])
+            wind[c]    = [h.get("wind_speed", np.nan) for h in hourly]
+            temp[c]    = [h.get("temp", np.nan) for h in hourly]
+            pop[c]     = [h.get("pop", 0.0) for h in hourly]
+        except (KeyError, TypeError, ValueError) as e:
+            logger.warning(f"Prévision horaire illisible {coords[c]} : {e} — simulation")
+            wind[c] = np.nan
+
+    missing = np.isnan(wind).any(axis=1)
+    if missing.any():
+        sim_wind, sim_temp, sim_pop = _simulate_hourly([coords[c] for c in np.flatnonzero(missing)], t0)
+        wind[missing], temp[missing], pop[missing] = sim_wind, sim_temp, sim_pop
+        starts[missing] = t0
+    temp = np.where(np.isnan(temp), 25.0, temp)
+
+    # Bretschneider (comme les prévisions journalières), puis score et sécurité en bloc
+    wave   = np.minimum(4.0, 0.0248 * wind ** 2)
+    score  = _round_half(forecast_score_batch(wave, temp, wind), 1)
+    safety = safety_level_batch(wave)
+    t      = starts[:, None] + np.arange(HOURLY_HOURS, dtype=np.int64)[None, :] * 3600
+    best   = best_departure_windows(score, safety, t)
+
+    return [
+        {
+            "t0":          int(starts[c]),
+            "step_s":      3600,
+            "fields":      list(HOURLY_FIELDS),
+            "data":        pack_hourly(np.stack([wave[c], wind[c], temp[c], pop[c] * 100, score[c], safety[c]])),
+            "best_window": best[c],
+        }
+        for c in range(n)
+    ]
+
+
 # ============================================================================
 # 11. AGRÉGATION PAR ZONE (OpenWeather + Copernicus → Indices)
 # ============================================================================
@@ -557,20 +2362,54 @@ def _simulate_forecast(lat: float, lon: float) -> list:
 async def fetch_zone_data(
     session: aiohttp.ClientSession,
     zone_name: str,
-    zone_info: dict
+    zone_info: dict,
+    cop_data: Optional[dict] = None,
+    limiter: Optional[TokenBucket] = None
 ) -> dict:
     """
     Récupère et fusionne les données OpenWeather + Copernicus pour une zone.
     Les appels sont parallélisés via asyncio.gather pour la performance.
+    cop_data : résultat pré-calculé par fetch_copernicus_batch (sinon appel isolé).
+    limiter  : token bucket OpenWeather partagé par toutes les zones.
     """
     lat, lon = zone_info["lat"], zone_info["lon"]
 
-    # Appels parallèles (OpenWeather + Copernicus + Prévisions 7J)
-    ow_data, cop_data, forecast_7j = await asyncio.gather(
-        fetch_openweather(session, lat, lon),
-        fetch_copernicus(lat, lon),
-        fetch_forecast_7days(lat, lon)
+    async def _copernicus() -> dict:
+        return cop_data if cop_data is not None else await fetch_copernicus(lat, lon)
+
+    # Appels parallèles (One Call unique + Copernicus)
+    onecall, cop_data = await asyncio.gather(
+        fetch_onecall(session, lat, lon, limiter),
+        _copernicus()
     )
+    return build_zone_data(zone_name, zone_info, onecall, cop_data)
+
+
+def build_zone_data(
+    zone_name: str,
+    zone_info: dict,
+    onecall: Optional[dict],
+    cop_data: dict,
+    forecast_48h: Optional[dict] = None,
+    ow_data: Optional[dict] = None,
+    forecast_7j: Optional[list] = None
+) -> dict:
+    """
+    Fusionne une réponse One Call (éventuellement partagée par toute la cellule
+    de grille) et les données Copernicus de la zone → enregistrement publié.
+    Les valeurs sont celles du centre de cellule (cf. build_cell_index) ;
+    lat/lon publiés restent ceux du site.
+    forecast_48h, ow_data, forecast_7j : déjà calculés en lot pour toutes les
+    zones (hourly_forecast_batch, openweather_current_batch, forecast_7days_batch).
+    """
+    lat, lon = zone_info["lat"], zone_info["lon"]
+    # Une seule réponse One Call → conditions actuelles + prévisions 7J + horaire 48 h
+    if ow_data is None:
+        ow_data = parse_openweather_current(onecall, lat, lon)
+    if forecast_7j is None:
+        forecast_7j = parse_forecast_7days(onecall, lat, lon)
+    if forecast_48h is None:
+        forecast_48h = hourly_forecast_batch([onecall], [(lat, lon)])[0]
 
     # Fusion : Copernicus prioritaire pour SST et courants
     wave    = ow_data.get("wave_height", 1.0)
@@ -598,6 +2437,7 @@ async def fetch_zone_data(
         },
         "updated_at":  datetime.utcnow().isoformat(),
         "forecast_7j": forecast_7j,
+        "forecast_48h": forecast_48h,
     }
 
 
@@ -605,10 +2445,13 @@ async def fetch_zone_data(
 # 12. GÉNÉRATION DATA.JSON
 # ============================================================================
 
+@METRICS.timed()
 def save_data_json(results: list[dict], tides_data: dict = None) -> None:
     """
     Génère data.json avec toutes les zones + métadonnées.
-    Sauvegarde également un snapshot horodaté dans logs/history/.
+    L'historique est conservé dans le magasin colonnaire (HistoryStore).
+    Publie aussi la version découpée/précompressée (publish_compact)
+    et les deltas depuis les versions précédentes (publish_delta_feed).
     """
     now = datetime.utcnow()
 
@@ -616,8 +2459,8 @@ def save_data_json(results: list[dict], tides_data: dict = None) -> None:
     scores      = [r["indices"]["peche_score"] for r in results]
     danger_zones = [r["zone"] for r in results if r["indices"]["securite_code"] == "danger"]
 
-    # Indexer les marées par zone pour le payload
-    tides_payload = tides_data or {}
+    # Marées : data.json ne porte que le jour 1 (les jours suivants vont dans data/zones/)
+    tides_payload = {zone: tides_day1(table) for zone, table in (tides_data or {}).items()}
     payload = {
         "meta": {
             "version":      "4.2",
@@ -637,7 +2480,8 @@ def save_data_json(results: list[dict], tides_data: dict = None) -> None:
                 "safe":    sum(1 for r in results if r["indices"]["securite_code"] == "safe"),
             }
         },
-        "zones": {r["zone"]: r for r in results}
+        "zones": {r["zone"]: r for r in results},
+        "marees": tides_payload,
     }
 
     # Fichier principal — lu par le workflow GitHub Actions
@@ -645,13 +2489,921 @@ def save_data_json(results: list[dict], tides_data: dict = None) -> None:
         json.dump(payload, f, ensure_ascii=False, indent=2)
     logger.info("✅ data.json généré avec succès.")
 
-    # Snapshot horodaté
-    snapshot_path = f"logs/history/data_{now.strftime('%Y%m%d_%H%M')}.json"
-    with open(snapshot_path, "w", encoding="utf-8") as f:
-        json.dump(payload, f, ensure_ascii=False, indent=2)
-    logger.info(f"📁 Snapshot sauvegardé : {snapshot_path}")
+    # Publication compacte pour le PWA (premier chargement réduit)
+    try:
+        manifest = publish_compact(payload, tides_data)
+        first    = manifest["files"]["summary.json"]
+        logger.info(
+            f"📦 Publication : {len(manifest['files'])} fichiers dans {PUBLISH_DIR}/ — "
+            f"résumé {first['bytes']} o (gzip {first['gz']} o"
+            + (f", brotli {first['br']} o)" if "br" in first else ")")
+        )
+    except OSError as e:
+        logger.warning(f"Publication compacte ignorée : {e}")
+
+    # Deltas depuis les versions précédentes (clients hors ligne)
+    try:
+        feed  = publish_delta_feed(payload)
+        sizes = ", ".join(f"{d['gz']} o" for d in feed["deltas"].values())
+        logger.info(f"🔁 Flux de deltas : {len(feed['deltas'])} versions servies ({sizes or '—'} gzip)")
+    except OSError as e:
+        logger.warning(f"Flux de deltas ignoré : {e}")
+
+
+
+# ============================================================================
+# 12a. PUBLICATION COMPACTE (résumé minifié + détail par zone + .gz/.br)
+# ============================================================================
+
+PUBLISH_DIR = Path("data")
+# Champs d'une zone nécessaires à la vue d'accueil ; le reste part dans data/zones/<ZONE>.json
+SUMMARY_ZONE_FIELDS = ("region", "desc", "lat", "lon", "indices", "updated_at")
+
+
+def _dump_min(obj) -> bytes:
+    """JSON minifié (UTF-8, sans espaces) — format de tous les fichiers publiés."""
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _write_published(rel: str, body: bytes) -> dict:
+    """
+    Écrit data/<rel> et ses jumeaux précompressés (.gz, .br si brotli est installé).
+    Un fichier dont le contenu n'a pas changé n'est pas réécrit (pas de diff git inutile).
+    Retourne l'entrée de manifeste correspondante.
+    """
+    path   = PUBLISH_DIR / rel
+    digest = hashlib.sha256(body).hexdigest()
+    entry  = {"sha256": digest[:16], "bytes": len(body)}
+
+    variants = {"gz": lambda: gzip.compress(body, compresslevel=9, mtime=0)}
+    brotli = load_brotli()
+    if brotli is not None:
+        variants["br"] = lambda: brotli.compress(body, quality=11)
+
+    unchanged = path.exists() and hashlib.sha256(path.read_bytes()).hexdigest() == digest
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if not unchanged:
+        with open(path, "wb") as f:
+            f.write(body)
+    for ext, compress in variants.items():
+        sibling = path.with_name(path.name + "." + ext)
+        if unchanged and sibling.exists():
+            entry[ext] = sibling.stat().st_size
+            continue
+        packed = compress()
+        with open(sibling, "wb") as f:
+            f.write(packed)
+        entry[ext] = len(packed)
+    return entry
+
+
+@METRICS.timed()
+def publish_compact(payload: dict, tides_data: Optional[dict] = None) -> dict:
+    """
+    Découpe le payload de data.json pour les liaisons mobiles lentes :
+      data/summary.json        — meta + stats + indices de chaque zone (vue d'accueil)
+      data/zones/<ZONE>.json   — enregistrement complet de la zone + ses marées
+                                 (jour 1 comme dans data.json, plus "jours" : J+1…)
+      data/manifest.json       — hash de contenu et tailles (brute / .gz / .br)
+    Aucun champ n'est perdu : résumé + détail = data.json, plus les marées des
+    jours suivants (tides_data, sortie de compute_tide_tables). Les fichiers de
+    data/zones/ absents du nouveau manifeste (zone retirée ou renommée, jumeau
+    .br devenu orphelin) sont supprimés après son écriture.
+    """
+    marees  = payload.get("marees") or {}
+    tables  = tides_data or {}
+    files   = {}
+    summary = {
+        "meta":  payload["meta"],
+        "stats": payload["stats"],
+        "zones": {
+            name: {
+                **{k: z[k] for k in SUMMARY_ZONE_FIELDS if k in z},
+                "source": z["copernicus"].get("source"),
+            }
+            for name, z in payload["zones"].items()
+        },
+        "detail": "zones/{zone}.json",
+    }
+    files["summary.json"] = _write_published("summary.json", _dump_min(summary))
+
+    for name, z in payload["zones"].items():
+        tides  = marees.get(name)
+        if name in tables:
+            tides = {**tides_day1(tables[name]), "jours": tables[name]["jours"][1:]}
+        detail = dict(z, marees=tides)
+        rel    = f"zones/{name}.json"
+        files[rel] = _write_published(rel, _dump_min(detail))
+
+    manifest = {"generated_at": payload["meta"]["generated_at"], "files": files}
+    with open(PUBLISH_DIR / "manifest.json", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    current = {
+        f"{rel}.{ext}" if ext else rel
+        for rel, entry in files.items()
+        for ext in ("", "gz", "br") if not ext or ext in entry
+    }
+    for stale in (PUBLISH_DIR / "zones").glob("*"):
+        if stale.relative_to(PUBLISH_DIR).as_posix() not in current:
+            stale.unlink(missing_ok=True)
+    return manifest
+
+
+# ============================================================================
+# 12b. FLUX DE DELTAS ENTRE EXÉCUTIONS (JSON Patch, RFC 6902)
+# ============================================================================
+
+FEED_DIR  = PUBLISH_DIR / "feed"
+FEED_KEEP = int(os.getenv("PECHEUR_FEED_KEEP", "4"))   # versions antérieures servies en delta
+
+
+def _feed_slug(version: str) -> str:
+    """meta.generated_at → nom de fichier (':' interdit sur certains systèmes)."""
+    return version.replace(":", "-")
 
 
+def _pointer(path: str, key) -> str:
+    return f"{path}/{str(key).replace('~', '~0').replace('/', '~1')}"
+
+
+def json_diff(old, new, path: str = "") -> list[dict]:
+    """
+    Opérations JSON Patch transformant `old` en `new`, au niveau des feuilles :
+    descend dans les objets et dans les listes (éléments communs comparés un à
+    un, puis suppression ou ajout de la fin). Seule une valeur qui change de
+    type ou une feuille modifiée est remplacée.
+    """
+    if old == new:
+        return []
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops = []
+        for key in old:
+            if key not in new:
+                ops.append({"op": "remove", "path": _pointer(path, key)})
+        for key, value in new.items():
+            if key not in old:
+                ops.append({"op": "add", "path": _pointer(path, key), "value": value})
+            else:
+                ops.extend(json_diff(old[key], value, _pointer(path, key)))
+        return ops
+    if isinstance(old, list) and isinstance(new, list):
+        ops = []
+        for i, (a, b) in enumerate(zip(old, new)):
+            ops.extend(json_diff(a, b, _pointer(path, i)))
+        # Fin de liste : suppressions de la dernière vers la première, puis ajouts dans l'ordre
+        ops += [{"op": "remove", "path": _pointer(path, i)} for i in range(len(old) - 1, len(new) - 1, -1)]
+        ops += [{"op": "add", "path": _pointer(path, i), "value": new[i]} for i in range(len(old), len(new))]
+        return ops
+    return [{"op": "replace", "path": path, "value": new}]
+
+
+@METRICS.timed()
+def publish_delta_feed(payload: dict) -> dict:
+    """
+    Publie data/feed/<version>.json : patch de chaque version récente vers la version courante.
+    Un client à jour de `v` télécharge data/feed/<v>.json ; si le fichier n'existe pas
+    (version trop ancienne), il recharge l'instantané complet (data.json).
+    Les FEED_KEEP derniers payloads sont conservés compressés dans data/feed/snapshots/.
+    """
+    version   = payload["meta"]["generated_at"]
+    snap_dir  = FEED_DIR / "snapshots"
+    snap_dir.mkdir(parents=True, exist_ok=True)
+
+    # Versions antérieures, de la plus récente à la plus ancienne
+    previous = sorted(
+        (p for p in snap_dir.glob("*.json.gz") if p.name != f"{_feed_slug(version)}.json.gz"),
+        reverse=True
+    )[:FEED_KEEP]
+
+    deltas = {}
+    for snap in previous:
+        try:
+            old = json.loads(gzip.decompress(snap.read_bytes()))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Instantané {snap.name} illisible : {e}")
+            continue
+        old_version = old["meta"]["generated_at"]
+        body = _dump_min({"from": old_version, "to": version, "patch": json_diff(old, payload)})
+        rel  = f"feed/{_feed_slug(old_version)}.json"
+        deltas[old_version] = {"file": rel, **_write_published(rel, body)}
+
+    # Instantané courant, puis purge de ce qui n'est plus servi
+    with open(snap_dir / f"{_feed_slug(version)}.json.gz", "wb") as f:
+        f.write(gzip.compress(_dump_min(payload), compresslevel=9, mtime=0))
+    keep = {f"{_feed_slug(v)}.json" for v in deltas} | {"index.json"}
+    for p in FEED_DIR.glob("*.json*"):
+        if p.name.split(".json")[0] + ".json" not in keep:
+            p.unlink()
+    for p in sorted(snap_dir.glob("*.json.gz"), reverse=True)[FEED_KEEP + 1:]:
+        p.unlink()
+
+    index = {"current": version, "snapshot": "data.json", "deltas": deltas}
+    with open(FEED_DIR / "index.json", "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, indent=2)
+    return index
+
+
+# ============================================================================
+# 12c. HISTORIQUE COLONNAIRE (append-only, partitionné par mois et par zone)
+# ============================================================================
+
+HISTORY_STORE_DIR = Path("logs/store")
+HISTORY_SCHEMA_VERSION = 2
+# Une colonne = un fichier à largeur fixe : <AAAA-MM>/<ZONE>/<champ>.<type> (t.i8, wave.f4…)
+HISTORY_COLUMNS = {
+    "t":       np.dtype("<i8"),   # horodatage UTC (s depuis epoch)
+    "wave":    np.dtype("<f4"),   # m
+    "temp":    np.dtype("<f4"),   # °C
+    "current": np.dtype("<f4"),   # m/s
+    "score":   np.dtype("<f4"),   # 0–10
+    "safety":  np.dtype("u1"),    # index dans SAFETY_CODES
+    "wind":    np.dtype("<f4"),   # m/s, NaN si inconnu (rattrapage Copernicus)
+}
+HISTORY_FIELDS = [name for name in HISTORY_COLUMNS if name != "t"]
+# Valeur des lignes antérieures à l'apparition d'une colonne
+HISTORY_FILL = {"safety": 0}
+# Format v1 (une ligne entrelacée de 25 octets par enregistrement), migré à l'ouverture
+_HISTORY_V1_DTYPE = np.dtype([("t", "<i8"), ("wave", "<f4"), ("temp", "<f4"),
+                              ("current", "<f4"), ("score", "<f4"), ("safety", "u1")])
+
+
+class HistoryStore:
+    """
+    Magasin de séries temporelles append-only, stocké par colonne :
+    logs/store/<AAAA-MM>/<ZONE>/ contient un fichier par champ (t.i8, wave.f4,
+    …, safety.u1), une valeur par exécution. Lire un champ d'une zone sur un
+    mois, c'est lire t.i8 et le fichier de ce champ, en memmap contigu : les
+    autres colonnes ne sont pas touchées.
+
+    t.i8 est écrit en dernier et fait foi : une colonne plus longue (écriture
+    interrompue) est tronquée, une colonne plus courte (champ ajouté au schéma)
+    est complétée avant l'ajout suivant.
+    """
+
+    def __init__(self, root: Path = HISTORY_STORE_DIR):
+        self.root = Path(root)
+        self._migrate_v1()
+
+    def _dir(self, month: str, zone: str) -> Path:
+        return self.root / month / zone
+
+    @staticmethod
+    def _file(zdir: Path, name: str) -> Path:
+        return zdir / f"{name}.{HISTORY_COLUMNS[name].str[1:]}"
+
+    def _rows(self, zdir: Path) -> int:
+        path = self._file(zdir, "t")
+        return path.stat().st_size // HISTORY_COLUMNS["t"].itemsize if path.exists() else 0
+
+    def _column(self, zdir: Path, name: str, n: int) -> np.ndarray:
+        """Les n premières valeurs d'une colonne (memmap), complétées si la colonne est plus courte."""
+        dtype = HISTORY_COLUMNS[name]
+        path  = self._file(zdir, name)
+        have  = min(n, path.stat().st_size // dtype.itemsize) if path.exists() else 0
+        col   = np.memmap(path, dtype=dtype, mode="r", shape=(have,)) if have else np.empty(0, dtype)
+        if have == n:
+            return col
+        return np.concatenate([col, np.full(n - have, HISTORY_FILL.get(name, np.nan), dtype=dtype)])
+
+    def _append_columns(self, zdir: Path, columns: dict[str, np.ndarray]) -> None:
+        """Ajoute des lignes à une zone-mois : colonnes alignées sur t, t.i8 en dernier."""
+        zdir.mkdir(parents=True, exist_ok=True)
+        n = self._rows(zdir)
+        for name in HISTORY_FIELDS:
+            dtype = HISTORY_COLUMNS[name]
+            path  = self._file(zdir, name)
+            size  = path.stat().st_size if path.exists() else 0
+            with open(path, "ab") as f:
+                if size > n * dtype.itemsize:
+                    f.truncate(n * dtype.itemsize)   # reste d'une écriture interrompue
+                elif size < n * dtype.itemsize:
+                    f.write(np.full(n - size // dtype.itemsize, HISTORY_FILL.get(name, np.nan), dtype).tobytes())
+                f.write(np.asarray(columns[name], dtype=dtype).tobytes())
+        with open(self._file(zdir, "t"), "ab") as f:
+            f.write(np.asarray(columns["t"], dtype=HISTORY_COLUMNS["t"]).tobytes())
+
+    def append(
+        self,
+        when: datetime,
+        zones: list[str],
+        wave, temp, current, score, safety,
+        wind=None
+    ) -> int:
+        """Ajoute une ligne par zone à l'instant `when` ; retourne le nombre de lignes."""
+        t = int(when.replace(tzinfo=timezone.utc).timestamp())
+        return self.append_series(
+            zones, [t],
+            **{name: np.asarray(v, dtype=float).reshape(len(zones), 1) for name, v in (
+                ("wave", wave), ("temp", temp), ("current", current), ("score", score), ("safety", safety),
+                ("wind", np.full(len(zones), np.nan) if wind is None else wind),
+            )},
+        )
+
+    def append_series(
+        self,
+        zones: list[str],
+        t,
+        wave, temp, current, score, safety,
+        wind=None,
+        skip_existing: bool = False
+    ) -> int:
+        """
+        Ajoute des séries N zones × T instants (t : epoch s) en une écriture
+        par colonne, zone et mois — chemin des remplissages en masse (simulation,
+        rattrapage historique). Retourne le nombre de lignes écrites.
+        wind : absent pour le rattrapage Copernicus (NaN).
+        skip_existing : ignore les instants déjà présents pour la zone (reprise
+        idempotente d'un rattrapage interrompu) — seule la colonne t est lue.
+        """
+        t      = np.asarray(t, dtype=np.int64)
+        shape  = (len(zones), t.size)
+        values = {
+            "wave": wave, "temp": temp, "current": current, "score": score, "safety": safety,
+            "wind": np.nan if wind is None else wind,
+        }
+        values = {name: np.broadcast_to(np.asarray(v, dtype=HISTORY_COLUMNS[name]), shape)
+                  for name, v in values.items()}
+
+        months = np.array([datetime.utcfromtimestamp(int(v)).strftime("%Y-%m") for v in t])
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._write_schema()
+        written = 0
+        for month in np.unique(months):
+            cols = np.flatnonzero(months == month)
+            for i, zone in enumerate(zones):
+                zdir = self._dir(month, zone)
+                keep = cols
+                if skip_existing:
+                    n = self._rows(zdir)
+                    if n:
+                        keep = cols[~np.isin(t[cols], np.asarray(self._column(zdir, "t", n)))]
+                if not keep.size:
+                    continue
+                self._append_columns(zdir, {"t": t[keep], **{name: v[i, keep] for name, v in values.items()}})
+                written += keep.size
+        return written
+
+    @METRICS.timed("history.append_results")
+    def append_results(self, results: list[dict], when: datetime) -> int:
+        """Ajoute les indices d'une exécution (sortie de fetch_zone_data)."""
+        codes = {c: i for i, c in enumerate(SAFETY_CODES)}
+        return self.append(
+            when,
+            [r["zone"] for r in results],
+            wave    = [r["indices"]["wave"] for r in results],
+            temp    = [r["indices"]["temp"] for r in results],
+            current = [r["indices"]["current"] for r in results],
+            score   = [r["indices"]["peche_score"] for r in results],
+            safety  = [codes[r["indices"]["securite_code"]] for r in results],
+            wind    = [r["openweather"].get("wind_speed", np.nan) for r in results],
+        )
+
+    def _write_schema(self) -> None:
+        schema = self.root / "schema.json"
+        if schema.exists():
+            return
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = schema.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({
+                "version": HISTORY_SCHEMA_VERSION,
+                "layout":  "<AAAA-MM>/<ZONE>/<champ>.<type>",
+                "columns": {name: dtype.str for name, dtype in HISTORY_COLUMNS.items()},
+                "safety_codes": SAFETY_CODES.tolist(),
+            }, f, indent=2)
+        os.replace(tmp, schema)
+
+    def _migrate_v1(self) -> None:
+        """Convertit les fichiers v1 <AAAA-MM>/<ZONE>.bin (lignes entrelacées) en colonnes."""
+        legacy = sorted(self.root.glob("*/*.bin")) if self.root.exists() else []
+        if not legacy:
+            return
+        for path in legacy:
+            rows = np.fromfile(path, dtype=_HISTORY_V1_DTYPE,
+                               count=path.stat().st_size // _HISTORY_V1_DTYPE.itemsize)
+            zdir = path.parent / path.stem
+            if self._rows(zdir) == 0:
+                self._append_columns(zdir, {
+                    **{name: rows[name] for name in _HISTORY_V1_DTYPE.names},
+                    "wind": np.full(rows.size, np.nan),
+                })
+            path.unlink()
+        (self.root / "schema.json").unlink(missing_ok=True)
+        self._write_schema()
+        logger.info(f"📁 Historique : {len(legacy)} fichiers v1 convertis au format colonnaire")
+
+    def months(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> list[str]:
+        """Partitions mensuelles existantes recouvrant [start, end]."""
+        if not self.root.exists():
+            return []
+        lo = start.strftime("%Y-%m") if start else ""
+        hi = end.strftime("%Y-%m") if end else "9999-99"
+        return sorted(p.name for p in self.root.iterdir() if p.is_dir() and lo <= p.name <= hi)
+
+    def zones(self) -> list[str]:
+        """Zones présentes dans au moins une partition."""
+        return sorted({p.name for month in self.months() for p in (self.root / month).iterdir() if p.is_dir()})
+
+    def query(
+        self,
+        zone: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        fields: Optional[list[str]] = None
+    ) -> dict:
+        """
+        Historique d'une zone sur [start, end[ (UTC naïf), champs au choix.
+        Seuls t.i8 et les colonnes demandées sont lus.
+        Retourne {"t": int64[], <champ>: ndarray[]} triés par date.
+        """
+        fields = list(fields or HISTORY_FIELDS)
+        t_lo = int(start.replace(tzinfo=timezone.utc).timestamp()) if start else None
+        t_hi = int(end.replace(tzinfo=timezone.utc).timestamp()) if end else None
+
+        chunks = {name: [] for name in ["t"] + fields}
+        for month in self.months(start, end):
+            zdir = self._dir(month, zone)
+            n    = self._rows(zdir)
+            if not n:
+                continue
+            t = np.asarray(self._column(zdir, "t", n))
+            keep = np.ones(t.size, dtype=bool)
+            if t_lo is not None:
+                keep &= t >= t_lo
+            if t_hi is not None:
+                keep &= t < t_hi
+            chunks["t"].append(t[keep])
+            for name in fields:
+                chunks[name].append(np.asarray(self._column(zdir, name, n)[keep]))
+
+        out = {
+            name: np.concatenate(parts) if parts else np.empty(0, dtype=HISTORY_COLUMNS[name])
+            for name, parts in chunks.items()
+        }
+        order = np.argsort(out["t"], kind="stable")  # les backfills peuvent arriver dans le désordre
+        return {name: values[order] for name, values in out.items()}
+
+
+# ============================================================================
+# 12d. STATISTIQUES GLISSANTES INCRÉMENTALES (logs/stats + logs/statistics.json)
+# ============================================================================
+
+STATS_DIR         = Path("logs/stats")
+STATS_STATE_FILE  = STATS_DIR / "_state.json"
+STATS_WINDOW_DAYS = 7
+STATS_TREND_PCT   = 0.05    # écart dernier point / moyenne au-delà duquel on parle de tendance
+# Métrique publiée → champ de l'entrée d'historique
+STATS_METRICS = {"waves": "wave", "temperature": "temp", "wind": "wind", "current": "current"}
+FISH_LEVELS   = ("excellent", "good", "moderate", "poor")
+
+
+def fish_level(score: float) -> str:
+    """Classe de pêche publiée dans logs/stats à partir du score 0–10."""
+    if score >= 7:
+        return "excellent"
+    if score >= 5.5:
+        return "good"
+    if score >= 4:
+        return "moderate"
+    return "poor"
+
+
+def danger_score(wave: float, wind: float) -> int:
+    """Indice de danger 0–100 : houle (60 %, saturée à 3.5 m) + vent (40 %, saturé à 20 m/s)."""
+    return int(round(min(wave / 3.5, 1.0) * 60 + min(wind / 20.0, 1.0) * 40))
+
+
+def stats_entries(t, wave, temp, wind, current, score, safety) -> list[dict]:
+    """
+    Entrées de logs/stats à partir de colonnes d'historique (une ligne par
+    exécution). Les valeurs passent par float32 comme dans HistoryStore, de
+    sorte que la mise à jour en direct et la reconstruction
+    (rebuild_from_history) produisent le même JSON. Un vent inconnu (NaN,
+    rattrapage Copernicus) compte pour 0.
+    """
+    f32    = lambda values: np.asarray(values, dtype=np.float32).astype(float)
+    wind   = np.nan_to_num(f32(wind), nan=0.0)
+    codes  = np.asarray(safety, dtype=int).tolist()
+    stamps = [datetime.utcfromtimestamp(int(x)).isoformat() for x in np.asarray(t).tolist()]
+    return [
+        {
+            "timestamp":    stamp,
+            "date":         stamp[:10],
+            "wave":         round(w, 2),
+            "temp":         round(tp, 1),
+            "wind":         round(wd, 1),
+            "current":      round(c, 2),
+            "safety":       str(SAFETY_CODES[code]),
+            "fish_level":   fish_level(sc),
+            "danger_score": danger_score(w, wd),
+        }
+        for stamp, w, tp, wd, c, sc, code in zip(
+            stamps, f32(wave).tolist(), f32(temp).tolist(), wind.tolist(), f32(current).tolist(),
+            f32(score).tolist(), codes
+        )
+    ]
+
+
+class RollingStats:
+    """
+    Agrégats glissants sur STATS_WINDOW_DAYS jours, mis à jour en O(1) amorti
+    par nouvelle observation au lieu d'être recalculés depuis tout l'historique.
+
+    État par zone (persisté dans logs/stats/_state.json) :
+      - fenêtre des entrées d'historique (publiée telle quelle) ;
+      - sommes en centièmes entiers → moyennes exactes, sans dérive d'arrondi ;
+      - files monotones min/max par métrique (min/max glissants + best/worst day) ;
+      - compteurs sécurité / pêche de la fenêtre.
+    Les agrégats par région sont la somme des états de leurs zones (O(zones)).
+    """
+
+    def __init__(self, path: Path = STATS_STATE_FILE):
+        self.path  = Path(path)
+        self.zones = {}
+        if self.path.exists():
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    self.zones = json.load(f).get("zones", {})
+            except (OSError, ValueError) as e:
+                logger.warning(f"État statistiques illisible ({e}) — reconstruction à partir de zéro.")
+
+    @staticmethod
+    def _new_state(zone: str, info: dict) -> dict:
+        return {
+            "zone":        zone,
+            "description": info.get("desc", ""),
+            "region":      info.get("region", ""),
+            "seq":         0,        # numéro de la prochaine entrée
+            "head":        0,        # numéro de history[0]
+            "history":     [],
+            "sums":        {m: 0 for m in STATS_METRICS},
+            "minq":        {m: [] for m in STATS_METRICS},   # [[seq, centièmes], ...] croissants
+            "maxq":        {m: [] for m in STATS_METRICS},   # [[seq, centièmes], ...] décroissants
+            "safety":      {c: 0 for c in SAFETY_CODES.tolist()},
+            "fish":        {c: 0 for c in FISH_LEVELS},
+        }
+
+    def add(self, zone: str, info: dict, entry: dict) -> None:
+        """Ajoute une observation (format d'entrée de logs/stats) à la fenêtre de la zone."""
+        st = self.zones.get(zone) or self._new_state(zone, info)
+        self.zones[zone] = st
+        seq = st["seq"]
+        st["seq"] += 1
+        st["history"].append(entry)
+        for metric, field in STATS_METRICS.items():
+            v = int(round(entry[field] * 100))
+            st["sums"][metric] += v
+            minq, maxq = st["minq"][metric], st["maxq"][metric]
+            while minq and minq[-1][1] >= v:
+                minq.pop()
+            minq.append([seq, v])
+            while maxq and maxq[-1][1] <= v:
+                maxq.pop()
+            maxq.append([seq, v])
+        st["safety"][entry["safety"]] += 1
+        st["fish"][entry["fish_level"]]  += 1
+
+    def evict(self, now: datetime) -> int:
+        """Retire de toutes les fenêtres les entrées plus vieilles que STATS_WINDOW_DAYS."""
+        cutoff  = (now - timedelta(days=STATS_WINDOW_DAYS)).isoformat()
+        removed = 0
+        for st in self.zones.values():
+            hist = st["history"]
+            n = 0
+            while n < len(hist) and hist[n]["timestamp"] < cutoff:
+                old = hist[n]
+                for metric, field in STATS_METRICS.items():
+                    st["sums"][metric] -= int(round(old[field] * 100))
+                    for q in (st["minq"][metric], st["maxq"][metric]):
+                        if q and q[0][0] == st["head"]:
+                            q.pop(0)
+                st["safety"][old["safety"]]   -= 1
+                st["fish"][old["fish_level"]] -= 1
+                st["head"] += 1
+                n += 1
+            if n:
+                del hist[:n]
+                removed += n
+        return removed
+
+    @METRICS.timed("stats.update")
+    def update(self, results: list[dict], when: datetime, history: Optional["HistoryStore"] = None) -> None:
+        """
+        Intègre une exécution (sortie de fetch_zone_data) puis glisse la fenêtre.
+        Sans état persisté (premier passage, état illisible), la fenêtre est
+        d'abord reconstruite depuis HistoryStore, jusqu'à `when` exclu.
+        """
+        if not self.zones:
+            self.rebuild_from_history(when, history)
+        t       = int(when.replace(tzinfo=timezone.utc).timestamp())
+        codes   = {c: i for i, c in enumerate(SAFETY_CODES)}
+        entries = stats_entries(
+            [t] * len(results),
+            [r["indices"]["wave"] for r in results],
+            [r["indices"]["temp"] for r in results],
+            [r["openweather"].get("wind_speed", np.nan) for r in results],
+            [r["indices"]["current"] for r in results],
+            [r["indices"]["peche_score"] for r in results],
+            [codes[r["indices"]["securite_code"]] for r in results],
+        )
+        for r, entry in zip(results, entries):
+            self.add(r["zone"], {"desc": r["desc"], "region": r["region"]}, entry)
+        self.evict(when)
+
+    @METRICS.timed("stats.rebuild")
+    def rebuild_from_history(
+        self,
+        now: datetime,
+        history: Optional["HistoryStore"] = None,
+        zones: Optional[dict[str, dict]] = None
+    ) -> int:
+        """
+        Recalcule tout l'état à partir des STATS_WINDOW_DAYS derniers jours de
+        HistoryStore ([now - fenêtre, now[), en O(lignes de la fenêtre).
+        Retourne le nombre d'entrées intégrées.
+        """
+        history = history or HistoryStore()
+        zones   = zones if zones is not None else ZONES
+        start   = now - timedelta(days=STATS_WINDOW_DAYS)
+        self.zones = {}
+        n = 0
+        for zone, info in zones.items():
+            s = history.query(zone, start, now, ["wave", "temp", "wind", "current", "score", "safety"])
+            for entry in stats_entries(s["t"], s["wave"], s["temp"], s["wind"], s["current"], s["score"], s["safety"]):
+                self.add(zone, info, entry)
+            n += int(s["t"].size)
+        self.evict(now)
+        if n:
+            logger.info(f"📊 Statistiques reconstruites depuis l'historique : {n} entrées, {len(self.zones)} zones")
+        return n
+
+    # --- Rendu des fichiers publiés -----------------------------------------
+
+    @staticmethod
+    def _trend(last: int, total: int, n: int) -> str:
+        avg = total / n
+        if last > avg * (1 + STATS_TREND_PCT):
+            return "hausse"
+        if last < avg * (1 - STATS_TREND_PCT):
+            return "baisse"
+        return "stable"
+
+    def zone_stats(self, zone: str) -> dict:
+        """Contenu de logs/stats/<zone>.json (format historique du frontend)."""
+        st   = self.zones[zone]
+        hist = st["history"]
+        n    = len(hist)
+        statistics = {}
+        for metric, field in STATS_METRICS.items():
+            if not n:
+                statistics[metric] = {"min": None, "max": None, "avg": None, "trend": "stable"}
+                continue
+            statistics[metric] = {
+                "min":   st["minq"][metric][0][1] / 100,
+                "max":   st["maxq"][metric][0][1] / 100,
+                "avg":   round(st["sums"][metric] / 100 / n, 2),
+                "trend": self._trend(int(round(hist[-1][field] * 100)), st["sums"][metric], n),
+            }
+        best = worst = None
+        if n:
+            b = hist[st["minq"]["waves"][0][0] - st["head"]]
+            w = hist[st["maxq"]["waves"][0][0] - st["head"]]
+            best  = {"date": b["date"], "wave": b["wave"], "temp": b["temp"], "safety": b["safety"]}
+            worst = {"date": w["date"], "wave": w["wave"], "safety": w["safety"]}
+        return {
+            "zone":           zone,
+            "description":    st["description"],
+            "region":         st["region"],
+            "period":         f"{STATS_WINDOW_DAYS} jours",
+            "data_points":    n,
+            "history":        hist,
+            "statistics":     statistics,
+            "safety_summary": dict(st["safety"]),
+            "best_day":       best,
+            "worst_day":      worst,
+        }
+
+    def region_stats(self) -> dict:
+        """Agrégats glissants par région (somme des états de zones)."""
+        regions = {}
+        for st in self.zones.values():
+            reg = regions.setdefault(st["region"], {
+                "zones": 0, "n": 0, "sums": {m: 0 for m in STATS_METRICS},
+                "safety": {c: 0 for c in SAFETY_CODES.tolist()},
+                "fish":   {c: 0 for c in FISH_LEVELS},
+            })
+            reg["zones"] += 1
+            reg["n"]     += len(st["history"])
+            for m in STATS_METRICS:
+                reg["sums"][m] += st["sums"][m]
+            for c, k in st["safety"].items():
+                reg["safety"][c] += k
+            for c, k in st["fish"].items():
+                reg["fish"][c] += k
+        return {
+            name: {
+                "zones":            reg["zones"],
+                "data_points":      reg["n"],
+                "averages":         {
+                    m: round(reg["sums"][m] / 100 / reg["n"], 2) if reg["n"] else None
+                    for m in STATS_METRICS
+                },
+                "safety_breakdown": reg["safety"],
+                "fish_breakdown":   reg["fish"],
+            }
+            for name, reg in sorted(regions.items())
+        }
+
+    def summary(self, when: datetime) -> dict:
+        """Contenu de logs/statistics.json : instantané de la dernière exécution + régions."""
+        latest = [(z, st["history"][-1]) for z, st in self.zones.items() if st["history"]]
+        safety = {c: 0 for c in SAFETY_CODES.tolist()}
+        fish   = {c: 0 for c in FISH_LEVELS}
+        for _, e in latest:
+            safety[e["safety"]]   += 1
+            fish[e["fish_level"]] += 1
+
+        def _avg(field: str) -> Optional[float]:
+            return round(sum(e[field] for _, e in latest) / len(latest), 2) if latest else None
+
+        def _ext(field: str, pick) -> dict:
+            if not latest:
+                return {"value": None, "zone": None}
+            z, e = pick(latest, key=lambda ze: ze[1][field])
+            return {"value": e[field], "zone": z}
+
+        return {
+            "timestamp":        when.isoformat(),
+            "total_zones":      len(latest),
+            "safety_breakdown": safety,
+            "fish_breakdown":   fish,
+            "averages": {
+                "wave_height":   _avg("wave"),
+                "temperature":   _avg("temp"),
+                "current_speed": _avg("current"),
+                "danger_score":  _avg("danger_score"),
+            },
+            "extremes": {
+                "max_wave":    _ext("wave", max),
+                "min_temp":    _ext("temp", min),
+                "max_current": _ext("current", max),
+            },
+            "regions": self.region_stats(),
+        }
+
+    @METRICS.timed("stats.save")
+    def save(self, when: datetime) -> int:
+        """Régénère logs/stats/*.json et logs/statistics.json, puis persiste l'état."""
+        STATS_DIR.mkdir(parents=True, exist_ok=True)
+        all_zones = {}
+        for zone in self.zones:
+            data = self.zone_stats(zone)
+            all_zones[zone] = data
+            fname = zone.lower().replace("-", "_").replace(" ", "_") + ".json"
+            with open(STATS_DIR / fname, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+        with open(STATS_DIR / "all_zones.json", "w", encoding="utf-8") as f:
+            json.dump(all_zones, f, ensure_ascii=False, indent=2)
+        with open(STATS_DIR.parent / "statistics.json", "w", encoding="utf-8") as f:
+            json.dump(self.summary(when), f, ensure_ascii=False, indent=2)
+
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": 1, "window_days": STATS_WINDOW_DAYS, "zones": self.zones}, f)
+        os.replace(tmp, self.path)
+        return len(all_zones)
+
+
+# ============================================================================
+# 12e. RASTER SCORE DE PÊCHE (toutes les cellules océan de la grille côtière)
+# ============================================================================
+
+RASTER_DIR         = Path("raster")
+RASTER_TILE_CELLS  = 12     # tuiles de 12×12 cellules (~1° à 0.083°)
+RASTER_SCORE_SCALE = 25     # score 0–10 → octet 0–250 (pas de 0.04)
+RASTER_NODATA      = 255    # terre / pas de donnée
+
+
+def _idw(
+    src_lat: np.ndarray,
+    src_lon: np.ndarray,
+    values: np.ndarray,
+    lat: np.ndarray,
+    lon: np.ndarray,
+    power: float = 2.0
+) -> np.ndarray:
+    """Interpolation inverse-distance des valeurs de zones (Z,) sur des points (N,)."""
+    d2 = (lat[:, None] - src_lat[None, :]) ** 2 + (lon[:, None] - src_lon[None, :]) ** 2   # (N, Z)
+    w  = 1.0 / np.maximum(d2, 1e-12) ** (power / 2)
+    return (w @ values) / w.sum(axis=1)
+
+
+def _sample_nearest(grid: CoastalGrid, var: str, lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    """Valeur de la cellule la plus proche de grid pour chaque point (N,)."""
+    iy = np.clip(np.searchsorted(grid.lat, lat), 1, grid.lat.size - 1)
+    iy -= (lat - grid.lat[iy - 1]) < (grid.lat[iy] - lat)
+    ix = np.clip(np.searchsorted(grid.lon, lon), 1, grid.lon.size - 1)
+    ix -= (lon - grid.lon[ix - 1]) < (grid.lon[ix] - lon)
+    return grid.fields[var][iy, ix]
+
+
+@METRICS.timed()
+def build_score_raster(grids: dict, results: list[dict]) -> Optional[dict]:
+    """
+    Applique le calcul de calculate_indices à chaque cellule océan de la grille
+    Copernicus côtière (courant et SST du modèle, houle interpolée depuis les zones).
+    Retourne les couches quantifiées uint8 (Y, X) ou None sans grille de courants.
+    """
+    cur = grids.get("cur")
+    if cur is None or not results:
+        return None
+
+    speed = np.hypot(cur.fields["uo"], cur.fields["vo"])
+    ocean = ~np.isnan(speed)
+    lat2d, lon2d = np.meshgrid(cur.lat, cur.lon, indexing="ij")
+    lat, lon = lat2d[ocean], lon2d[ocean]
+
+    z_lat  = np.array([r["lat"] for r in results], dtype=float)
+    z_lon  = np.array([r["lon"] for r in results], dtype=float)
+    z_wave = np.array([r["indices"]["wave"] for r in results], dtype=float)
+    z_temp = np.array([r["indices"]["temp"] for r in results], dtype=float)
+
+    # Houle : pas de grille amont → interpolation depuis les zones (estimation OpenWeather)
+    wave = _idw(z_lat, z_lon, z_wave, lat, lon)
+    # SST : grille Copernicus, complétée par interpolation des zones si absente
+    temp = np.full(lat.size, np.nan)
+    if grids.get("sst") is not None:
+        temp = _sample_nearest(grids["sst"], "thetao", lat, lon)
+    missing = np.isnan(temp)
+    if missing.any():
+        temp[missing] = _idw(z_lat, z_lon, z_temp, lat[missing], lon[missing])
+
+    levels = safety_level_batch(wave)
+    scores = fishing_score_batch(wave, temp, speed[ocean])
+
+    q_score = np.full(speed.shape, RASTER_NODATA, dtype=np.uint8)
+    q_level = np.full(speed.shape, RASTER_NODATA, dtype=np.uint8)
+    q_score[ocean] = np.clip(np.rint(scores * RASTER_SCORE_SCALE), 0, 10 * RASTER_SCORE_SCALE)
+    q_level[ocean] = levels
+    return {"lat": cur.lat, "lon": cur.lon, "score": q_score, "safety": q_level}
+
+
+@METRICS.timed()
+def save_score_raster(raster: dict, generated_at: datetime) -> None:
+    """
+    Écrit le raster en tuiles binaires raster/tiles/<ligne>_<col>.bin
+    (score uint8 puis niveau de sécurité uint8, lignes sud → nord) et un
+    en-tête raster/score_meta.json décrivant la grille et l'emprise des tuiles.
+    Le frontend ne télécharge que les tuiles visibles. Les tuiles absentes du
+    nouvel en-tête (grille ou emprise modifiée) sont supprimées après son écriture.
+    """
+    lat, lon = raster["lat"], raster["lon"]
+    dlat = float(np.mean(np.diff(lat))) if lat.size > 1 else 1 / 12
+    dlon = float(np.mean(np.diff(lon))) if lon.size > 1 else 1 / 12
+    tile_dir = RASTER_DIR / "tiles"
+    tile_dir.mkdir(parents=True, exist_ok=True)
+
+    n = RASTER_TILE_CELLS
+    tiles = []
+    for r0 in range(0, lat.size, n):
+        for c0 in range(0, lon.size, n):
+            score = raster["score"][r0:r0 + n, c0:c0 + n]
+            if (score == RASTER_NODATA).all():
+                continue  # tuile entièrement terrestre : non publiée
+            safety  = raster["safety"][r0:r0 + n, c0:c0 + n]
+            tile_id = f"{r0 // n}_{c0 // n}"
+            (tile_dir / f"{tile_id}.bin").write_bytes(score.tobytes() + safety.tobytes())
+            tiles.append({
+                "id":   tile_id,
+                "rows": int(score.shape[0]),
+                "cols": int(score.shape[1]),
+                "bounds": [
+                    round(float(lat[r0]) - dlat / 2, 5), round(float(lon[c0]) - dlon / 2, 5),
+                    round(float(lat[r0 + score.shape[0] - 1]) + dlat / 2, 5),
+                    round(float(lon[c0 + score.shape[1] - 1]) + dlon / 2, 5),
+                ],
+            })
+
+    meta = {
+        "generated_at": generated_at.isoformat() + "Z",
+        "layers":       ["score", "safety"],
+        "score_scale":  RASTER_SCORE_SCALE,
+        "nodata":       RASTER_NODATA,
+        "dlat":         round(dlat, 6),
+        "dlon":         round(dlon, 6),
+        "tile_cells":   n,
+        "tiles":        tiles,
+    }
+    with open(RASTER_DIR / "score_meta.json", "w", encoding="utf-8") as f:
+        json.dump(meta, f, separators=(",", ":"))
+    current = {f"{t['id']}.bin" for t in tiles}
+    for stale in tile_dir.glob("*.bin"):
+        if stale.name not in current:
+            stale.unlink(missing_ok=True)
+    ocean = int(np.count_nonzero(raster["score"] != RASTER_NODATA))
+    logger.info(f"✅ Raster score : {ocean} cellules océan, {len(tiles)} tuiles → {RASTER_DIR}/")
+
 
 # ============================================================================
 # MARÉES HARMONIQUES (Formule SHOM simplifiée — 4 constituants principaux)
@@ -668,52 +3420,120 @@ TIDE_STATIONS = {
 # Fréquences angulaires (rad/heure)
 TIDE_OMEGA = {"M2": 0.5059, "S2": 0.5236, "K1": 0.2625, "O1": 0.2434}
 
+TIDE_CONSTITUENTS = list(TIDE_OMEGA)
+TIDE_STEP_MIN     = 6     # résolution d'échantillonnage (minutes)
+TIDE_DAYS         = int(os.getenv("PECHEUR_TIDE_DAYS", "3"))
+# Origine fixe des phases (UTC). Avant, la phase repartait de minuit chaque jour :
+# les horaires du jour diffèrent donc de ceux publiés par les versions antérieures.
+TIDE_EPOCH        = datetime(2000, 1, 1)
+
+
+def _tide_station_for(zone: str) -> dict:
+    """
+    Station harmonique d'une zone : la sienne si elle existe, sinon la station
+    la plus proche (zones de ZONES), sinon DAKAR-YOFF.
+    """
+    if zone in TIDE_STATIONS:
+        return TIDE_STATIONS[zone]
+    if zone in ZONES:
+        z = ZONES[zone]
+        nearest = min(
+            TIDE_STATIONS,
+            key=lambda s: (ZONES[s]["lat"] - z["lat"]) ** 2 + (ZONES[s]["lon"] - z["lon"]) ** 2
+        )
+        return TIDE_STATIONS[nearest]
+    return TIDE_STATIONS["DAKAR-YOFF"]
+
+
+def tide_heights(zones: list[str], t_hours: np.ndarray) -> np.ndarray:
+    """
+    Hauteurs de marée (m) pour toutes les stations × tous les instants en un seul
+    calcul diffusé : h[s, t] = 0.8 + Σ_c A[s,c]·cos(ω_c·t + φ_s + 0.05·t).
+    t_hours : heures écoulées depuis TIDE_EPOCH (origine fixe, pour que la phase
+    d'un instant ne dépende pas du jour de calcul). Retourne (S, T).
+    """
+    stations = [_tide_station_for(z) for z in zones]
+    amps   = np.array([[st.get(c, 0.1) for c in TIDE_CONSTITUENTS] for st in stations])   # (S, C)
+    phase  = np.array([st["phase_offset"] for st in stations])                            # (S,)
+    omega  = np.array([TIDE_OMEGA[c] for c in TIDE_CONSTITUENTS])                         # (C,)
+    t      = np.asarray(t_hours, dtype=float)
+
+    arg = omega[None, :, None] * t[None, None, :] + (phase[:, None, None] + t[None, None, :] * 0.05)
+    return (amps[:, :, None] * np.cos(arg)).sum(axis=1) + 0.8  # hauteur moyenne de référence
+
+
+@METRICS.timed()
+def compute_tide_tables(zones: list[str], start_utc: datetime, days: int = TIDE_DAYS) -> dict:
+    """
+    Tables de marée sur `days` jours pour plusieurs zones, entièrement vectorisées.
+    PM/BM détectées par changement de signe de la dérivée discrète de la courbe
+    échantillonnée toutes les TIDE_STEP_MIN minutes.
+
+    Returns:
+        zone → {"zone", "events" (4 premiers du jour 1), "courbe_24h" (jour 1),
+                "jours": [{"date", "events", "courbe_24h"}, ...]}
+    """
+    t0       = start_utc.replace(hour=0, minute=0, second=0, microsecond=0)
+    h0       = (t0 - TIDE_EPOCH).total_seconds() / 3600                           # heures depuis l'époque
+    per_day  = 24 * 60 // TIDE_STEP_MIN
+    n        = days * per_day + 1
+    t_hours  = h0 + np.arange(n) * (TIDE_STEP_MIN / 60)
+    heights  = _round_half(tide_heights(zones, t_hours), 3)                       # (S, n)
+
+    # Extrema : la pente passe de + à − (PM) ou de − à + (BM)
+    slope    = np.sign(np.diff(heights, axis=1))                                   # (S, n-1)
+    is_pm    = (slope[:, :-1] > 0) & (slope[:, 1:] < 0)                           # indices 1..n-2
+    is_bm    = (slope[:, :-1] < 0) & (slope[:, 1:] > 0)
+    coefs    = np.clip((45 + (heights - 0.3) / 1.2 * 60).astype(int), 20, 120)
+
+    # Courbes horaires (25 points par jour, heures entières)
+    hourly   = _round_half(tide_heights(zones, h0 + np.arange(days * 24 + 1)), 3) # (S, 24·days+1)
+
+    tables = {}
+    for s, zone in enumerate(zones):
+        jours = [
+            {"date": (t0 + timedelta(days=d)).strftime("%Y-%m-%d"), "events": [],
+             "courbe_24h": hourly[s, d * 24:(d + 1) * 24 + 1].tolist()}
+            for d in range(days)
+        ]
+        for i in np.flatnonzero(is_pm[s] | is_bm[s]) + 1:
+            minutes = int(i) * TIDE_STEP_MIN
+            h       = float(heights[s, i])
+            pm      = bool(is_pm[s, i - 1])
+            jours[min(minutes // 1440, days - 1)]["events"].append({
+                "type":    "PM" if pm else "BM",
+                "heure":   (t0 + timedelta(minutes=minutes)).strftime("%H:%M"),
+                "hauteur": h,
+                "coef":    int(coefs[s, i]) if pm else 0,
+            })
+        tables[zone] = {
+            "events":     jours[0]["events"][:4],
+            "courbe_24h": jours[0]["courbe_24h"],
+            "zone":       zone,
+            "jours":      jours,
+        }
+    return tables
+
+
+def tides_day1(table: dict) -> dict:
+    """Jour 1 d'une table de compute_tide_tables, au format publié dans data.json."""
+    return {"events": table["events"], "courbe_24h": table["courbe_24h"], "zone": table["zone"]}
+
+
+@METRICS.timed()
 def compute_tides(zone: str, date_utc: datetime) -> dict:
     """
     Calcule les horaires et hauteurs de marée via décomposition harmonique.
     Retourne PM/BM avec heures et coefficients pour la zone donnée.
     """
-    station = TIDE_STATIONS.get(zone, TIDE_STATIONS["DAKAR-YOFF"])
-    t0 = date_utc.replace(hour=0, minute=0, second=0, microsecond=0)
-    
-    def height(t_hours: float) -> float:
-        h = 0.0
-        for comp, omega in TIDE_OMEGA.items():
-        	amp = station.get(comp, 0.1)
-        	phase = station["phase_offset"] + t_hours * 0.05
-        	h += amp * np.cos(omega * t_hours + phase)
-        return round(h + 0.8, 3)  # hauteur moyenne de référence
-    
-    # Échantillonner sur 24h (résolution 6 minutes)
-    hours = [i * 0.1 for i in range(241)]
-    heights = [height(h) for h in hours]
-    
-    # Détecter les extrema (PM = local max, BM = local min)
-    events = []
-    for i in range(1, len(heights) - 1):
-        if heights[i] > heights[i-1] and heights[i] > heights[i+1]:
-            t = t0 + __import__("datetime").timedelta(hours=hours[i])
-            coef = int(45 + (heights[i] - 0.3) / 1.2 * 60)
-            events.append({
-                "type": "PM", "heure": t.strftime("%H:%M"),
-                "hauteur": heights[i], "coef": min(120, max(20, coef))
-            })
-        elif heights[i] < heights[i-1] and heights[i] < heights[i+1]:
-            t = t0 + __import__("datetime").timedelta(hours=hours[i])
-            events.append({
-                "type": "BM", "heure": t.strftime("%H:%M"),
-                "hauteur": heights[i], "coef": 0
-            })
-    
-    # Courbe 24h (24 points)
-    courbe = [round(height(h), 3) for h in range(25)]
-    return {"events": events[:4], "courbe_24h": courbe, "zone": zone}
+    return tides_day1(compute_tide_tables([zone], date_utc, days=1)[zone])
 
 
 # ============================================================================
 # EXPORT CSV HISTORIQUE
 # ============================================================================
 
+@METRICS.timed()
 def export_csv(results: list) -> None:
     """Exporte les données zones en CSV dans logs/history/."""
     import csv
@@ -745,7 +3565,8 @@ def export_csv(results: list) -> None:
 # RAPPORT DISCORD WEBHOOK
 # ============================================================================
 
-async def send_discord(message: str) -> bool:
+@METRICS.timed()
+async def send_discord(session: aiohttp.ClientSession, message: str) -> bool:
     """Envoie un embed Discord via webhook (optionnel — DISCORD_WEBHOOK secret)."""
     webhook_url = os.getenv("DISCORD_WEBHOOK")
     if not webhook_url:
@@ -767,24 +3588,238 @@ async def send_discord(message: str) -> bool:
     }
 
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(webhook_url, json=payload,
-                                    timeout=aiohttp.ClientTimeout(total=10)) as r:
-                if r.status in (200, 204):
-                    logger.info("✅ Message Discord envoyé.")
-                    return True
-                else:
-                    logger.warning(f"Discord HTTP {r.status}")
+        async with session.post(webhook_url, json=payload,
+                                timeout=aiohttp.ClientTimeout(total=10)) as r:
+            if r.status in (200, 204):
+                logger.info("✅ Message Discord envoyé.")
+                return True
+            else:
+                logger.warning(f"Discord HTTP {r.status}")
     except Exception as e:
         logger.error(f"Discord erreur : {e}")
     return False
 
 
+# ============================================================================
+# 12f. MOTEUR D'ALERTES SERVEUR (règles abonnés × zones × jours, vectorisé)
+# ============================================================================
+
+SUBSCRIBERS_FILE = Path(os.getenv("PECHEUR_SUBSCRIBERS_FILE", Path(__file__).resolve().parent / "subscribers.json"))
+ALERTS_DIR       = Path("logs/alerts")
+ALERT_CHUNK      = 4096   # règles évaluées par bloc (mémoire bornée : bloc × zones × jours octets)
+
+# Types d'alerte : un bit chacun, par ordre de gravité décroissante
+ALERT_DANGER  = 1
+ALERT_WARNING = 2
+ALERT_WAVE    = 4
+ALERT_WIND    = 8
+ALERT_OPTIMAL = 16
+ALERT_KINDS   = {
+    ALERT_DANGER:  "danger",
+    ALERT_WARNING: "warning",
+    ALERT_WAVE:    "wave",
+    ALERT_WIND:    "wind",
+    ALERT_OPTIMAL: "optimal",
+}
+# Même défauts que les préférences du PWA (alerts.js)
+ALERT_DEFAULTS = {
+    "days":       2,
+    "conditions": {"danger": True, "warning": True, "optimal": False},
+    "thresholds": {"wave": 2.5, "wind": 12.0, "score_min": 7.0},
+}
+
+
+def load_subscribers(path: Path = SUBSCRIBERS_FILE) -> list[dict]:
+    """
+    Charge les abonnés (JSON, même vocabulaire que les préférences d'alerts.js) :
+
+        [{"id": "pecheur-001", "channel": "telegram", "chat_id": "123456",
+          "rules": [{"zones": ["KAYAR"], "days": 3,
+                     "conditions": {"danger": true, "warning": true, "optimal": true},
+                     "thresholds": {"wave": 2.0, "wind": 10.0, "score_min": 7.5}}]}]
+
+    zones vide = toutes ; days = jours de prévision surveillés (0 = conditions
+    actuelles seulement) ; un seuil à null est désactivé. Sans "rules", les
+    clés de règle posées sur l'abonné forment sa règle unique.
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            subscribers = json.load(f)
+    except FileNotFoundError:
+        return []
+    valid = []
+    for sub in subscribers:
+        if not sub.get("id") or not (sub.get("chat_id") or sub.get("webhook")):
+            logger.warning(f"{path.name} — abonné sans id ou destinataire ignoré : {sub!r:.80}")
+            continue
+        valid.append(sub)
+    return valid
+
+
+class AlertEngine:
+    """
+    Évalue toutes les règles de tous les abonnés en une passe vectorisée.
+
+    Les zones forment une matrice zones × jours (colonne 0 = conditions
+    actuelles, colonnes 1..7 = forecast_7j) de houle, vent, score et code
+    sécurité. Les règles sont réduites à leurs jeux de seuils distincts
+    (milliers d'abonnés ≈ quelques dizaines de combinaisons), évalués une fois
+    en masque de bits ; chaque règle n'applique ensuite que son masque de zones
+    et son horizon. Sortie minimale : une notification par abonné, un élément
+    par zone (premier jour déclenché, union des types d'alerte).
+    """
+
+    def __init__(self, subscribers: list[dict], zone_names: list[str]):
+        self.subscribers = subscribers
+        self.zone_names  = list(zone_names)
+        zone_idx         = {name: i for i, name in enumerate(self.zone_names)}
+
+        rules = [
+            (s, {**ALERT_DEFAULTS, **rule})
+            for s, sub in enumerate(subscribers)
+            for rule in (sub.get("rules") or [{k: sub[k] for k in (*ALERT_DEFAULTS, "zones") if k in sub}])
+        ]
+        n = len(rules)
+        self.rule_sub  = np.array([s for s, _ in rules], dtype=np.int64)
+        self.horizon   = np.array([min(int(r["days"]), 7) for _, r in rules], dtype=np.int64)
+        self.zone_mask = np.zeros((n, len(self.zone_names)), dtype=bool)
+        params         = np.empty((n, 6), dtype=float)
+        for i, (_, rule) in enumerate(rules):
+            zones = [z.upper() for z in rule.get("zones") or []]
+            if zones:
+                self.zone_mask[i, [zone_idx[z] for z in zones if z in zone_idx]] = True
+            else:
+                self.zone_mask[i] = True
+            thr  = {**ALERT_DEFAULTS["thresholds"], **(rule.get("thresholds") or {})}
+            cond = {**ALERT_DEFAULTS["conditions"], **(rule.get("conditions") or {})}
+            params[i] = [
+                np.inf if thr["wave"] is None else thr["wave"],
+                np.inf if thr["wind"] is None else thr["wind"],
+                np.inf if thr["score_min"] is None else thr["score_min"],
+                bool(cond["danger"]), bool(cond["warning"]), bool(cond["optimal"]),
+            ]
+        # Jeux de paramètres distincts → index de chaque règle
+        self.params, self.param_of = np.unique(params, axis=0, return_inverse=True)
+        self.param_of = self.param_of.reshape(-1)
+
+    @staticmethod
+    def zone_matrix(results: list[dict]) -> dict[str, np.ndarray]:
+        """Matrices zones × 8 (actuel + 7 jours) ; jours absents = NaN / -1."""
+        n      = len(results)
+        wave   = np.full((n, 8), np.nan)
+        wind   = np.full((n, 8), np.nan)
+        score  = np.full((n, 8), np.nan)
+        safety = np.full((n, 8), -1, dtype=np.int64)
+        codes  = {c: i for i, c in enumerate(SAFETY_CODES)}
+        for i, r in enumerate(results):
+            wave[i, 0]   = r["indices"]["wave"]
+            wind[i, 0]   = r["openweather"].get("wind_speed", np.nan)
+            score[i, 0]  = r["indices"]["peche_score"]
+            safety[i, 0] = codes[r["indices"]["securite_code"]]
+            for d, day in enumerate((r.get("forecast_7j") or [])[:7], start=1):
+                wave[i, d]   = day.get("wave", np.nan)
+                wind[i, d]   = day.get("wind_ms", np.nan)
+                score[i, d]  = day.get("peche_score", np.nan)
+                safety[i, d] = codes.get(day.get("securite_code"), -1)
+        return {"wave": wave, "wind": wind, "score": score, "safety": safety}
+
+    def _param_bits(self, m: dict[str, np.ndarray]) -> np.ndarray:
+        """Bits d'alerte (jeux de paramètres × zones × jours), NaN ne déclenche rien."""
+        p = self.params[:, :, None, None]          # (U, 6, 1, 1)
+        danger  = m["safety"] == SAFETY_CODES.size - 1
+        warning = m["safety"] == SAFETY_CODES.size - 2
+        safe    = m["safety"] == 0
+        with np.errstate(invalid="ignore"):
+            bits = (
+                ((p[:, 3] > 0) & danger) * ALERT_DANGER
+                | ((p[:, 4] > 0) & warning) * ALERT_WARNING
+                | (m["wave"] >= p[:, 0]) * ALERT_WAVE
+                | (m["wind"] >= p[:, 1]) * ALERT_WIND
+                | ((p[:, 5] > 0) & safe & (m["score"] >= p[:, 2])) * ALERT_OPTIMAL
+            )
+        return bits.astype(np.uint8)
+
+    def evaluate(self, results: list[dict]) -> list[dict]:
+        """Notifications à envoyer pour cet état des zones (une par abonné concerné)."""
+        if not self.subscribers or not results:
+            return []
+        order = [self.zone_names.index(r["zone"]) for r in results]
+        m     = self.zone_matrix(results)
+        bits  = self._param_bits(m)                # (U, Z, 8)
+        days  = np.arange(8)
+
+        hits: dict[tuple[int, int], list[int]] = {}   # (abonné, zone) → [bits, premier jour]
+        for lo in range(0, self.rule_sub.size, ALERT_CHUNK):
+            sl   = slice(lo, lo + ALERT_CHUNK)
+            rb   = bits[self.param_of[sl]]                                     # (R, Z, 8)
+            rb  &= (self.zone_mask[sl][:, order, None] * 0xFF).astype(np.uint8)
+            rb  &= ((days[None, :] <= self.horizon[sl, None]) * 0xFF).astype(np.uint8)[:, None, :]
+            kinds = np.bitwise_or.reduce(rb, axis=2)                           # (R, Z)
+            first = np.argmax(rb != 0, axis=2)
+            for r, z in zip(*np.nonzero(kinds)):
+                key = (int(self.rule_sub[lo + r]), int(z))
+                cur = hits.setdefault(key, [0, 8])
+                cur[0] |= int(kinds[r, z])
+                cur[1]  = min(cur[1], int(first[r, z]))
+
+        out: dict[int, dict] = {}
+        for (s, z), (kind_bits, day) in sorted(hits.items()):
+            record = results[z]
+            sub    = self.subscribers[s]
+            note   = out.setdefault(s, {
+                "subscriber": sub["id"],
+                "channel":    sub.get("channel", "telegram"),
+                "target":     sub.get("chat_id") or sub.get("webhook"),
+                "items":      [],
+            })
+            forecast = (record.get("forecast_7j") or [{}] * 7)
+            note["items"].append({
+                "zone":   record["zone"],
+                "kinds":  [name for bit, name in ALERT_KINDS.items() if kind_bits & bit],
+                "day":    "now" if day == 0 else datetime.utcfromtimestamp(
+                              forecast[day - 1].get("dt") or 0).strftime("%Y-%m-%d"),
+                "wave":   float(m["wave"][z, day]),
+                "wind":   None if np.isnan(m["wind"][z, day]) else float(m["wind"][z, day]),
+                "score":  float(m["score"][z, day]),
+                "safety": str(SAFETY_CODES[m["safety"][z, day]]),
+            })
+        for note in out.values():
+            # Plus grave d'abord (bit le plus faible), puis le plus tôt
+            note["items"].sort(key=lambda it: (min(k for k, v in ALERT_KINDS.items() if v in it["kinds"]),
+                                               it["day"] != "now", it["day"]))
+        return list(out.values())
+
+
+@METRICS.timed()
+def evaluate_alerts(results: list[dict], subscribers: Optional[list[dict]] = None) -> list[dict]:
+    """
+    Évalue les règles de SUBSCRIBERS_FILE sur les résultats d'une exécution
+    et écrit logs/alerts/latest.json (notifications à envoyer).
+    """
+    subscribers = load_subscribers() if subscribers is None else subscribers
+    if not subscribers:
+        return []
+    notes = AlertEngine(subscribers, [r["zone"] for r in results]).evaluate(results)
+    ALERTS_DIR.mkdir(parents=True, exist_ok=True)
+    with open(ALERTS_DIR / "latest.json", "w", encoding="utf-8") as f:
+        json.dump({"generated_at": datetime.utcnow().isoformat() + "Z", "notifications": notes},
+                  f, ensure_ascii=False, indent=2)
+    return notes
+
+
 # ============================================================================
 # 13. RAPPORT TELEGRAM
 # ============================================================================
 
-async def send_telegram(message: str) -> bool:
+TELEGRAM_API_URL = "https://api.telegram.org"
+
+
+@METRICS.timed()
+async def send_telegram(
+    session: aiohttp.ClientSession,
+    message: str,
+    limiter: Optional[TokenBucket] = None
+) -> bool:
     """Envoie un message Telegram avec gestion d'erreur."""
     token   = SECRETS.get("TELEGRAM_TOKEN")
     chat_id = SECRETS.get("TELEGRAM_CHAT_ID")
@@ -793,16 +3828,15 @@ async def send_telegram(message: str) -> bool:
         logger.warning("Telegram non configuré — message ignoré.")
         return False
 
-    url     = f"https://api.telegram.org/bot{token}/sendMessage"
+    url     = f"{TELEGRAM_API_URL}/bot{token}/sendMessage"
     payload = {"chat_id": chat_id, "text": message, "parse_mode": "HTML"}
 
-    async with aiohttp.ClientSession() as session:
-        result = await fetch_with_retry(session, url, params=payload)
-        if result:
-            logger.info("✅ Message Telegram envoyé avec succès.")
-            return True
-        logger.error("❌ Échec de l'envoi Telegram.")
-        return False
+    result = await fetch_with_retry(session, url, params=payload, limiter=limiter)
+    if result:
+        logger.info("✅ Message Telegram envoyé avec succès.")
+        return True
+    logger.error("❌ Échec de l'envoi Telegram.")
+    return False
 
 
 def build_telegram_report(results: list[dict], stats: dict) -> str:
@@ -837,61 +3871,335 @@ def build_telegram_report(results: list[dict], stats: dict) -> str:
 
 
 # ============================================================================
-# 14. POINT D'ENTRÉE PRINCIPAL
+# 13b. FILE D'ENVOI DES ALERTES (regroupement, dédoublonnage, débits, reprise)
 # ============================================================================
 
-async def main():
-    logger.info(f"=== PecheurConnect démarré — {datetime.utcnow().isoformat()} UTC ===")
-    logger.info(f"{len(ZONES)} zones chargées.")
+DISPATCH_QUEUE_FILE   = ALERTS_DIR / "queue.json"   # alertes en attente (réécrit atomiquement)
+DISPATCH_SENT_FILE    = ALERTS_DIR / "sent.log"     # journal append-only des clés envoyées
+DISPATCH_DEDUP_TTL_S  = 8 * 86400                   # horizon des prévisions + marge
+DISPATCH_MAX_ATTEMPTS = 5
+TELEGRAM_MAX_CHARS    = 4000                        # limite API : 4096 caractères
+# (messages/s, rafale) — limites publiées par Telegram / Discord
+DISPATCH_RATES = {
+    "telegram":       (30.0, 30),      # global par bot
+    "telegram_chat":  (1.0, 1),        # par conversation privée
+    "telegram_group": (20 / 60, 20),   # par groupe (chat_id négatif)
+    "discord":        (2.5, 5),        # par webhook
+}
+ALERT_ICONS = {"danger": "🔴", "warning": "🟠", "wave": "🌊", "wind": "💨", "optimal": "🎣"}
 
-    results = []
 
-    async with aiohttp.ClientSession() as session:
-        # Traitement de toutes les zones en parallèle (batch de 6 pour éviter le rate-limit)
-        zone_items = list(ZONES.items())
-        batch_size = 6
+def format_alert_message(entries: list[dict]) -> list[tuple[str, list[dict]]]:
+    """
+    Message(s) HTML regroupant toutes les alertes d'un destinataire :
+    une ligne par (zone, jour), découpé sous la limite de taille Telegram.
+    Retourne (texte, alertes couvertes) par message, pour acquitter chaque
+    partie dès son envoi.
+    """
+    lines: dict[tuple[str, str], dict] = {}
+    for e in entries:
+        line = lines.setdefault((e["zone"], e["day"]), {**e, "kinds": [], "entries": []})
+        line["kinds"].append(e["kind"])
+        line["entries"].append(e)
+
+    order  = list(ALERT_KINDS.values())
+    header = "<b>🔔 PecheurConnect — alertes</b>"
+    body   = []
+    for (zone, day), e in sorted(lines.items(), key=lambda kv: (min(order.index(k) for k in kv[1]["kinds"]), kv[0][1])):
+        kinds = sorted(set(e["kinds"]), key=order.index)
+        wind  = f", vent {e['wind']} m/s" if e.get("wind") is not None else ""
+        body.append((
+            f"{ALERT_ICONS[kinds[0]]} <b>{zone}</b> — {day} : {' + '.join(kinds)} "
+            f"(houle {e['wave']} m{wind}, score {e['score']}/10)",
+            e["entries"],
+        ))
+
+    messages, current, covered = [], header, []
+    for line, line_entries in body:
+        if len(current) + len(line) + 1 > TELEGRAM_MAX_CHARS:
+            messages.append((current, covered))
+            current, covered = header, []
+        current += "\n" + line
+        covered  = covered + line_entries
+    messages.append((current, covered))
+    return messages
+
+
+class NotificationQueue:
+    """
+    File d'envoi des alertes abonnés.
+
+    - dédoublonnage : une alerte est identifiée par abonné|zone|jour|type ; une
+      clé déjà envoyée (journal sent.log) ou déjà en attente n'est pas remise en file ;
+    - persistance : la file est réécrite atomiquement à chaque mise en file et
+      les clés de chaque message sont ajoutées au journal dès son acceptation —
+      après un arrêt brutal rien n'est perdu ; seul un arrêt entre la réponse
+      HTTP 200 et le fsync du journal renvoie ce message (au moins une fois) ;
+    - regroupement : toutes les alertes d'un destinataire partent dans un seul
+      message (découpé si trop long) ;
+    - débits : token bucket global par canal + un bucket par conversation,
+      envois via la session partagée et fetch_with_retry (429 / Retry-After).
+    """
+
+    def __init__(self, queue_file: Path = DISPATCH_QUEUE_FILE, sent_file: Path = DISPATCH_SENT_FILE):
+        self.queue_file = Path(queue_file)
+        self.sent_file  = Path(sent_file)
+        self.pending: dict[str, dict] = {}
+        self.sent:    dict[str, float] = {}
+        self._buckets: dict[str, TokenBucket] = {}
+        self._load()
+
+    # ── Persistance ─────────────────────────────────────────────────────────
+
+    def _load(self) -> None:
+        horizon = time.time() - DISPATCH_DEDUP_TTL_S
+        if self.sent_file.exists():
+            with open(self.sent_file, encoding="utf-8") as f:
+                for line in f:
+                    ts, _, key = line.rstrip("\n").partition("\t")
+                    try:
+                        if key and float(ts) >= horizon:
+                            self.sent[key] = float(ts)
+                    except ValueError:
+                        continue  # ligne tronquée par un arrêt brutal
+            self._compact_sent()
+        if self.queue_file.exists():
+            try:
+                with open(self.queue_file, encoding="utf-8") as f:
+                    queued = json.load(f).get("pending", [])
+            except ValueError as e:
+                logger.warning(f"File d'alertes illisible ({e}) — réinitialisée")
+                queued = []
+            self.pending = {e["key"]: e for e in queued if e["key"] not in self.sent}
+
+    def _compact_sent(self) -> None:
+        tmp = self.sent_file.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.writelines(f"{ts:.0f}\t{key}\n" for key, ts in self.sent.items())
+        os.replace(tmp, self.sent_file)
+
+    def _save(self) -> None:
+        self.queue_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.queue_file.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"pending": list(self.pending.values())}, f, ensure_ascii=False)
+        os.replace(tmp, self.queue_file)
+
+    def _mark_sent(self, keys: list[str]) -> None:
+        now = time.time()
+        self.sent_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.sent_file, "a", encoding="utf-8") as f:
+            f.writelines(f"{now:.0f}\t{key}\n" for key in keys)
+            f.flush()
+            os.fsync(f.fileno())
+        for key in keys:
+            self.sent[key] = now
+            self.pending.pop(key, None)
+
+    # ── Mise en file ────────────────────────────────────────────────────────
+
+    def enqueue(self, notes: list[dict]) -> int:
+        """Met en file les notifications d'evaluate_alerts ; retourne le nombre d'alertes nouvelles."""
+        today = datetime.utcnow().strftime("%Y-%m-%d")
+        added = 0
+        for note in notes:
+            for item in note["items"]:
+                day = today if item["day"] == "now" else item["day"]
+                for kind in item["kinds"]:
+                    key = f"{note['subscriber']}|{item['zone']}|{day}|{kind}"
+                    if key in self.sent or key in self.pending:
+                        continue
+                    self.pending[key] = {
+                        "key":        key,
+                        "subscriber": note["subscriber"],
+                        "channel":    note["channel"],
+                        "target":     note["target"],
+                        "zone":       item["zone"],
+                        "day":        "maintenant" if item["day"] == "now" else item["day"],
+                        "kind":       kind,
+                        "wave":       item["wave"],
+                        "wind":       item["wind"],
+                        "score":      item["score"],
+                        "attempts":   0,
+                    }
+                    added += 1
+        if added:
+            self._save()
+        return added
+
+    # ── Envoi ───────────────────────────────────────────────────────────────
+
+    def _bucket(self, name: str, kind: str) -> TokenBucket:
+        if name not in self._buckets:
+            rate, burst = DISPATCH_RATES[kind]
+            # Nom d'amont commun : les métriques restent agrégées par canal
+            self._buckets[name] = TokenBucket(kind.split("_")[0], rate, burst)
+        return self._buckets[name]
+
+    async def _send(self, session: aiohttp.ClientSession, channel: str, target: str, text: str) -> bool:
+        if channel == "telegram":
+            token = SECRETS.get("TELEGRAM_TOKEN")
+            if not token:
+                return False
+            kind = "telegram_group" if str(target).startswith("-") else "telegram_chat"
+            await self._bucket("telegram", "telegram").acquire()
+            result = await fetch_with_retry(
+                session, f"{TELEGRAM_API_URL}/bot{token}/sendMessage",
+                json_body={"chat_id": target, "text": text, "parse_mode": "HTML"},
+                limiter=self._bucket(f"telegram:{target}", kind),
+            )
+        elif channel == "discord":
+            result = await fetch_with_retry(
+                session, target, params={"wait": "true"},
+                json_body={"content": text.replace("<b>", "**").replace("</b>", "**")[:2000]},
+                limiter=self._bucket(f"discord:{target}", "discord"), shared_credentials=False,
+            )
+        else:
+            logger.warning(f"Canal d'alerte inconnu : {channel!r}")
+            return False
+        return result is not None
+
+    async def _deliver(self, session, channel: str, target: str, entries: list[dict]) -> int:
+        """Envoie les alertes d'un destinataire ; retourne le nombre de messages envoyés."""
+        sent = 0
+        for text, covered in format_alert_message(entries):
+            if not await self._send(session, channel, target, text):
+                for e in entries:
+                    if e["key"] not in self.sent:
+                        e["attempts"] += 1
+                return sent
+            self._mark_sent([e["key"] for e in covered])  # parties déjà parties : jamais renvoyées
+            sent += 1
+        return sent
+
+    @METRICS.timed("alerts.dispatch")
+    async def dispatch(self, session: aiohttp.ClientSession) -> dict:
+        """Vide la file : un message regroupé par destinataire, débits respectés."""
+        if not self.pending:
+            return {"recipients": 0, "messages": 0, "alerts": 0, "pending": 0}
+        held = set()
+        if not SECRETS.get("TELEGRAM_TOKEN"):
+            held.add("telegram")
+            if any(e["channel"] == "telegram" for e in self.pending.values()):
+                logger.warning("Telegram non configuré — alertes Telegram conservées en file.")
+        for channel in ("telegram", "discord"):
+            if circuit_breaker(channel).is_open:
+                held.add(channel)  # amont en panne : pas de tentative consommée
+
+        groups: dict[tuple[str, str], list[dict]] = {}
+        for e in self.pending.values():
+            if e["channel"] not in held:
+                groups.setdefault((e["channel"], str(e["target"])), []).append(e)
+        n_alerts = sum(len(entries) for entries in groups.values())
+        counts   = await asyncio.gather(*[
+            self._deliver(session, channel, target, entries) for (channel, target), entries in groups.items()
+        ])
+
+        dropped = [k for k, e in self.pending.items() if e["attempts"] >= DISPATCH_MAX_ATTEMPTS]
+        for key in dropped:
+            logger.warning(f"Alerte abandonnée après {DISPATCH_MAX_ATTEMPTS} tentatives : {key}")
+            self.pending.pop(key)
+        self._save()
+        return {
+            "recipients": sum(1 for c in counts if c),
+            "messages":   sum(counts),
+            "alerts":     n_alerts - sum(1 for e in self.pending.values() if e["channel"] not in held) - len(dropped),
+            "pending":    len(self.pending),
+            "dropped":    len(dropped),
+        }
 
-        for i in range(0, len(zone_items), batch_size):
-            batch = zone_items[i:i + batch_size]
-            logger.info(f"Traitement batch {i // batch_size + 1} — zones : {[z[0] for z in batch]}")
 
-            batch_results = await asyncio.gather(*[
-                fetch_zone_data(session, name, info)
-                for name, info in batch
-            ])
-            results.extend(batch_results)
+async def dispatch_alerts(
+    session: aiohttp.ClientSession,
+    notes: list[dict],
+    queue: Optional[NotificationQueue] = None
+) -> dict:
+    """Met en file les notifications d'une exécution puis vide la file (reprend aussi les restes)."""
+    queue = queue or NotificationQueue()
+    added = queue.enqueue(notes)
+    if not queue.pending:
+        return {}
+    stats = await queue.dispatch(session)
+    logger.info(
+        f"🔔 Alertes : {added} nouvelles, {stats['alerts']} envoyées en {stats['messages']} messages "
+        f"à {stats['recipients']} destinataires — {stats['pending']} en attente"
+    )
+    return stats
 
-            # Pause entre les batches pour respecter les rate-limits API
-            if i + batch_size < len(zone_items):
-                await asyncio.sleep(1.0)
 
-    # Log résumé
-    for r in results:
-        logger.info(
-            f"[{r['zone']:25s}] {r['indices']['securite_texte']:30s} | "
-            f"Score : {r['indices']['peche_score']:4.1f}/10 | "
-            f"Source : {r['copernicus']['source']}"
-        )
+# ============================================================================
+# 14. POINT D'ENTRÉE PRINCIPAL
+# ============================================================================
 
-    # ── Calcul marées pour les zones-clés ──
-    logger.info("Calcul marées harmoniques...")
-    now_utc = datetime.utcnow()
-    tides_data = {}
-    for zone_name in ["DAKAR-YOFF", "KAYAR", "MBOUR-JOAL", "SAINT-LOUIS",
-                       "CAP-SKIRRING", "CASAMANCE-ZIGUINCHOR"]:
-        tides_data[zone_name] = compute_tides(zone_name, now_utc)
-        logger.info(f"  Marées {zone_name}: {len(tides_data[zone_name]['events'])} événements")
+def publish_outputs(
+    results: list[dict],
+    tides_data: dict,
+    cop_grids: dict,
+    observed: Optional[list[dict]] = None
+) -> list[dict]:
+    """
+    Publie toutes les sorties d'un état des zones : data.json (+ publication
+    compacte et deltas), historique colonnaire, statistiques glissantes,
+    raster de score, export CSV et alertes abonnés.
+    observed : zones réellement réobservées (historique/statistiques) ;
+    toutes les zones par défaut.
+    Retourne les notifications d'alerte à envoyer (dispatch_alerts).
+    """
+    observed = results if observed is None else observed
 
     # ── Injecter marées dans data.json ──
     save_data_json(results, tides_data=tides_data)
 
+    if observed:
+        # ── Historique colonnaire : une ligne par zone ──
+        now     = datetime.utcnow()
+        history = HistoryStore()
+        try:
+            n_rows = history.append_results(observed, now)
+            logger.info(f"📁 Historique : {n_rows} lignes ajoutées à {HISTORY_STORE_DIR}/")
+        except OSError as e:
+            logger.warning(f"Historique ignoré : {e}")
+
+        # ── Statistiques glissantes 7 jours (mise à jour incrémentale) ──
+        try:
+            rolling = RollingStats()
+            rolling.update(observed, now, history)
+            n_files = rolling.save(now)
+            logger.info(f"📊 Statistiques : {n_files} zones mises à jour dans {STATS_DIR}/")
+        except OSError as e:
+            logger.warning(f"Statistiques ignorées : {e}")
+
+    # ── Raster score de pêche sur toute la grille côtière ──
+    raster = build_score_raster(cop_grids, results)
+    if raster is not None:
+        save_score_raster(raster, datetime.utcnow())
+    else:
+        logger.info("Raster score ignoré : grille Copernicus indisponible.")
+
     # ── Export CSV historique ──
     try:
         export_csv(results)
     except Exception as e:
         logger.warning(f"Export CSV ignoré : {e}")
 
-    # Calcul stats pour rapports
+    # ── Alertes abonnés (règles évaluées côté serveur) ──
+    try:
+        notes = evaluate_alerts(results)
+        if notes:
+            n_items = sum(len(n["items"]) for n in notes)
+            logger.info(f"🔔 Alertes : {len(notes)} abonnés à prévenir ({n_items} zones) → {ALERTS_DIR}/latest.json")
+        return notes
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning(f"Alertes ignorées : {e}")
+        return []
+
+
+async def send_reports(
+    session: aiohttp.ClientSession,
+    scheduler: RateLimitedScheduler,
+    results: list[dict]
+) -> None:
+    """Construit le rapport de synthèse et l'envoie sur Telegram + Discord en parallèle."""
     scores = [r["indices"]["peche_score"] for r in results]
     stats  = {
         "score_moyen":  round(float(np.mean(scores)), 2),
@@ -903,17 +4211,665 @@ async def main():
             "safe":    sum(1 for r in results if r["indices"]["securite_code"] == "safe"),
         }
     }
-
-    # ── Envoi rapports (Telegram + Discord en parallèle) ──
     message = build_telegram_report(results, stats)
     tg_ok, dc_ok = await asyncio.gather(
-        send_telegram(message),
-        send_discord(message)
+        send_telegram(session, message, scheduler.bucket("telegram")),
+        send_discord(session, message)
     )
     logger.info(f"Telegram: {'✅' if tg_ok else '⚠️'} | Discord: {'✅' if dc_ok else '—'}")
 
+
+def configure() -> None:
+    """
+    Résout la configuration d'exécution : logging (crée logs/), secrets et
+    registre des zones. Le .env est chargé dès l'import, avant les constantes.
+    Appelé au démarrage de main() et du démon — jamais à l'import, pour
+    qu'importer le module reste instantané et sans effet.
+    """
+    setup_logging()
+    SECRETS.clear()
+    SECRETS.update(load_secrets())
+    if not ZONES:
+        ZONES.update(load_zones())
+    METRICS.reset()
+
+
+async def main():
+    configure()
+    logger.info(f"=== PecheurConnect démarré — {datetime.utcnow().isoformat()} UTC ===")
+    logger.info(f"{len(ZONES)} zones chargées.")
+
+    # Contexte I/O unique : pool de threads + connexions keep-alive pour tout le run
+    async with IOContext() as io:
+        session = io.session
+
+        # ── Copernicus : un seul sous-ensemble côtier par dataset pour toutes les zones ──
+        cop_grids   = {}
+        cop_by_zone = await fetch_copernicus_batch(ZONES, io, cop_grids)
+
+        # Traitement de toutes les zones en flux continu : concurrence bornée,
+        # débit OpenWeather cadencé par token bucket (pas de lots fixes)
+        scheduler = RateLimitedScheduler()
+        ow_bucket = scheduler.bucket("openweather")
+        logger.info(
+            f"Ordonnanceur : {scheduler.concurrency} zones simultanées, "
+            f"OpenWeather ≤ {ow_bucket.base_rate} req/s"
+        )
+        # Un appel One Call par cellule de grille, distribué à tous les sites de la cellule
+        cells = build_cell_index(ZONES)
+        logger.info(f"Index spatial : {len(ZONES)} zones → {len(cells)} cellules de grille")
+        with METRICS.span("stage.openweather"):
+            onecalls = await scheduler.run(
+                [(cell,) for cell in cells.values()],
+                lambda cell: fetch_onecall(session, cell["lat"], cell["lon"], ow_bucket)
+            )
+        onecall_by_zone = {
+            name: onecall
+            for cell, onecall in zip(cells.values(), onecalls)
+            for name in cell["zones"]
+        }
+        with METRICS.span("stage.merge"):
+            # Prévisions horaires 48 h notées en un seul lot pour toutes les cellules
+            hourly = hourly_forecast_batch(onecalls, [(cell["lat"], cell["lon"]) for cell in cells.values()])
+            hourly_by_zone = {
+                name: forecast
+                for cell, forecast in zip(cells.values(), hourly)
+                for name in cell["zones"]
+            }
+            # Conditions actuelles et prévisions 7 jours : replis simulés en un seul lot
+            zone_calls  = [onecall_by_zone[name] for name in ZONES]
+            zone_coords = [(info["lat"], info["lon"]) for info in ZONES.values()]
+            currents    = openweather_current_batch(zone_calls, zone_coords)
+            forecasts   = forecast_7days_batch(zone_calls, zone_coords)
+            results = [
+                build_zone_data(
+                    name, info, onecall_by_zone[name], cop_by_zone[name], hourly_by_zone[name],
+                    ow_data=current, forecast_7j=forecast
+                )
+                for (name, info), current, forecast in zip(ZONES.items(), currents, forecasts)
+            ]
+
+        # Zones inchangées depuis la publication précédente : enregistrement repris tel quel
+        results = carry_unchanged_records(results)
+
+        # Log résumé
+        for r in results:
+            logger.info(
+                f"[{r['zone']:25s}] {r['indices']['securite_texte']:30s} | "
+                f"Score : {r['indices']['peche_score']:4.1f}/10 | "
+                f"Source : {r['copernicus']['source']}"
+            )
+
+        # ── Calcul marées : tables sur TIDE_DAYS jours pour toutes les zones ──
+        logger.info(f"Calcul marées harmoniques ({TIDE_DAYS} jours, {len(ZONES)} zones)...")
+        tides_data = compute_tide_tables(list(ZONES), datetime.utcnow(), TIDE_DAYS)
+        n_events   = sum(len(j["events"]) for t in tides_data.values() for j in t["jours"])
+        logger.info(f"  Marées : {n_events} PM/BM calculées")
+
+        # ── data.json, historique, statistiques, raster, CSV, alertes ──
+        notes = publish_outputs(results, tides_data, cop_grids)
+
+        # ── Alertes abonnés : file d'envoi regroupée et cadencée ──
+        await dispatch_alerts(session, notes)
+
+        # ── Envoi rapports (Telegram + Discord en parallèle) ──
+        await send_reports(session, scheduler, results)
+
+        logger.info(f"Pool I/O : {json.dumps(io.stats())}")
+        logger.info(f"Ordonnanceur : {json.dumps(scheduler.stats())}")
+        logger.info(f"Cache disque : {json.dumps(RESPONSE_CACHE.stats())}")
+        logger.info(f"Miroir Copernicus : {json.dumps(COPERNICUS_MIRROR.stats())}")
+        logger.info(f"Disjoncteurs : {json.dumps(breaker_stats())}")
+
+        # ── Métriques machine-lisibles (spans, latences amont, mémoire) ──
+        try:
+            snap = METRICS.write({
+                "zones":     len(ZONES),
+                "cells":     len(cells),
+                "io":        io.stats(),
+                "scheduler": scheduler.stats(),
+                "cache":     RESPONSE_CACHE.stats(),
+                "mirror":    COPERNICUS_MIRROR.stats(),
+                "breakers":  breaker_stats(),
+            })
+            logger.info(f"📈 Métriques : {METRICS_FILE} (RSS de pointe {snap['peak_rss_mb']} Mo)")
+        except OSError as e:
+            logger.warning(f"Métriques ignorées : {e}")
+
     logger.info("=== PecheurConnect v4.2 terminé avec succès ===")
 
 
+# ============================================================================
+# 15. MODE DÉMON (--serve-scheduler) — cadence propre à chaque source
+# ============================================================================
+
+# Vent : horaire · courants : pas modèle 6 h · SST : moyenne journalière
+DAEMON_CADENCES_S = {
+    "openweather":    int(os.getenv("PECHEUR_CADENCE_OW_S",     "3600")),
+    "copernicus_cur": int(os.getenv("PECHEUR_CADENCE_CUR_S",    str(6 * 3600))),
+    "copernicus_sst": int(os.getenv("PECHEUR_CADENCE_SST_S",    str(24 * 3600))),
+    "report":         int(os.getenv("PECHEUR_CADENCE_REPORT_S", str(6 * 3600))),
+}
+DAEMON_MAX_SLEEP_S = 60   # réveil minimal (arrêt propre, changement de jour des marées)
+
+
+def _zone_fingerprint(record: dict) -> str:
+    """Empreinte des entrées d'une zone, horodatages de collecte exclus."""
+    stripped = {k: v for k, v in record.items() if k != "updated_at"}
+    for source in ("openweather", "copernicus"):
+        stripped[source] = {k: v for k, v in record[source].items() if k != "timestamp"}
+    return hashlib.sha256(json.dumps(stripped, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def carry_unchanged_records(results: list[dict], path: str = "data.json") -> list[dict]:
+    """
+    Exécution ponctuelle : une zone dont les entrées n'ont pas changé depuis le
+    data.json précédent garde son enregistrement publié (horodatages compris),
+    comme dans le démon — data/zones/* et le flux de deltas ne bougent pas.
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            previous = json.load(f).get("zones") or {}
+    except (OSError, ValueError, AttributeError):
+        return results
+    kept = []
+    for r in results:
+        old = previous.get(r["zone"])
+        try:
+            same = old is not None and _zone_fingerprint(old) == _zone_fingerprint(r)
+        except (KeyError, TypeError, AttributeError):
+            same = False
+        kept.append(old if same else r)
+    n = sum(a is not b for a, b in zip(kept, results))
+    if n:
+        logger.info(f"♻️  {n}/{len(results)} zones inchangées — enregistrement précédent conservé")
+    return kept
+
+
+class PipelineDaemon:
+    """
+    Processus longue durée : session HTTP, pool de threads et grilles Copernicus
+    restent chauds entre les cycles. Chaque source est rafraîchie à sa propre
+    cadence (DAEMON_CADENCES_S) ; seules les zones dont les entrées ont changé
+    sont reconstruites et réobservées — les autres gardent leur enregistrement,
+    donc leurs fichiers publiés (data/zones/*) ne bougent pas.
+    on_update : appelé avec (records, tides, version) après chaque publication
+    (ex. ZoneQueryAPI.update).
+    """
+
+    def __init__(
+        self,
+        io: IOContext,
+        zones: dict[str, dict] = ZONES,
+        cadences: dict = DAEMON_CADENCES_S,
+        on_update=None
+    ):
+        self.io        = io
+        self.on_update = on_update
+        self.zones     = zones
+        self.cadences  = dict(cadences)
+        self.scheduler = RateLimitedScheduler()
+        self.cells     = build_cell_index(zones)
+        self.grids           = {}
+        self.cop_by_zone     = {}
+        self.onecall_by_zone = {}
+        self.records         = {}
+        self.fingerprints    = {}
+        self.tides      = {}
+        self.tides_date = None
+        self.alerts     = NotificationQueue()   # buckets par conversation conservés entre cycles
+        self.next_due   = {source: 0.0 for source in self.cadences}
+        self.cycles     = 0
+
+    # --- Rafraîchissement des sources -------------------------------------------
+
+    async def refresh_openweather(self) -> None:
+        """Un One Call par cellule ; une cellule en échec garde sa dernière réponse."""
+        bucket   = self.scheduler.bucket("openweather")
+        onecalls = await self.scheduler.run(
+            [(cell,) for cell in self.cells.values()],
+            lambda cell: fetch_onecall(self.io.session, cell["lat"], cell["lon"], bucket)
+        )
+        for cell, onecall in zip(self.cells.values(), onecalls):
+            for name in cell["zones"]:
+                self.onecall_by_zone[name] = onecall or self.onecall_by_zone.get(name)
+
+    async def refresh_copernicus(self, kind: str) -> None:
+        """Recharge une grille ("cur" ou "sst") et recalcule les valeurs par zone."""
+        if not (SECRETS.get("COPERNICUS_USER") and SECRETS.get("COPERNICUS_PASS")
+                and await self.io.run_blocking(load_copernicusmarine) is not None):
+            # Sans identifiants : simulation refaite à chaque tick (valeurs datées du tick)
+            self.cop_by_zone = await fetch_copernicus_batch(self.zones, self.io, self.grids)
+            return
+        ds = COPERNICUS_DATASETS[kind]
+        dt = datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%S")
+        try:
+            self.grids[kind] = await self.io.run_blocking(
+                _load_coastal_grid, ds["id"], ds["variables"], dt, ds["step_s"]
+            )
+        except Exception as e:
+            logger.error(f"Copernicus {kind} : rafraîchissement en échec ({e}) — grille précédente conservée.")
+            if self.grids.get("cur") is not None:
+                return
+        values  = copernicus_zone_values(self.zones, self.grids)
+        self.cop_by_zone.update(values)
+        missing = [name for name in self.zones if name not in self.cop_by_zone]
+        if missing:
+            METRICS.count("copernicus", "fallbacks", len(missing))
+            sims = simulate_marine_batch([(self.zones[n]["lat"], self.zones[n]["lon"]) for n in missing])
+            self.cop_by_zone.update(zip(missing, sims))
+
+    # --- Cycle ---------------------------------------------------------------------
+
+    def rebuild(self) -> list[str]:
+        """Reconstruit les zones ; retourne celles dont l'empreinte a changé."""
+        changed   = []
+        calls     = [self.onecall_by_zone.get(name) for name in self.zones]
+        coords    = [(info["lat"], info["lon"]) for info in self.zones.values()]
+        hourly    = hourly_forecast_batch(calls, coords)
+        currents  = openweather_current_batch(calls, coords)
+        forecasts = forecast_7days_batch(calls, coords)
+        for (name, info), forecast, current, daily in zip(self.zones.items(), hourly, currents, forecasts):
+            record = build_zone_data(
+                name, info, self.onecall_by_zone.get(name), self.cop_by_zone[name], forecast,
+                ow_data=current, forecast_7j=daily
+            )
+            fp     = _zone_fingerprint(record)
+            if fp != self.fingerprints.get(name):
+                self.fingerprints[name] = fp
+                self.records[name]      = record
+                changed.append(name)
+        return changed
+
+    async def cycle(self) -> list[str]:
+        """Rafraîchit les sources échues, republie si nécessaire ; retourne les zones modifiées."""
+        now_m = time.monotonic()
+        due   = [source for source, t in self.next_due.items() if now_m >= t]
+        for source in due:
+            self.next_due[source] = now_m + self.cadences[source]
+        self.cycles += 1
+
+        # Courants d'abord : SST seule ne suffit pas à calculer les valeurs par zone
+        for kind in ("cur", "sst"):
+            if f"copernicus_{kind}" in due:
+                await self.refresh_copernicus(kind)
+        if "openweather" in due:
+            with METRICS.span("stage.openweather"):
+                await self.refresh_openweather()
+
+        today = datetime.utcnow().date()
+        tides_changed = today != self.tides_date
+        if tides_changed:
+            self.tides      = compute_tide_tables(list(self.zones), datetime.utcnow(), TIDE_DAYS)
+            self.tides_date = today
+
+        refreshed = [s for s in due if s != "report"]
+        changed   = self.rebuild() if refreshed else []
+        if changed or tides_changed:
+            results = [self.records[name] for name in self.zones]
+            notes   = publish_outputs(results, self.tides, self.grids, observed=[self.records[n] for n in changed])
+            if self.on_update is not None:
+                self.on_update({r["zone"]: r for r in results}, self.tides, self.version)
+            await dispatch_alerts(self.io.session, notes, self.alerts)
+        elif due and self.alerts.pending:
+            await dispatch_alerts(self.io.session, [], self.alerts)  # reprise des envois échoués
+        if "report" in due and self.records:
+            await send_reports(self.io.session, self.scheduler, [self.records[name] for name in self.zones])
+
+        if due:
+            logger.info(
+                f"🔄 Cycle {self.cycles} : {', '.join(due)} rafraîchi(s) — "
+                f"{len(changed)}/{len(self.zones)} zones modifiées"
+                + (", marées recalculées" if tides_changed else "")
+            )
+            try:
+                METRICS.write({
+                    "mode":      "daemon",
+                    "cycles":    self.cycles,
+                    "zones":     len(self.zones),
+                    "cells":     len(self.cells),
+                    "changed":   len(changed),
+                    "io":        self.io.stats(),
+                    "scheduler": self.scheduler.stats(),
+                    "cache":     RESPONSE_CACHE.stats(),
+                    "mirror":    COPERNICUS_MIRROR.stats(),
+                    "breakers":  breaker_stats(),
+                })
+            except OSError as e:
+                logger.warning(f"Métriques ignorées : {e}")
+        return changed
+
+    @property
+    def version(self) -> str:
+        """Version de contenu : stable tant qu'aucune zone ni table de marée ne change."""
+        raw = "|".join(self.fingerprints[n] for n in self.zones if n in self.fingerprints)
+        return hashlib.sha256(f"{raw}|{self.tides_date}".encode()).hexdigest()[:16]
+
+    def seconds_until_due(self) -> float:
+        return max(0.0, min(min(self.next_due.values()) - time.monotonic(), DAEMON_MAX_SLEEP_S))
+
+    async def run_forever(self, stop: asyncio.Event) -> None:
+        while not stop.is_set():
+            try:
+                await self.cycle()
+            except Exception as e:
+                # Un cycle raté ne doit pas arrêter le démon : on réessaie à la prochaine échéance
+                logger.error(f"Cycle {self.cycles} en échec : {type(e).__name__}: {e}")
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=self.seconds_until_due())
+            except asyncio.TimeoutError:
+                pass
+
+
+def _stop_event() -> asyncio.Event:
+    """Événement d'arrêt déclenché par SIGINT / SIGTERM."""
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, RuntimeError):
+            pass  # Windows : Ctrl+C lève KeyboardInterrupt
+    return stop
+
+
+async def serve_scheduler(with_api: bool = False) -> None:
+    """
+    Point d'entrée du mode démon (`python script_peche.py --serve-scheduler`).
+    with_api : sert aussi l'API de requête (--serve-api), alimentée en mémoire
+    par chaque publication du démon.
+    """
+    configure()
+    cadences = ", ".join(f"{k} {v // 60} min" for k, v in DAEMON_CADENCES_S.items())
+    logger.info(f"=== PecheurConnect démon démarré — {len(ZONES)} zones | {cadences} ===")
+    stop = _stop_event()
+
+    api = runner = None
+    if with_api:
+        api    = ZoneQueryAPI()
+        api.load_snapshot()
+        runner = await api.start()
+
+    try:
+        async with IOContext() as io:
+            await PipelineDaemon(io, on_update=api.update if api else None).run_forever(stop)
+    finally:
+        if runner is not None:
+            await runner.cleanup()
+    logger.info("=== PecheurConnect démon arrêté ===")
+
+
+# ============================================================================
+# 16. API DE REQUÊTE LOCALE (--serve-api) — zones, prévisions, marées, historique
+# ============================================================================
+
+API_HOST      = os.getenv("PECHEUR_API_HOST", "127.0.0.1")
+API_PORT      = int(os.getenv("PECHEUR_API_PORT", "8080"))
+API_CACHE_MAX = 512   # réponses sérialisées gardées en mémoire (LRU)
+API_GZIP_MIN  = 512   # en dessous, gzip ne rapporte rien
+
+
+class ApiError(Exception):
+    """Erreur de requête renvoyée au client en JSON {"error": ...}."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _parse_date(value: Optional[str], name: str) -> Optional[datetime]:
+    """Date ISO (AAAA-MM-JJ ou AAAA-MM-JJTHH:MM) → datetime UTC naïf."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.rstrip("Z"))
+    except ValueError:
+        raise ApiError(400, f"{name} : date ISO attendue, reçu {value!r}")
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _parse_bbox(value: str) -> tuple[float, float, float, float]:
+    """bbox=lat_min,lon_min,lat_max,lon_max"""
+    try:
+        lat_min, lon_min, lat_max, lon_max = (float(v) for v in value.split(","))
+    except ValueError:
+        raise ApiError(400, "bbox : lat_min,lon_min,lat_max,lon_max attendu")
+    if lat_min > lat_max or lon_min > lon_max:
+        raise ApiError(400, "bbox : bornes inversées")
+    return lat_min, lon_min, lat_max, lon_max
+
+
+class ZoneQueryAPI:
+    """
+    Service HTTP (aiohttp.web) sur les derniers résultats gardés en mémoire.
+
+    Le démon pousse chaque publication via update() ; au démarrage, data.json
+    sert d'instantané. Les réponses sont sérialisées une seule fois par version
+    (cache LRU par chemin + paramètres), avec ETag fort, 304 sur If-None-Match
+    et gzip négocié — les lecteurs concurrents ne relisent jamais le disque,
+    sauf /history qui lit le magasin colonnaire en memmap.
+    """
+
+    def __init__(self, history: Optional[HistoryStore] = None):
+        self.records: dict[str, dict] = {}
+        self.tides:   dict[str, dict] = {}
+        self.version  = ""
+        self.updated  = None
+        self.history  = history or HistoryStore()
+        self._cache: "OrderedDict[tuple, tuple[bytes, bytes, str]]" = OrderedDict()
+
+    # ── Alimentation ────────────────────────────────────────────────────────
+
+    def update(self, records: dict[str, dict], tides: dict, version: str) -> None:
+        """Remplace l'instantané servi (appelé par PipelineDaemon.on_update)."""
+        if version == self.version:
+            return
+        self.records = dict(records)
+        self.tides   = dict(tides or {})
+        self.version = version
+        self.updated = datetime.utcnow().isoformat() + "Z"
+        self._cache.clear()
+        logger.info(f"🛰️ API : version {version} — {len(self.records)} zones")
+
+    def load_snapshot(self, path: str = "data.json") -> bool:
+        """Démarrage à froid depuis le dernier data.json publié."""
+        try:
+            with open(path, encoding="utf-8") as f:
+                payload = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.info(f"API : pas d'instantané {path} ({e}) — en attente du démon")
+            return False
+        version = payload.get("meta", {}).get("generated_at", "")
+        self.update(payload.get("zones", {}), payload.get("marees", {}),
+                    hashlib.sha256(version.encode()).hexdigest()[:16])
+        return True
+
+    # ── Réponses ────────────────────────────────────────────────────────────
+
+    def _render(self, key: tuple, build) -> tuple[bytes, bytes, str]:
+        """(corps, corps gzip, etag) pour une clé de requête, calculé une fois par version."""
+        hit = self._cache.get(key)
+        if hit is not None:
+            self._cache.move_to_end(key)
+            return hit
+        body = _dump_min(build())
+        gz   = gzip.compress(body, mtime=0) if len(body) >= API_GZIP_MIN else b""
+        etag = f'"{hashlib.sha256(body).hexdigest()[:20]}"'
+        self._cache[key] = (body, gz, etag)
+        if len(self._cache) > API_CACHE_MAX:
+            self._cache.popitem(last=False)
+        return body, gz, etag
+
+    def _respond(self, request, build, cacheable: bool = True):
+        from aiohttp import web
+        key = (request.path, tuple(sorted(request.query.items())))
+        try:
+            if cacheable:
+                body, gz, etag = self._render(key, build)
+            else:
+                body = _dump_min(build())
+                gz   = gzip.compress(body, mtime=0) if len(body) >= API_GZIP_MIN else b""
+                etag = f'"{hashlib.sha256(body).hexdigest()[:20]}"'
+        except ApiError as e:
+            return web.json_response({"error": str(e)}, status=e.status,
+                                     headers={"Access-Control-Allow-Origin": "*"})
+
+        # Un ETag fort par représentation : le corps gzip porte le suffixe -gz
+        use_gz = bool(gz) and "gzip" in request.headers.get("Accept-Encoding", "")
+        if use_gz:
+            etag = f'{etag[:-1]}-gz"'
+        headers = {
+            "ETag":                        etag,
+            "Cache-Control":               "no-cache",
+            "Vary":                        "Accept-Encoding",
+            "Access-Control-Allow-Origin": "*",
+            "Access-Control-Expose-Headers": "ETag",
+        }
+        if etag in (t.strip() for t in request.headers.get("If-None-Match", "").split(",")):
+            return web.Response(status=304, headers=headers)
+        if use_gz:
+            headers["Content-Encoding"] = "gzip"
+            body = gz
+        return web.Response(body=body, content_type="application/json", charset="utf-8", headers=headers)
+
+    def _record(self, request) -> dict:
+        zone = request.match_info["zone"].upper()
+        if zone not in self.records:
+            raise ApiError(404, f"zone inconnue : {zone}")
+        return self.records[zone]
+
+    # ── Routes ──────────────────────────────────────────────────────────────
+
+    async def route_meta(self, request):
+        return self._respond(request, lambda: {
+            "version":     self.version,
+            "updated_at":  self.updated,
+            "total_zones": len(self.records),
+            "regions":     sorted({r["region"] for r in self.records.values()}),
+        })
+
+    async def route_zones(self, request):
+        def build():
+            q       = request.query
+            records = self.records.values()
+            if "region" in q:
+                wanted  = {r.strip().lower() for r in q["region"].split(",")}
+                records = [r for r in records if r["region"].lower() in wanted]
+            if "bbox" in q:
+                lat_min, lon_min, lat_max, lon_max = _parse_bbox(q["bbox"])
+                records = [r for r in records
+                           if lat_min <= r["lat"] <= lat_max and lon_min <= r["lon"] <= lon_max]
+            fields = q.get("fields", "summary")
+            if fields not in ("summary", "full"):
+                raise ApiError(400, "fields : summary ou full")
+            if fields == "summary":
+                records = [{**{k: r[k] for k in SUMMARY_ZONE_FIELDS if k in r},
+                            "zone": r["zone"], "source": r["copernicus"]["source"]} for r in records]
+            return {"version": self.version, "count": len(records),
+                    "zones": {r["zone"]: r for r in records}}
+        return self._respond(request, build)
+
+    async def route_zone(self, request):
+        return self._respond(request, lambda: self._record(request))
+
+    async def route_forecast(self, request):
+        def build():
+            record = self._record(request)
+            out    = {"zone": record["zone"], "forecast_7j": record.get("forecast_7j")}
+            packed = record.get("forecast_48h")
+            if packed:
+                hourly = unpack_hourly(packed)
+                hourly["safety"] = SAFETY_CODES[hourly["safety"]]
+                out["forecast_48h"] = {"best_window": packed["best_window"],
+                                       **{name: values.tolist() for name, values in hourly.items()}}
+            return out
+        return self._respond(request, build)
+
+    async def route_tides(self, request):
+        def build():
+            zone = self._record(request)["zone"]
+            day  = _parse_date(request.query.get("date"), "date")
+            if day is None:
+                return self.tides.get(zone) or compute_tides(zone, datetime.utcnow())
+            wanted = day.strftime("%Y-%m-%d")
+            for jour in self.tides.get(zone, {}).get("jours", []):
+                if jour["date"] == wanted:
+                    return {**jour, "zone": zone}
+            table = compute_tides(zone, day.replace(hour=0, minute=0, second=0, microsecond=0))
+            return {"date": wanted, **table}
+        return self._respond(request, build)
+
+    async def route_history(self, request):
+        def build():
+            zone  = self._record(request)["zone"]
+            start = _parse_date(request.query.get("start"), "start")
+            end   = _parse_date(request.query.get("end"), "end")
+            names = [f for f in request.query.get("fields", "").split(",") if f] or None
+            if names and not set(names) <= set(HISTORY_FIELDS):
+                raise ApiError(400, f"fields : parmi {', '.join(HISTORY_FIELDS)}")
+            series = self.history.query(zone, start, end, names)
+            return {"zone": zone, "count": int(series["t"].size),
+                    **{name: [None if v != v else v for v in values.tolist()]   # NaN → null
+                       for name, values in series.items()}}
+        # L'historique grossit entre deux versions : pas de cache mémoire, l'ETag suffit
+        return self._respond(request, build, cacheable=False)
+
+    async def route_regions(self, request):
+        def build():
+            out: dict[str, dict] = {}
+            for r in self.records.values():
+                reg = out.setdefault(r["region"], {"zones": [], "scores": [], "danger": 0})
+                reg["zones"].append(r["zone"])
+                reg["scores"].append(r["indices"]["peche_score"])
+                reg["danger"] += r["indices"]["securite_code"] == "danger"
+            return {name: {"zones": reg["zones"], "zones_danger": reg["danger"],
+                           "score_moyen": round(float(np.mean(reg["scores"])), 2)}
+                    for name, reg in sorted(out.items())}
+        return self._respond(request, build)
+
+    def app(self):
+        from aiohttp import web
+        app = web.Application()
+        app.router.add_get("/health", self.route_meta)
+        app.router.add_get("/api/v1/meta", self.route_meta)
+        app.router.add_get("/api/v1/regions", self.route_regions)
+        app.router.add_get("/api/v1/zones", self.route_zones)
+        app.router.add_get("/api/v1/zones/{zone}", self.route_zone)
+        app.router.add_get("/api/v1/zones/{zone}/forecast", self.route_forecast)
+        app.router.add_get("/api/v1/zones/{zone}/tides", self.route_tides)
+        app.router.add_get("/api/v1/zones/{zone}/history", self.route_history)
+        return app
+
+    async def start(self, host: str = API_HOST, port: int = API_PORT):
+        """Démarre le serveur ; retourne le runner (runner.cleanup() pour l'arrêter)."""
+        from aiohttp import web
+        runner = web.AppRunner(self.app(), access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        logger.info(f"🛰️ API de requête sur http://{host}:{port}/api/v1/zones")
+        return runner
+
+
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description="PecheurConnect — surveillance maritime")
+    parser.add_argument("--serve-scheduler", action="store_true",
+                        help="mode démon : rafraîchit chaque source à sa cadence (PECHEUR_CADENCE_*_S)")
+    parser.add_argument("--serve-api", action="store_true",
+                        help="mode démon + API de requête HTTP (PECHEUR_API_HOST / PECHEUR_API_PORT)")
+    parser.add_argument("--backfill", nargs=2, metavar=("DEBUT", "FIN"),
+                        help="rattrapage Copernicus [DEBUT, FIN[ (AAAA-MM-JJ) dans l'historique, reprenable")
+    parser.add_argument("--workers", type=int, default=BACKFILL_WORKERS,
+                        help="tranches téléchargées en parallèle (--backfill)")
+    parser.add_argument("--chunk-days", type=int, default=BACKFILL_CHUNK_DAYS,
+                        help="taille d'une tranche en jours (--backfill)")
+    args = parser.parse_args()
+    if args.backfill:
+        configure()
+        start, end = (datetime.fromisoformat(d) for d in args.backfill)
+        asyncio.run(backfill_history(start, end, args.workers, args.chunk_days))
+    elif args.serve_scheduler or args.serve_api:
+        asyncio.run(serve_scheduler(with_api=args.serve_api))
+    else:
+        asyncio.run(main())
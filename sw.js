@@ -1,9 +1,10 @@
-const CACHE_NAME = 'pecheur-connect-v3';
+const CACHE_NAME = 'pecheur-connect-v4';
 const ASSETS_TO_CACHE = [
   './',
   './index.html',
   './history.html',
   './data.json',
+  './data/summary.json',
   'https://unpkg.com/leaflet@1.9.4/dist/leaflet.js',
   'https://unpkg.com/leaflet@1.9.4/dist/leaflet.css',
   'https://cdn.tailwindcss.com'
@@ -32,10 +33,89 @@ self.addEventListener('activate', (event) => {
 
 // 3. Stratégie : Network First with Cache Fallback
 // On essaie d'avoir les dernières données, sinon on prend le cache
+// (data.json : mise à jour par delta, voir 4.)
 self.addEventListener('fetch', (event) => {
+  if (new URL(event.request.url).pathname.endsWith('/data.json')) {
+    event.respondWith(fetchDataJson(event.request));
+    return;
+  }
   event.respondWith(
     fetch(event.request).catch(() => {
       return caches.match(event.request);
     })
   );
 });
+
+// 4. data.json par deltas : data/feed/index.json donne la version courante et,
+// pour chaque version récente, le patch JSON (RFC 6902) qui y mène.
+// Version en cache à jour → servie telle quelle ; patch disponible → appliqué ;
+// sinon (version trop ancienne, erreur) → data.json complet.
+const DATA_URL = './data.json';
+
+function unescapePointer(token) {
+  return token.replace(/~1/g, '/').replace(/~0/g, '~');
+}
+
+function applyPatch(doc, patch) {
+  for (const op of patch) {
+    const tokens = op.path.split('/').slice(1).map(unescapePointer);
+    if (tokens.length === 0) {
+      if (op.op === 'remove') throw new Error('remove de la racine');
+      doc = op.value;
+      continue;
+    }
+    const key = tokens.pop();
+    let target = doc;
+    for (const token of tokens) target = Array.isArray(target) ? target[+token] : target[token];
+    if (target === null || typeof target !== 'object') throw new Error(`chemin invalide : ${op.path}`);
+    if (Array.isArray(target)) {
+      const i = key === '-' ? target.length : +key;
+      if (op.op === 'add') target.splice(i, 0, op.value);
+      else if (op.op === 'remove') target.splice(i, 1);
+      else if (op.op === 'replace') target[i] = op.value;
+      else throw new Error(`opération non gérée : ${op.op}`);
+    } else if (op.op === 'remove') {
+      delete target[key];
+    } else if (op.op === 'add' || op.op === 'replace') {
+      target[key] = op.value;
+    } else {
+      throw new Error(`opération non gérée : ${op.op}`);
+    }
+  }
+  return doc;
+}
+
+async function patchedDataJson(cache, cached) {
+  const current = await cached.clone().json();
+  const have = current.meta && current.meta.generated_at;
+  const index = await (await fetch('./data/feed/index.json', { cache: 'no-store' })).json();
+  if (have === index.current) return cached;
+  const delta = index.deltas && index.deltas[have];
+  if (!delta) return null;
+  const feed = await (await fetch(`./data/${delta.file}`, { cache: 'no-store' })).json();
+  if (feed.from !== have || feed.to !== index.current) return null;
+  const body = JSON.stringify(applyPatch(current, feed.patch));
+  const response = new Response(body, { headers: { 'Content-Type': 'application/json' } });
+  await cache.put(DATA_URL, response.clone());
+  return response;
+}
+
+async function fetchDataJson(request) {
+  const cache = await caches.open(CACHE_NAME);
+  const cached = await cache.match(DATA_URL);
+  if (cached) {
+    try {
+      const patched = await patchedDataJson(cache, cached);
+      if (patched) return patched;
+    } catch (e) {
+      // flux absent ou patch inapplicable : instantané complet ci-dessous
+    }
+  }
+  try {
+    const fresh = await fetch(request, { cache: 'no-store' });
+    if (fresh.ok) await cache.put(DATA_URL, fresh.clone());
+    return fresh;
+  } catch (e) {
+    return cached || Response.error();
+  }
+}